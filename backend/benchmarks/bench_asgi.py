@@ -0,0 +1,220 @@
+"""Concurrent slow generations served by the WSGI (Flask) and ASGI apps.
+
+A stub Ollama answers every /api/generate after a fixed delay. For each
+mode, a fresh backend process serves a burst of simultaneous POST /tasks
+requests against a SQLite file, while its thread count and memory are
+sampled from /proc.
+
+Run from the backend directory: ``uv run python benchmarks/bench_asgi.py``
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import aiohttp
+
+GENERATION_SECONDS = 2.0
+CONCURRENCY = [50, 200, 500, 1000]
+PORT = 5077
+OLLAMA_PORT = 5078
+SRC = Path(__file__).resolve().parents[1] / "src"
+SERVERS = {
+    "wsgi": [
+        sys.executable,
+        "-c",
+        f"from app import app; app.run(port={PORT}, threaded=True)",
+    ],
+    "asgi": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "asgi:app",
+        "--port",
+        str(PORT),
+        "--log-level",
+        "warning",
+    ],
+}
+
+
+class _SlowOllama(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def serve_ollama(port):
+    counter = itertools.count()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._reply({"models": [{"name": "bench"}]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(GENERATION_SECONDS)
+            self._reply(
+                {
+                    "response": f"Task {next(counter)}",
+                    "done": True,
+                    "total_duration": int(GENERATION_SECONDS * 1e9),
+                    "eval_count": 20,
+                    "eval_duration": int(GENERATION_SECONDS * 1e9),
+                }
+            )
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _SlowOllama(("127.0.0.1", port), Handler).serve_forever()
+
+
+class ProcessSampler:
+    """Peak thread count and resident memory of a process."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.threads = 0
+        self.idle_rss_mb = self._status()[1]
+        self.rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _status(self):
+        status = Path(f"/proc/{self.pid}/status").read_text().splitlines()
+        fields = dict(line.split(":", 1) for line in status)
+        return int(fields["Threads"]), int(fields["VmRSS"].split()[0]) / 1024
+
+    def _run(self):
+        while not self._stop.wait(0.02):
+            threads, rss_mb = self._status()
+            self.threads = max(self.threads, threads)
+            self.rss_mb = max(self.rss_mb, rss_mb)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def wait_until_up(session, base_url):
+    for _ in range(200):
+        try:
+            async with session.get(f"{base_url}/tasks/count") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("Backend did not start")
+
+
+async def burst(session, base_url, concurrency):
+    async def one():
+        started = time.perf_counter()
+        try:
+            async with session.post(
+                f"{base_url}/tasks", json={"language": "english", "model": "bench"}
+            ) as response:
+                await response.read()
+                ok = response.status == 201
+        except aiohttp.ClientError:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+async def measure(mode, concurrency, env):
+    base_url = f"http://127.0.0.1:{PORT}"
+    process = subprocess.Popen(
+        SERVERS[mode], cwd=SRC, env=env, stderr=subprocess.DEVNULL
+    )
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0),
+            timeout=aiohttp.ClientTimeout(total=120),
+        ) as session:
+            await wait_until_up(session, base_url)
+            with ProcessSampler(process.pid) as sampler:
+                results, elapsed = await burst(session, base_url, concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+    latencies = sorted(latency for ok, latency in results if ok)
+    return {
+        "ok": len(latencies),
+        "wall": elapsed,
+        "p50": statistics.median(latencies) if latencies else None,
+        "p99": latencies[int(0.99 * (len(latencies) - 1))] if latencies else None,
+        "threads": sampler.threads,
+        "idle_rss_mb": sampler.idle_rss_mb,
+        "rss_mb": sampler.rss_mb,
+    }
+
+
+def main():
+    # The stub runs in its own process so it does not compete with the client.
+    ollama = subprocess.Popen([sys.executable, __file__, "--ollama"])
+    print(
+        f"{'mode':>5} {'requests':>9} {'ok':>5} {'wall s':>7} {'p50 s':>6} "
+        f"{'p99 s':>6} {'threads':>8} {'idle MB':>8} {'peak MB':>8}"
+    )
+    for concurrency in CONCURRENCY:
+        for mode in SERVERS:
+            with tempfile.TemporaryDirectory() as directory:
+                env = dict(
+                    os.environ,
+                    DATABASE_URL=f"sqlite:///{directory}/bench.db",
+                    # SQLite has a single writer; more connections only add
+                    # lock contention to both modes.
+                    DB_POOL_SIZE="1",
+                    DB_MAX_OVERFLOW="0",
+                    OLLAMA_URL=f"http://127.0.0.1:{OLLAMA_PORT}",
+                    OLLAMA_MODEL_CONCURRENCY=str(concurrency),
+                    OLLAMA_MAX_IN_FLIGHT=str(concurrency),
+                    OLLAMA_QUEUE_SIZE=str(concurrency),
+                    OLLAMA_HEALTH_INTERVAL="0",
+                    OLLAMA_KEEP_WARM_INTERVAL="0",
+                    TASK_POOL_HIGH_WATERMARK="0",
+                    TASK_RETENTION_MAX_ROWS="0",
+                    DEDUP_MODE="off",
+                )
+                result = asyncio.run(measure(mode, concurrency, env))
+            print(
+                f"{mode:>5} {concurrency:>9} {result['ok']:>5} "
+                f"{result['wall']:>7.2f} {result['p50']:>6.2f} {result['p99']:>6.2f} "
+                f"{result['threads']:>8} {result['idle_rss_mb']:>8.1f} {result['rss_mb']:>8.1f}"
+            )
+    ollama.terminate()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--ollama"]:
+        serve_ollama(OLLAMA_PORT)
+    else:
+        main()
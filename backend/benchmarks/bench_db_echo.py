@@ -0,0 +1,114 @@
+"""Request latency of the task listing endpoints with SQL echo on and off.
+
+Each run starts a fresh process with ``DB_ECHO`` set, serves GET /tasks,
+GET /tasks/count and POST /tasks/<id>/like through the Flask test client
+from several threads against a SQLite file, and writes the engine log to a
+file the way a container writes it to its log driver.
+
+Run from the backend directory: ``uv run python benchmarks/bench_db_echo.py``
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+THREADS = 8
+REQUESTS_PER_THREAD = 250
+TASKS = 500
+
+
+def serve_and_measure(result_path):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    from flask import Flask
+
+    from routes.tasks import tasks_bp
+    from services.tasks import save_tasks
+
+    app = Flask(__name__)
+    app.register_blueprint(tasks_bp)
+    task_ids = save_tasks([f"Task {i}" for i in range(TASKS)])
+    paths = [
+        ("get", "/tasks?limit=10"),
+        ("get", "/tasks/count"),
+        ("post", f"/tasks/{task_ids[0]}/like"),
+    ]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        local = []
+        for i in range(REQUESTS_PER_THREAD):
+            method, path = paths[i % len(paths)]
+            started = time.perf_counter()
+            if method == "get":
+                client.get(path)
+            else:
+                client.post(path, json={"like": i % 2})
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    Path(result_path).write_text(
+        json.dumps(
+            {
+                "requests_per_second": len(latencies) / elapsed,
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+                "p99_ms": latencies[int(0.99 * (len(latencies) - 1))],
+            }
+        )
+    )
+
+
+def main():
+    print(
+        f"{'echo':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'log MB':>8}"
+    )
+    for echo in ("false", "true"):
+        with tempfile.TemporaryDirectory() as directory:
+            result_path = Path(directory) / "result.json"
+            log_path = Path(directory) / "engine.log"
+            env = dict(
+                os.environ,
+                DB_ECHO=echo,
+                DATABASE_URL=f"sqlite:///{directory}/bench.db",
+                TASK_POOL_HIGH_WATERMARK="0",
+                TASK_RETENTION_MAX_ROWS="0",
+            )
+            with open(log_path, "w") as log:
+                subprocess.run(
+                    [sys.executable, __file__, "--serve", str(result_path)],
+                    env=env,
+                    stdout=log,
+                    check=True,
+                )
+            result = json.loads(result_path.read_text())
+            log_mb = log_path.stat().st_size / 1e6
+            print(
+                f"{echo:>6} {result['requests_per_second']:>8.0f} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {log_mb:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        serve_and_measure(sys.argv[2])
+    else:
+        main()
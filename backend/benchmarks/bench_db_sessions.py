@@ -0,0 +1,201 @@
+"""Pool checkouts and connection hold time per request, with a session per
+service call and with one session per request.
+
+Each mode runs in a fresh process against a SQLite file with 500 tasks. The
+task and settings routes are served through the Flask test client from
+several threads, one endpoint at a time. POST /tasks goes to a stub Ollama
+that answers after a short delay. The checkouts and the time connections
+spend checked out are taken from the engine's pool events. Set
+``BENCH_DATABASE_URL`` to measure against PostgreSQL instead; its tasks
+are deleted first.
+
+Run from the backend directory: ``uv run python benchmarks/bench_db_sessions.py``
+"""
+
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from sqlalchemy import event
+
+THREADS = [1, 8]
+REQUESTS = 800
+TASKS = 500
+GENERATION_SECONDS = 0.05
+MODES = ["per call", "per request"]
+
+
+def serve_ollama():
+    counter = itertools.count()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._reply({"models": [{"name": "bench"}]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(GENERATION_SECONDS)
+            self._reply({"response": f"Count tile {next(counter)}", "done": True})
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+class PoolUsage:
+    """Checkouts and total seconds connections were checked out."""
+
+    def __init__(self, engine):
+        self.checkouts = 0
+        self.hold_seconds = 0.0
+        self._lock = threading.Lock()
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["bench_checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("bench_checked_out_at", None)
+        if started is not None:
+            with self._lock:
+                self.hold_seconds += time.perf_counter() - started
+
+    def snapshot(self):
+        with self._lock:
+            return self.checkouts, self.hold_seconds
+
+
+def serve_and_measure(mode, threads, result_path):
+    os.environ["OLLAMA_URL"] = serve_ollama()
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    from flask import Flask
+
+    import db.db
+    from routes.settings import settings_bp
+    from routes.tasks import tasks_bp
+    from services.settings import save_settings
+    from services.tasks import delete_all_tasks, save_tasks
+
+    app = Flask(__name__)
+    app.register_blueprint(tasks_bp)
+    app.register_blueprint(settings_bp)
+    if mode == "per request":
+        # The same hooks as app.py.
+        app.before_request(db.db.begin_request_session)
+        app.after_request(lambda response: db.db.release_request_session() or response)
+        app.teardown_request(lambda error=None: db.db.end_request_session())
+
+    delete_all_tasks(keep_favorites=False)
+    task_ids = save_tasks([f"Task {i}" for i in range(TASKS)])
+    save_settings({"LANGUAGE": "english"})
+    usage = PoolUsage(db.db._engine)
+    requests = {
+        "GET /tasks?limit=10": lambda client, i: client.get("/tasks?limit=10"),
+        "GET /tasks?include_total=1": lambda client, i: client.get(
+            "/tasks?limit=10&include_total=1"
+        ),
+        "GET /tasks/count": lambda client, i: client.get("/tasks/count"),
+        "POST /tasks/<id>/like": lambda client, i: client.post(
+            f"/tasks/{task_ids[i % TASKS]}/like", json={"like": i % 2}
+        ),
+        "POST /tasks": lambda client, i: client.post(
+            "/tasks", json={"language": "english", "model": "bench"}
+        ),
+        "GET /settings": lambda client, i: client.get("/settings"),
+    }
+
+    results = {}
+    for name, send in requests.items():
+
+        def worker():
+            client = app.test_client()
+            for i in range(REQUESTS // threads):
+                response = send(client, i)
+                assert response.status_code < 400, (name, response.status_code)
+
+        checkouts, hold_seconds = usage.snapshot()
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        total = REQUESTS // threads * threads
+        checkouts_after, hold_seconds_after = usage.snapshot()
+        results[name] = {
+            "requests_per_second": total / elapsed,
+            "checkouts": (checkouts_after - checkouts) / total,
+            "hold_ms": 1000 * (hold_seconds_after - hold_seconds) / total,
+        }
+    Path(result_path).write_text(json.dumps(results))
+
+
+def main():
+    print(
+        f"{'threads':>7} {'mode':>12} {'request':>28} {'req/s':>7} "
+        f"{'checkouts':>10} {'hold ms':>8}"
+    )
+    for threads in THREADS:
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as directory:
+                result_path = Path(directory) / "result.json"
+                env = dict(
+                    os.environ,
+                    DATABASE_URL=os.getenv(
+                        "BENCH_DATABASE_URL", f"sqlite:///{directory}/bench.db"
+                    ),
+                    TASK_POOL_HIGH_WATERMARK="0",
+                    TASK_RETENTION_MAX_ROWS="0",
+                    OLLAMA_MODEL_CONCURRENCY=str(threads),
+                    OLLAMA_MAX_IN_FLIGHT=str(threads),
+                )
+                subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--serve",
+                        mode,
+                        str(threads),
+                        str(result_path),
+                    ],
+                    env=env,
+                    check=True,
+                )
+                for name, result in json.loads(result_path.read_text()).items():
+                    print(
+                        f"{threads:>7} {mode:>12} {name:>28} "
+                        f"{result['requests_per_second']:>7.0f} "
+                        f"{result['checkouts']:>10.2f} {result['hold_ms']:>8.3f}"
+                    )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        serve_and_measure(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        main()
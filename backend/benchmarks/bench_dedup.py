@@ -0,0 +1,63 @@
+"""Build time and lookup latency of the near-duplicate index.
+
+Run from the backend directory: ``uv run python benchmarks/bench_dedup.py``
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from services.dedup import DuplicateIndex  # noqa: E402
+
+SIZES = [10_000, 25_000, 50_000]
+LOOKUPS = 2_000
+
+
+def synthetic_tasks(count, rng):
+    vocabulary = [f"word{i}" for i in range(3_000)]
+    return [
+        " ".join(rng.choices(vocabulary, k=rng.randint(6, 12))) for _ in range(count)
+    ]
+
+
+def rephrase(text, rng):
+    words = text.split()
+    rng.shuffle(words)
+    return " ".join(words[:-1])
+
+
+def main():
+    rng = random.Random(42)
+    print(
+        f"{'tasks':>8} {'build s':>8} {'avg ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'dup hits':>9}"
+    )
+    for size in SIZES:
+        tasks = synthetic_tasks(size, rng)
+        index = DuplicateIndex(capacity=0)
+
+        started = time.perf_counter()
+        index.build(enumerate(tasks))
+        build_seconds = time.perf_counter() - started
+
+        probes = [rephrase(rng.choice(tasks), rng) for _ in range(LOOKUPS // 2)]
+        probes += synthetic_tasks(LOOKUPS // 2, rng)
+        latencies = []
+        hits = 0
+        for probe in probes:
+            started = time.perf_counter()
+            hits += index.find_duplicate(probe) is not None
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(
+            f"{size:>8} {build_seconds:>8.2f} {statistics.mean(latencies):>8.3f} "
+            f"{latencies[len(latencies) // 2]:>8.3f} "
+            f"{latencies[int(len(latencies) * 0.99)]:>8.3f} {hits:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
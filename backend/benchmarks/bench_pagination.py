@@ -0,0 +1,90 @@
+"""Page latency of GET /tasks listings with offset and keyset pagination.
+
+Run from the backend directory: ``uv run python benchmarks/bench_pagination.py``
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sqlalchemy import create_engine, insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db.db import Base, Task, get_tasks_from_db  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+PAGE_SIZE = 10
+REPEAT = 20
+
+
+def fill(engine, size, rng):
+    start = datetime(2020, 1, 1)
+    with engine.begin() as connection:
+        for offset in range(0, size, 50_000):
+            connection.execute(
+                insert(Task),
+                [
+                    {
+                        "task_text": f"Task {i}",
+                        "favorite": int(rng.random() < 0.1),
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + 50_000, size))
+                ],
+            )
+
+
+def page_ms(session, **kwargs):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        get_tasks_from_db(session, limit=PAGE_SIZE, **kwargs)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure(session, size):
+    deep = size // 2
+    anchor = get_tasks_from_db(session, skip=deep - 1, limit=1)[0]
+    after = (anchor.created_at, anchor.id)
+    return [
+        page_ms(session),
+        page_ms(session, skip=deep),
+        page_ms(session, after=after),
+        page_ms(session, favorite=True, skip=deep // 10),
+    ]
+
+
+def main():
+    rng = random.Random(42)
+    print(
+        f"{'tasks':>9} {'indexes':>8} {'first ms':>9} {'offset ms':>10} "
+        f"{'keyset ms':>10} {'fav offset ms':>14}"
+    )
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{directory}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            fill(engine, size, rng)
+            session = sessionmaker(bind=engine)()
+            for label in ("yes", "no"):
+                results = measure(session, size)
+                print(
+                    f"{size:>9} {label:>8} {results[0]:>9.2f} {results[1]:>10.2f} "
+                    f"{results[2]:>10.2f} {results[3]:>14.2f}"
+                )
+                with engine.begin() as connection:
+                    for index in Task.__table__.indexes:
+                        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            session.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
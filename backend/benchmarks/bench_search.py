@@ -0,0 +1,169 @@
+"""Task search on PostgreSQL with the tsvector column and its GIN index.
+
+For each table size, fills a fresh tasks table with synthetic tasks (four
+fifths English, one fifth German), then adds the search column and index the
+way an existing deployment is upgraded at startup. Queries for words of
+different frequency run through the full-text search, an ``ILIKE`` scan as
+it would be written without an index, and the in-process fallback index
+built over the same rows.
+
+Run from the backend directory with a scratch PostgreSQL database, whose
+task tables are dropped:
+``BENCH_DATABASE_URL=postgresql://... uv run python benchmarks/bench_search.py``
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+SIZES = [100_000, 1_000_000]
+CHUNK = 10_000
+REPEAT = 20
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "de", "bu", "fa", "gi"]
+
+
+def vocabulary(rng, size=3000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_tasks(count, seed=7):
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    # Zipf-like word frequencies, as in natural text.
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return [
+        " ".join(rng.choices(words, weights, k=rng.randint(6, 12)))
+        for _ in range(count)
+    ]
+
+
+def pick_terms(tasks):
+    """Words found in roughly 0.01%, 1% and 10% of the tasks."""
+    frequency = Counter(word for task in tasks for word in set(task.split()))
+    terms = {}
+    for name, share in (("rare", 0.0001), ("medium", 0.01), ("common", 0.1)):
+        terms[name] = min(
+            frequency, key=lambda word: abs(frequency[word] - share * len(tasks))
+        )
+    return terms
+
+
+def median_ms(run):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def measure(url, size):
+    from db.db import (
+        Base,
+        Task,
+        add_search_vector,
+        add_tasks_to_db,
+        search_tasks_in_db,
+    )
+    from services.search import SearchIndex, search_configs
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    tasks = synthetic_tasks(size)
+    started = time.perf_counter()
+    for offset in range(0, size, CHUNK):
+        language = "english" if offset % (5 * CHUNK) else "Deutsch"
+        add_tasks_to_db(session, tasks[offset : offset + CHUNK], language=language)
+    insert_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    add_search_vector(engine)
+    migrate_seconds = time.perf_counter() - started
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE tasks"))
+
+    rows = session.execute(text("SELECT id, task_text FROM tasks")).all()
+    started = time.perf_counter()
+    index = SearchIndex()
+    index.build(rows)
+    index_seconds = time.perf_counter() - started
+
+    terms = pick_terms(tasks)
+    terms["two words"] = f"{terms['medium']} {terms['common']}"
+    # Not made of the syllables, so no task contains it: a full ILIKE scan.
+    terms["no match"] = "xylophone"
+    configs = search_configs()
+    results = []
+    for name, query in terms.items():
+        fts_ms, page = median_ms(
+            lambda: search_tasks_in_db(session, query, configs, limit=10)
+        )
+        cursor = (page[-1].rank, page[-1].id) if len(page) == 10 else None
+        next_ms, _ = (
+            median_ms(
+                lambda: search_tasks_in_db(
+                    session, query, configs, limit=10, after=cursor
+                )
+            )
+            if cursor
+            else (None, None)
+        )
+        words = query.split()
+        ilike_ms, _ = median_ms(
+            lambda: (
+                session.query(Task.id)
+                .filter(*(Task.task_text.ilike(f"%{word}%") for word in words))
+                .order_by(Task.id.desc())
+                .limit(10)
+                .all()
+            )
+        )
+        fallback_ms, _ = median_ms(lambda: index.search(query, limit=10))
+        matches = sum(set(words) <= set(task.split()) for task in tasks)
+        results.append((name, matches, fts_ms, next_ms, ilike_ms, fallback_ms))
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    return insert_seconds, migrate_seconds, index_seconds, results
+
+
+def main():
+    url = os.getenv("BENCH_DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database.")
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+    for size in SIZES:
+        insert_seconds, migrate_seconds, index_seconds, results = measure(url, size)
+        print(
+            f"{size:,} tasks: insert {insert_seconds:.1f} s, add column and GIN "
+            f"index {migrate_seconds:.1f} s, fallback index build "
+            f"{index_seconds:.1f} s"
+        )
+        print(
+            f"{'query':>10} {'matches':>8} {'fts ms':>8} {'next ms':>8} "
+            f"{'ilike ms':>9} {'fallback ms':>12}"
+        )
+        for name, matches, fts_ms, next_ms, ilike_ms, fallback_ms in results:
+            next_text = f"{next_ms:>8.2f}" if next_ms is not None else f"{'-':>8}"
+            print(
+                f"{name:>10} {matches:>8} {fts_ms:>8.2f} {next_text} "
+                f"{ilike_ms:>9.2f} {fallback_ms:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Time until the backend is live and ready when the database comes up late.
+
+Starts gunicorn with the production settings against a stub Ollama and a
+gate in front of a scratch PostgreSQL database. The gate refuses
+connections until the database "starts" a given number of seconds after the
+backend process, as it does when all containers start at once. The stub
+Ollama loads the saved model on the warm-up request, which takes
+``LOAD_SECONDS``. From the moment the process is spawned, /healthz and
+/readyz are polled every 50 ms until they answer 200.
+
+Each delay runs with the connection backoff of the backend, with its cap
+set to 1 and 5 seconds, and with a fixed delay of 5 seconds between
+attempts, as the backend used to retry.
+
+Run from the backend directory with a scratch PostgreSQL database:
+``BENCH_DATABASE_URL=postgresql://... uv run python benchmarks/bench_startup.py``
+"""
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from sqlalchemy import create_engine, make_url, text
+
+# Not multiples of 5, which would favor the fixed delay.
+DB_DELAYS = [0, 3, 7, 13, 31]
+REPEAT = 3
+LOAD_SECONDS = 1.0
+POLL_SECONDS = 0.05
+PORT = 5087
+OLLAMA_PORT = 5088
+GATE_PORT = 5089
+MODEL = "bench"
+SRC = Path(__file__).resolve().parents[1] / "src"
+_CAP = (
+    "import db.db; backoff = db.db.connect_backoff; "
+    "db.db.connect_backoff = lambda attempt: backoff(attempt, cap={}); "
+)
+POLICIES = {
+    "backoff": "",
+    "cap 1 s": _CAP.format(1.0),
+    "cap 5 s": _CAP.format(5.0),
+    "fixed 5 s": "import db.db; db.db.connect_backoff = lambda attempt: 5.0; ",
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve_ollama(port):
+    loaded = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._reply({"models": [{"name": name} for name in loaded]})
+            else:
+                self._reply({"models": [{"name": MODEL}]})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if body["model"] not in loaded:
+                time.sleep(LOAD_SECONDS)
+                loaded.add(body["model"])
+            self._reply({"response": "Task", "done": True})
+
+        def _reply(self, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = _Server(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def database_address(url):
+    """Socket family and address of the database in ``url``."""
+    url = make_url(url)
+    host = url.query.get("host") or url.host or "localhost"
+    port = url.port or 5432
+    if host.startswith("/"):
+        return socket.AF_UNIX, f"{host}/.s.PGSQL.{port}"
+    return socket.AF_INET, (host, port)
+
+
+class DatabaseGate:
+    """Forwards TCP connections to the database, but only listens from
+    ``delay`` seconds after start(): before, connections are refused."""
+
+    def __init__(self, url, port):
+        self.family, self.address = database_address(url)
+        self.port = port
+        self._listener = None
+        self._stopped = threading.Event()
+
+    def start(self, delay):
+        self._stopped.clear()
+        threading.Thread(target=self._serve, args=(delay,), daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._listener is not None:
+            # Closing alone does not wake a thread blocked in accept().
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+            self._listener = None
+
+    def _serve(self, delay):
+        if self._stopped.wait(delay):
+            return
+        listener = socket.create_server(("127.0.0.1", self.port))
+        self._listener = listener
+        while not self._stopped.is_set():
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            upstream = socket.socket(self.family)
+            upstream.connect(self.address)
+            for source, target in ((client, upstream), (upstream, client)):
+                threading.Thread(
+                    target=self._pump, args=(source, target), daemon=True
+                ).start()
+
+    @staticmethod
+    def _pump(source, target):
+        try:
+            while data := source.recv(65536):
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for conn in (source, target):
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+def status(path):
+    try:
+        with urlopen(f"http://127.0.0.1:{PORT}{path}", timeout=5) as response:
+            return response.status
+    except URLError as e:
+        return getattr(e, "code", None)
+    except (ConnectionError, TimeoutError):
+        return None
+
+
+def start_backend(gate_url, policy):
+    env = {
+        **os.environ,
+        "DATABASE_URL": gate_url,
+        "OLLAMA_URL": f"http://127.0.0.1:{OLLAMA_PORT}",
+        "GUNICORN_BIND": f"127.0.0.1:{PORT}",
+        "PYTHONPATH": str(SRC),
+    }
+    # Gunicorn forks its workers after the policy is set in the master.
+    command = (
+        f"{POLICIES[policy]}import sys; "
+        "from gunicorn.app.wsgiapp import run; "
+        "sys.argv = ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app']; run()"
+    )
+    return subprocess.Popen(
+        [sys.executable, "-c", command],
+        cwd=SRC.parent,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def measure(gate, gate_url, policy, delay):
+    # A fresh Ollama each time, with the model not loaded yet.
+    ollama = serve_ollama(OLLAMA_PORT)
+    started = time.monotonic()
+    backend = start_backend(gate_url, policy)
+    gate.start(delay)
+    live = ready = None
+    try:
+        while ready is None and time.monotonic() - started < 120:
+            if live is None and status("/healthz") == 200:
+                live = time.monotonic() - started
+            if live is not None and status("/readyz") == 200:
+                ready = time.monotonic() - started
+            time.sleep(POLL_SECONDS)
+        with urlopen(f"http://127.0.0.1:{PORT}/metrics", timeout=5) as response:
+            attempts = json.load(response)["startup"]["database"]["connect_attempts"]
+    finally:
+        backend.terminate()
+        backend.wait()
+        gate.stop()
+        ollama.shutdown()
+        ollama.server_close()
+    return live, ready, attempts
+
+
+def main():
+    url = os.getenv("BENCH_DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database.")
+    sys.path.insert(0, str(SRC))
+    from db.db import AppSettings, Base
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text(f"DELETE FROM {AppSettings.__tablename__}"))
+        connection.execute(
+            AppSettings.__table__.insert().values(settings={"MODEL": MODEL})
+        )
+    engine.dispose()
+
+    gate_url = (
+        make_url(url)
+        .set(host="127.0.0.1", port=GATE_PORT)
+        .difference_update_query(["host"])
+        .render_as_string(hide_password=False)
+    )
+    gate = DatabaseGate(url, GATE_PORT)
+    print(
+        f"{'database up':>11} {'policy':>10} {'live (s)':>9} {'ready (s)':>10} "
+        f"{'after db (s)':>13} {'attempts':>9}"
+    )
+    for delay in DB_DELAYS:
+        for policy in POLICIES:
+            runs = [measure(gate, gate_url, policy, delay) for _ in range(REPEAT)]
+            live = statistics.median(run[0] for run in runs)
+            ready = statistics.median(run[1] for run in runs)
+            attempts = statistics.median(run[2] for run in runs)
+            print(
+                f"{delay:>11} {policy:>10} {live:>9.2f} {ready:>10.2f} "
+                f"{ready - delay:>13.2f} {attempts:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""NDJSON export and import of a million tasks.
+
+Fills a fresh tasks table with synthetic tasks that carry generation
+timings, like tasks made by Ollama. The export streams them through the
+server-side cursor into an NDJSON file; for comparison, the same export is
+run with all rows fetched at once. The file is then imported into the
+emptied table, read in the pieces the import route reads from the request
+body, with several chunk sizes. On PostgreSQL, the table has the search
+column and index added at startup, and chunks are loaded with COPY
+and, for comparison, with a bulk INSERT at the default chunk size. Peak memory is the Python heap
+traced in a separate pass, so tracing does not slow the timed runs.
+
+Run from the backend directory with a scratch database, whose task tables
+are dropped:
+``BENCH_DATABASE_URL=postgresql://... uv run python benchmarks/bench_transfer.py``
+Without ``BENCH_DATABASE_URL``, a SQLite file in a temporary directory is used.
+"""
+
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+SIZE = int(os.getenv("BENCH_TASKS", "1000000"))
+SEED_CHUNK = 10_000
+CHUNK_SIZES = [1_000, 5_000, 20_000]
+WORDS = "take a short walk call a friend water the plants sort old photos".split()
+
+
+def seed(session, size):
+    from db.db import add_tasks_to_db
+
+    rng = random.Random(7)
+    for offset in range(0, size, SEED_CHUNK):
+        add_tasks_to_db(
+            session,
+            [
+                " ".join(rng.choices(WORDS, k=rng.randint(6, 12)))
+                for _ in range(min(SEED_CHUNK, size - offset))
+            ],
+            model="mistral:instruct",
+            language="english",
+            total_duration=rng.randint(10**9, 5 * 10**9),
+            load_duration=rng.randint(10**6, 10**8),
+            prompt_eval_count=rng.randint(50, 80),
+            prompt_eval_duration=rng.randint(10**8, 5 * 10**8),
+            eval_count=rng.randint(20, 40),
+            eval_duration=rng.randint(10**9, 4 * 10**9),
+        )
+    session.execute(text("UPDATE tasks SET favorite = 1 WHERE id % 10 = 0"))
+    session.commit()
+
+
+def export_streamed(session, path):
+    from db.db import iter_task_batches_from_db
+    from services.transfer import TASK_EXPORT_BATCH_SIZE, encode_tasks
+
+    with open(path, "w") as file:
+        for rows in iter_task_batches_from_db(session, TASK_EXPORT_BATCH_SIZE):
+            file.write(encode_tasks(rows))
+
+
+def export_buffered(session, path):
+    from db.db import export_tasks_statement
+    from services.transfer import encode_tasks
+
+    rows = session.execute(export_tasks_statement()).mappings().all()
+    with open(path, "w") as file:
+        file.write(encode_tasks(rows))
+
+
+def import_file(session, path, chunk_size):
+    from db.db import import_tasks_to_db
+    from services.transfer import IMPORT_READ_SIZE, TaskImport
+
+    task_import = TaskImport(chunk_size=chunk_size)
+    with open(path, "rb") as file:
+        for data in iter(lambda: file.read(IMPORT_READ_SIZE), b""):
+            for rows in task_import.feed(data):
+                task_import.record(import_tasks_to_db(session, rows))
+        for rows in task_import.close():
+            task_import.record(import_tasks_to_db(session, rows))
+    return task_import.imported
+
+
+def bulk_insert(db, rows):
+    from db.db import Task
+
+    db.execute(insert(Task), rows)
+
+
+def timed(run, *args):
+    started = time.perf_counter()
+    result = run(*args)
+    return time.perf_counter() - started, result
+
+
+def peak_mb(run, *args):
+    tracemalloc.start()
+    try:
+        run(*args)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def empty_tasks(session):
+    from db.db import delete_tasks_in_db
+
+    delete_tasks_in_db(session)
+    session.expunge_all()
+
+
+def main():
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    from db.db import Base, add_search_vector, count_tasks_in_db
+    from services.transfer import TASK_IMPORT_CHUNK_SIZE
+
+    workdir = tempfile.mkdtemp()
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{workdir}/bench.db"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        add_search_vector(engine)
+    session = sessionmaker(bind=engine)()
+    path = os.path.join(workdir, "tasks.ndjson")
+    print(f"{engine.dialect.name} ({engine.dialect.driver}), {SIZE:,} tasks")
+
+    seconds, _ = timed(seed, session, SIZE)
+    print(f"seed: {seconds:.1f} s")
+
+    for name, export in (("streamed", export_streamed), ("buffered", export_buffered)):
+        seconds, _ = timed(export, session, path)
+        session.expunge_all()
+        memory = peak_mb(export, session, path)
+        session.expunge_all()
+        size_mb = os.path.getsize(path) / 2**20
+        print(
+            f"export {name}: {seconds:.1f} s, {SIZE / seconds:,.0f} tasks/s, "
+            f"{size_mb / seconds:.1f} MB/s, peak heap {memory:.1f} MB "
+            f"({size_mb:.0f} MB file)"
+        )
+
+    runs = [("copy", None, size) for size in CHUNK_SIZES]
+    runs.append(("insert", bulk_insert, TASK_IMPORT_CHUNK_SIZE))
+    if engine.dialect.driver != "psycopg2":
+        runs = [("insert", None, size) for size in CHUNK_SIZES]
+    for name, load, chunk_size in runs:
+        with patch("db.db._copy_tasks", load) if load else contextlib.nullcontext():
+            empty_tasks(session)
+            seconds, imported = timed(import_file, session, path, chunk_size)
+            assert imported == SIZE == count_tasks_in_db(session)
+            empty_tasks(session)
+            memory = peak_mb(import_file, session, path, chunk_size)
+        print(
+            f"import {name}, chunks of {chunk_size:,}: {seconds:.1f} s, "
+            f"{SIZE / seconds:,.0f} tasks/s, peak heap {memory:.1f} MB"
+        )
+
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
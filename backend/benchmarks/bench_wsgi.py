@@ -0,0 +1,147 @@
+"""Read throughput of the Flask development server and gunicorn.
+
+Seeds a SQLite file with tasks and saved settings, then starts a fresh
+backend process per server setup and drives GET /tasks, GET /tasks/count
+and GET /settings, one endpoint at a time, from concurrent keep-alive
+connections.
+
+Run from the backend directory: ``uv run python benchmarks/bench_wsgi.py``
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+TASKS = 500
+CONCURRENCY = 16
+REQUESTS = 2000
+PORT = 5077
+BACKEND = Path(__file__).resolve().parents[1]
+ENDPOINTS = ["/tasks?limit=10", "/tasks/count", "/settings"]
+GUNICORN = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{PORT}", "app:app"]
+SETUPS = {
+    "dev server": (
+        [
+            sys.executable,
+            "-c",
+            f"from app import app; app.run(port={PORT}, threaded=True)",
+        ],
+        BACKEND / "src",
+        {},
+    ),
+    "gunicorn 1x32": (GUNICORN, BACKEND, {"WEB_CONCURRENCY": "1"}),
+    "gunicorn 2x16": (
+        GUNICORN,
+        BACKEND,
+        {"WEB_CONCURRENCY": "2", "GUNICORN_THREADS": "16"},
+    ),
+}
+
+
+def seed(database_url):
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, str(BACKEND / "src"))
+    from services.settings import save_settings
+    from services.tasks import save_tasks
+
+    save_tasks([f"Task {i}" for i in range(TASKS)])
+    save_settings({"MODEL": "bench", "LANGUAGE": "english"})
+
+
+async def wait_until_up(session, base_url):
+    for _ in range(200):
+        try:
+            async with session.get(f"{base_url}/tasks/count") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("Backend did not start")
+
+
+async def drive(session, url):
+    remaining = iter(range(REQUESTS))
+    latencies = []
+    errors = 0
+
+    async def connection():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            async with session.get(url) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))],
+        "errors": errors,
+    }
+
+
+async def measure(setup, env):
+    command, cwd, overrides = SETUPS[setup]
+    base_url = f"http://127.0.0.1:{PORT}"
+    process = subprocess.Popen(
+        command, cwd=cwd, env={**env, **overrides}, stderr=subprocess.DEVNULL
+    )
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CONCURRENCY)
+        ) as session:
+            await wait_until_up(session, base_url)
+            results = {}
+            for endpoint in ENDPOINTS:
+                # Warm up caches and connections before measuring.
+                await drive(session, f"{base_url}{endpoint}")
+                results[endpoint] = await drive(session, f"{base_url}{endpoint}")
+            return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{directory}/bench.db"
+        seed(database_url)
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            OLLAMA_URL="http://127.0.0.1:9",
+            OLLAMA_HEALTH_INTERVAL="0",
+            OLLAMA_KEEP_WARM_INTERVAL="0",
+            TASK_POOL_HIGH_WATERMARK="0",
+            TASK_RETENTION_MAX_ROWS="0",
+            DEDUP_MODE="off",
+        )
+        print(
+            f"{'setup':>14} {'endpoint':>16} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7}"
+        )
+        for setup in SETUPS:
+            for endpoint, result in asyncio.run(measure(setup, env)).items():
+                print(
+                    f"{setup:>14} {endpoint:>16} "
+                    f"{result['requests_per_second']:>8.0f} {result['p50_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f} {result['errors']:>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Gunicorn settings for the production entry point.
+
+Run from the backend directory: ``uv run gunicorn app:app``.
+
+Each worker is a separate process with its own scheduler, task pool,
+caches and background jobs, so the per-backend Ollama limits apply per
+worker. The app is not preloaded: its background threads would not survive
+the fork into the workers.
+"""
+
+import os
+
+pythonpath = "src"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+
+# A generation waiting for Ollama blocks its thread, so threads, not
+# processes, carry the concurrency. Workers add CPU for the read endpoints.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+# Recycle workers to bound memory growth; the jitter keeps them from
+# restarting at the same time.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# On SIGTERM or recycling, a worker stops accepting connections and gives
+# in-flight generations and streams this long to finish.
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "120"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+if os.getenv("GUNICORN_ACCESS_LOG", "false").lower() in ("1", "true", "yes"):
+    accesslog = "-"
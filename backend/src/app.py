@@ -1,11 +1,43 @@
 from flask import Flask
+from db.db import (
+    begin_request_session,
+    end_request_session,
+    release_request_session,
+)
 from routes.tasks import tasks_bp
 from routes.settings import settings_bp
+from routes.metrics import metrics_bp
+from routes.health import health_bp
+from routes.models import models_bp
+from services.startup import start_background_jobs
 
 app = Flask(__name__)
 
 app.register_blueprint(tasks_bp)
 app.register_blueprint(settings_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(health_bp)
+app.register_blueprint(models_bp)
+
+
+@app.before_request
+def open_request_session():
+    begin_request_session()
+
+
+@app.after_request
+def release_request_connection(response):
+    # Before the body is sent; a streamed body reopens the session if needed.
+    release_request_session()
+    return response
+
+
+@app.teardown_request
+def close_request_session(error=None):
+    end_request_session()
+
+
+start_background_jobs()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001)
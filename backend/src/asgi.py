@@ -0,0 +1,61 @@
+"""ASGI entry point: ``uvicorn asgi:app --app-dir src --port 5001``.
+
+Serves the task and settings routes as coroutines, so a generation waiting
+for Ollama holds no thread. Background jobs run on threads as in app.py.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from db.async_db import dispose_async_db, init_async_db
+from db.db import init_db
+from routes.settings_async import settings_routes
+from routes.tasks_async import bind_event_loop, tasks_routes
+from services.health import liveness, readiness
+from services.metrics import collect_metrics
+from services.ollama_async import async_ollama_client
+from services.startup import start_background_jobs
+
+
+async def get_metrics(request):
+    return JSONResponse(collect_metrics())
+
+
+async def get_liveness(request):
+    return JSONResponse(liveness())
+
+
+async def get_readiness(request):
+    ready, report = await run_in_threadpool(readiness.check)
+    return JSONResponse(
+        report, status_code=200 if ready else 503, headers={"Cache-Control": "no-store"}
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Schema upgrades and the counter check run once on the synchronous engine.
+    await run_in_threadpool(init_db)
+    init_async_db()
+    bind_event_loop(asyncio.get_running_loop())
+    start_background_jobs()
+    yield
+    await async_ollama_client.close()
+    await dispose_async_db()
+
+
+app = Starlette(
+    routes=[
+        *tasks_routes,
+        *settings_routes,
+        Route("/metrics", get_metrics, methods=["GET"]),
+        Route("/healthz", get_liveness, methods=["GET"]),
+        Route("/readyz", get_readiness, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
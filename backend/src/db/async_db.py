@@ -0,0 +1,122 @@
+import os
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from db.db import (
+    DATABASE_URL,
+    DB_NAME_TASKS,
+    DB_STATEMENT_TIMEOUT_MS,
+    IMPORT_COLUMNS,
+    TaskCounters,
+    commit_task_import,
+    engine_options,
+    import_tasks_to_db,
+)
+from db.pool import PoolMetrics
+from services.metrics import register_metrics
+
+# -----------------------#
+# Configuration
+# -----------------------#
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str):
+    """The same database as ``url``, addressed through an asyncio driver."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+
+def async_engine_options(url):
+    """engine_options() adjusted for create_async_engine()."""
+    options = engine_options(str(url))
+    # Async engines need their AsyncAdaptedQueuePool.
+    options.pop("poolclass", None)
+    if "connect_args" in options:
+        # asyncpg takes server settings instead of libpq options.
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+async_pool_metrics = PoolMetrics()
+register_metrics("db_async_pool", async_pool_metrics.stats)
+
+# -----------------------#
+# Dependency
+# -----------------------#
+_async_engine = None
+_AsyncSession = None
+
+
+def init_async_db(url=None):
+    """Create the async engine. The schema is set up by db.init_db()."""
+    global _async_engine, _AsyncSession
+    if _async_engine is None:
+        url = url or ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **async_engine_options(url))
+        async_pool_metrics.attach(_async_engine.sync_engine)
+        _AsyncSession = async_sessionmaker(bind=_async_engine)
+
+
+async def dispose_async_db():
+    global _async_engine, _AsyncSession
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _AsyncSession = None
+
+
+async def run_in_session(service, *args, **kwargs):
+    """Await a ``with_db_session`` service function on an async session.
+
+    The function body runs unchanged on the session's synchronous facade,
+    while its queries go through the asyncio driver without blocking the
+    event loop.
+    """
+    if _AsyncSession is None:
+        init_async_db()
+    async with _AsyncSession() as session:
+        return await session.run_sync(service.__wrapped__, *args, **kwargs)
+
+
+async def import_tasks_in_session(rows):
+    """Insert task rows like db.import_tasks_to_db(), on an async session.
+
+    Through asyncpg the rows are loaded with COPY, by the driver's
+    copy_records_to_table(), and other drivers take one bulk INSERT.
+    """
+    if _AsyncSession is None:
+        init_async_db()
+    async with _AsyncSession() as session:
+        connection = await session.connection()
+        if not rows or connection.dialect.driver != "asyncpg":
+            return await session.run_sync(import_tasks_to_db, rows)
+        # The driver connection joins the session's transaction only once a
+        # statement has begun it, so lock the counters the import updates first.
+        await session.execute(
+            select(TaskCounters.id).where(TaskCounters.id == 1).with_for_update()
+        )
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            DB_NAME_TASKS,
+            records=[tuple(row[column] for column in IMPORT_COLUMNS) for row in rows],
+            columns=IMPORT_COLUMNS,
+        )
+        return await session.run_sync(commit_task_import, rows)
+
+
+async def stream_in_session(statement, batch_size):
+    """Yield the rows of ``statement`` as lists of up to ``batch_size`` row
+    mappings, read through a server-side cursor."""
+    if _AsyncSession is None:
+        init_async_db()
+    async with _AsyncSession() as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            yield rows
@@ -1,27 +1,95 @@
+import contextlib
+import functools
+import io
 import os
+import random
+import threading
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import (
     create_engine,
+    inspect,
+    text,
+    BigInteger,
     Column,
     Integer,
     String,
     DateTime,
+    Index,
+    TypeDecorator,
     JSON,
+    REAL,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    tuple_,
+    update,
 )
+from sqlalchemy.dialects.postgresql import TSQUERY
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import OperationalError
 
+from db.pool import MeteredQueuePool, pool_metrics
+from services.metrics import register_metrics
+
 # -----------------------#
 # Configuration
 # -----------------------#
-DATABASE_URL = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+DATABASE_URL = (
+    os.getenv("DATABASE_URL")
+    or f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+)
 DB_NAME_TASKS = "tasks"
 DB_NAME_SETTINGS = "settings"
-MAX_RETRIES = 120
-RETRY_DELAY = 5
+DB_NAME_TASK_COUNTERS = "task_counters"
+# Connection attempts at startup back off exponentially, with jitter, from
+# DB_CONNECT_BACKOFF up to DB_CONNECT_MAX_BACKOFF seconds between attempts,
+# until DB_CONNECT_TIMEOUT seconds have passed.
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "600"))
+DB_CONNECT_BACKOFF = float(os.getenv("DB_CONNECT_BACKOFF", "0.25"))
+DB_CONNECT_MAX_BACKOFF = float(os.getenv("DB_CONNECT_MAX_BACKOFF", "2"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# PostgreSQL text search configuration per task language (lowercased); other
+# languages are indexed word by word with "simple". The search column is
+# generated from this mapping when it is created, so changes only apply to a
+# new column.
+SEARCH_CONFIGS = {
+    "english": "english",
+    "german": "german",
+    "deutsch": "german",
+    "french": "french",
+    "français": "french",
+    "spanish": "spanish",
+    "español": "spanish",
+    "italian": "italian",
+    "italiano": "italian",
+    "dutch": "dutch",
+    "nederlands": "dutch",
+    "portuguese": "portuguese",
+    "português": "portuguese",
+    "swedish": "swedish",
+    "svenska": "swedish",
+    "danish": "danish",
+    "dansk": "danish",
+    "norwegian": "norwegian",
+    "norsk": "norwegian",
+    "finnish": "finnish",
+    "suomi": "finnish",
+    "russian": "russian",
+    "turkish": "turkish",
+}
 
 Base = declarative_base()
 
@@ -29,17 +97,64 @@ Base = declarative_base()
 # -----------------------#
 # Database Engine Setup
 # -----------------------#
-def create_db_engine_with_retries(url: str, retries: int, delay: int):
-    for attempt in range(retries):
+def engine_options(url: str):
+    """Keyword arguments for create_engine() from the DB_* settings."""
+    url = make_url(url)
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection and cannot be pooled.
+        return options
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+def connect_backoff(
+    attempt: int, base: float = DB_CONNECT_BACKOFF, cap: float = DB_CONNECT_MAX_BACKOFF
+):
+    """Seconds to wait after the failed connection ``attempt`` (from 0): a
+    random share of the capped exponential delay, so workers that started
+    together do not retry in lockstep once they reach the cap."""
+    return random.uniform(0, min(cap, base * 2 ** min(attempt, 32)))
+
+
+def create_db_engine_with_retries(url: str, timeout: float = DB_CONNECT_TIMEOUT):
+    """Create the engine and wait until the database accepts a connection.
+    Returns the engine and the number of attempts it took."""
+    engine = create_engine(url, **engine_options(url))
+    pool_metrics.attach(engine)
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
         try:
-            engine = create_engine(url, echo=True)
             with engine.connect():
                 pass
-            return engine
+            return engine, attempt + 1
         except OperationalError as e:
-            print(f"Database connection failed (attempt {attempt + 1}/{retries}): {e}")
+            delay = connect_backoff(attempt)
+            if time.monotonic() + delay > deadline:
+                engine.dispose()
+                raise RuntimeError(
+                    f"Could not connect to the database within {timeout:g} seconds."
+                ) from e
+            attempt += 1
+            print(
+                f"Database connection failed (attempt {attempt}), "
+                f"retrying in {delay:.1f} s: {e}"
+            )
             time.sleep(delay)
-    raise RuntimeError("Could not connect to the database after retries.")
+
+
+register_metrics("db_pool", pool_metrics.stats)
 
 
 # -----------------------#
@@ -49,6 +164,19 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
+class UTCDateTime(TypeDecorator):
+    """DateTime column holding UTC without an offset. Aware values are
+    converted when bound, as asyncpg does not take them for such columns."""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 # -----------------------#
 # Models
 # -----------------------#
@@ -57,7 +185,7 @@ class AppSettings(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     settings = Column(JSON, nullable=False)
-    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+    updated_at = Column(UTCDateTime, default=utc_now, onupdate=utc_now)
 
 
 class Task(Base):
@@ -66,7 +194,35 @@ class Task(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_text = Column(String, nullable=False)
     favorite = Column(Integer, default=0)
-    created_at = Column(DateTime, default=utc_now)
+    created_at = Column(UTCDateTime, default=utc_now)
+    # Generation details as reported by Ollama, durations in nanoseconds.
+    model = Column(String, nullable=True)
+    language = Column(String, nullable=True)
+    total_duration = Column(BigInteger, nullable=True)
+    load_duration = Column(BigInteger, nullable=True)
+    prompt_eval_count = Column(Integer, nullable=True)
+    prompt_eval_duration = Column(BigInteger, nullable=True)
+    eval_count = Column(Integer, nullable=True)
+    eval_duration = Column(BigInteger, nullable=True)
+
+    # Listings are ordered newest first, optionally filtered by favorite.
+    __table_args__ = (
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_favorite_created_at_id", "favorite", "created_at", "id"),
+    )
+
+
+class TaskCounters(Base):
+    """Single row with the task counts and a data version, kept in step with
+    every write to the tasks table."""
+
+    __tablename__ = DB_NAME_TASK_COUNTERS
+
+    id = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    favorites = Column(Integer, nullable=False, default=0)
+    version = Column(BigInteger, default=1)
+    updated_at = Column(UTCDateTime, default=utc_now)
 
 
 # -----------------------#
@@ -74,14 +230,67 @@ class Task(Base):
 # -----------------------#
 _engine = None
 _Session = None
+_init_lock = threading.Lock()
+_init_stats = {"connect_attempts": 0, "connect_seconds": None, "init_seconds": None}
 
 
 def init_db():
+    """Connect and bring the schema up to date, once per process. Concurrent
+    callers wait for the first one; after a failure, the next call retries."""
     global _engine, _Session
-    if _engine is None:
-        _engine = create_db_engine_with_retries(DATABASE_URL, MAX_RETRIES, RETRY_DELAY)
-        _Session = sessionmaker(bind=_engine)
-        Base.metadata.create_all(bind=_engine)
+    if _Session is not None:
+        return
+    with _init_lock:
+        if _Session is not None:
+            return
+        started = time.monotonic()
+        engine, attempts = create_db_engine_with_retries(DATABASE_URL)
+        connected = time.monotonic()
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+        add_missing_indexes(engine)
+        if engine.dialect.name == "postgresql":
+            add_search_vector(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            repair_task_counters_in_db(db)
+        _init_stats.update(
+            connect_attempts=attempts,
+            connect_seconds=connected - started,
+            init_seconds=time.monotonic() - started,
+        )
+        # Published last: sessions are only handed out for a complete schema.
+        _engine, _Session = engine, Session
+
+
+def db_ready():
+    """Whether init_db() has completed, without waiting for it."""
+    return _Session is not None
+
+
+def db_init_stats():
+    return dict(_init_stats)
+
+
+def ping_db(db):
+    db.execute(text("SELECT 1"))
+
+
+def add_missing_columns(engine):
+    """create_all() skips existing tables, so add columns introduced since."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {table.name} "
+                            f"ADD COLUMN {column.name} {column_type}"
+                        )
+                    )
 
 
 def get_db():
@@ -95,68 +304,489 @@ def get_db():
 
 
 def with_db_session(func):
+    """Pass a session as the first argument: the request's session while
+    begin_request_session() is active on this thread, otherwise a session of
+    its own that is closed when ``func`` returns."""
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        db_gen = get_db()
-        db = next(db_gen)
-        try:
-            return func(db, *args, **kwargs)
-        finally:
+        db = _request_session()
+        if db is not None:
             try:
-                next(db_gen)
-            except StopIteration:
-                pass
+                return func(db, *args, **kwargs)
+            except Exception:
+                db.rollback()
+                raise
+        with db_session() as db:
+            return func(db, *args, **kwargs)
 
     return wrapper
 
 
+@contextlib.contextmanager
+def db_session():
+    """A session of its own, even while a request session is active, e.g. for
+    a response that is still streamed after the request's session is gone."""
+    db_gen = get_db()
+    try:
+        yield next(db_gen)
+    finally:
+        _close(db_gen)
+
+
+def _close(db_gen):
+    try:
+        next(db_gen)
+    except StopIteration:
+        pass
+
+
+# One session per request, shared by all services it calls. It is opened on
+# first use and can be released early, so a request that only talks to Ollama
+# never checks out a connection.
+_request_state = threading.local()
+
+
+def begin_request_session():
+    end_request_session()
+    _request_state.active = True
+
+
+def release_request_session():
+    """Close the request's session and return its connection to the pool,
+    e.g. before a long Ollama call. The next service call opens a new one."""
+    db_gen = getattr(_request_state, "db_gen", None)
+    _request_state.db_gen = None
+    _request_state.db = None
+    if db_gen is not None:
+        _close(db_gen)
+
+
+def end_request_session():
+    release_request_session()
+    _request_state.active = False
+
+
+def _request_session():
+    if not getattr(_request_state, "active", False):
+        return None
+    if _request_state.db is None:
+        _request_state.db_gen = get_db()
+        _request_state.db = next(_request_state.db_gen)
+    return _request_state.db
+
+
+def add_missing_indexes(engine):
+    """Create indexes that were added to existing tables."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=connection)
+
+
+def add_search_vector(engine):
+    """PostgreSQL only: a generated ``tsvector`` column over the task text in
+    the configuration of the task's language, with a GIN index."""
+    configs = " ".join(
+        f"WHEN '{language}' THEN '{config}'::regconfig"
+        for language, config in SEARCH_CONFIGS.items()
+    )
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                f"ALTER TABLE {DB_NAME_TASKS} ADD COLUMN IF NOT EXISTS search_vector "
+                "tsvector GENERATED ALWAYS AS (to_tsvector("
+                f"CASE lower(language) {configs} ELSE 'simple'::regconfig END, "
+                "task_text)) STORED"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector "
+                f"ON {DB_NAME_TASKS} USING GIN (search_vector)"
+            )
+        )
+
+
 # -----------------------#
 # CRUD Operations
 # -----------------------#
-def add_task_to_db(db, task_text: str):
-    """Add a new task and keep only the latest 500 tasks in the DB."""
-    new_task = Task(task_text=task_text)
+def add_task_to_db(db, task_text: str, **generation):
+    """Add a new task and return its id. ``generation`` holds optional Task
+    columns such as the model and Ollama's timings."""
+    new_task = Task(task_text=task_text, **generation)
     db.add(new_task)
+    db.flush()
+    task_id = new_task.id
+    _record_task_changes(db, 1, total=1)
     db.commit()
-    db.refresh(new_task)
-
-    subquery = db.query(Task.id).order_by(Task.created_at.desc()).limit(500).subquery()
-    db.query(Task).filter(Task.id.not_in(subquery.select())).delete(
-        synchronize_session=False
+    return task_id
+
+
+def add_tasks_to_db(db, task_texts: list[str], **generation):
+    """Add several tasks with one bulk insert. Returns the ids of the new
+    tasks in the given order."""
+    if not task_texts:
+        return []
+    task_ids = db.scalars(
+        insert(Task).returning(Task.id, sort_by_parameter_order=True),
+        [{"task_text": task_text, **generation} for task_text in task_texts],
+    ).all()
+    _record_task_changes(db, len(task_ids), total=len(task_ids))
+    db.commit()
+    return list(task_ids)
+
+
+def prune_tasks_in_db(
+    db, max_rows: int = 0, max_age: timedelta = None, keep_favorites: bool = True
+):
+    """Delete tasks older than ``max_age`` and all but the newest ``max_rows``
+    tasks (0 keeps any number). Favorites are neither deleted nor counted
+    when ``keep_favorites`` is set. Returns the ids of the deleted tasks."""
+    exempt = [Task.favorite == 0] if keep_favorites else []
+    deleted_ids = []
+    if max_age is not None:
+        deleted_ids += _delete_tasks(db, *exempt, Task.created_at < utc_now() - max_age)
+    if max_rows:
+        # Seek the newest task past the limit and delete everything up to it.
+        cutoff = (
+            db.query(Task.created_at, Task.id)
+            .filter(*exempt)
+            .order_by(Task.created_at.desc(), Task.id.desc())
+            .offset(max_rows)
+            .limit(1)
+            .first()
+        )
+        if cutoff is not None:
+            deleted_ids += _delete_tasks(
+                db, *exempt, tuple_(Task.created_at, Task.id) <= tuple(cutoff)
+            )
+    db.commit()
+    return deleted_ids
+
+
+def _delete_tasks(db, *criteria):
+    """Delete matching tasks and update the counters in the same transaction.
+    Returns the ids of the deleted tasks."""
+    rows = db.execute(
+        delete(Task).where(*criteria).returning(Task.id, Task.favorite)
+    ).all()
+    _record_task_changes(
+        db,
+        len(rows),
+        total=-len(rows),
+        favorites=-sum(favorite or 0 for _, favorite in rows),
+    )
+    return [task_id for task_id, _ in rows]
+
+
+def _record_task_changes(db, rows, total=0, favorites=0):
+    """Adjust the counters and bump the data version when ``rows`` tasks
+    changed, inside the caller's transaction."""
+    if not rows:
+        return
+    result = db.execute(
+        update(TaskCounters)
+        .where(TaskCounters.id == 1)
+        .values(
+            total=TaskCounters.total + total,
+            favorites=TaskCounters.favorites + favorites,
+            version=func.coalesce(TaskCounters.version, 0) + 1,
+            updated_at=utc_now(),
+        )
     )
+    if result.rowcount == 0:
+        # No counters yet; count the tasks as this transaction sees them.
+        db.add(TaskCounters(id=1, **_count_tasks(db)))
+        db.flush()
+
+
+def _count_tasks(db):
+    return {
+        "total": db.query(func.count(Task.id)).scalar(),
+        "favorites": db.query(func.count(Task.id)).filter(Task.favorite == 1).scalar(),
+    }
+
+
+def repair_task_counters_in_db(db):
+    """Recount the tasks and fix the stored counters. Returns the drift that
+    was corrected as ``{"total": ..., "favorites": ...}``."""
+    # Locking the counters row first makes writers either finish before the
+    # recount or update the counters after it.
+    counters = (
+        db.query(TaskCounters).filter(TaskCounters.id == 1).with_for_update().first()
+    )
+    actual = _count_tasks(db)
+    if counters is None:
+        counters = TaskCounters(id=1, total=0, favorites=0)
+        db.add(counters)
+    drift = {
+        "total": actual["total"] - counters.total,
+        "favorites": actual["favorites"] - counters.favorites,
+    }
+    counters.total = actual["total"]
+    counters.favorites = actual["favorites"]
+    if any(drift.values()):
+        counters.version = (counters.version or 0) + 1
+        counters.updated_at = utc_now()
     db.commit()
+    return drift
+
+
+def get_task_data_version_from_db(db):
+    """Return ``(version, updated_at)`` of the tasks table; the version grows
+    with every write."""
+    counters = db.get(TaskCounters, 1)
+    if counters is None:
+        repair_task_counters_in_db(db)
+        counters = db.get(TaskCounters, 1)
+    return counters.version or 0, counters.updated_at
 
 
 def like_task_in_db(db, task_id: int, like: int):
-    """Like or unlike a task."""
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if task:
-        task.favorite = like
-        db.commit()
-        db.refresh(task)
-    return task
+    """Like or unlike a task. Returns whether its favorite status changed."""
+    return bool(like_tasks_in_db(db, {task_id: like}))
+
+
+def like_tasks_in_db(db, likes: dict):
+    """Apply ``{task_id: like}`` changes in one transaction, with one UPDATE
+    per like value. Returns the ids of the tasks whose status changed."""
+    changed = {}
+    for like in (0, 1):
+        task_ids = [task_id for task_id, value in likes.items() if int(value) == like]
+        if task_ids:
+            changed[like] = list(
+                db.scalars(
+                    update(Task)
+                    .where(Task.id.in_(task_ids), Task.favorite != like)
+                    .values(favorite=like)
+                    .returning(Task.id),
+                    execution_options={"synchronize_session": False},
+                )
+            )
+    liked, unliked = changed.get(1, []), changed.get(0, [])
+    _record_task_changes(
+        db, len(liked) + len(unliked), favorites=len(liked) - len(unliked)
+    )
+    db.commit()
+    return liked + unliked
 
 
-def get_tasks_from_db(db, skip: int = 0, limit: int = 10, favorite: bool = None):
-    query = db.query(Task).order_by(Task.created_at.desc())
+def export_tasks_statement(favorite: bool = None):
+    """All task columns, oldest first."""
+    statement = select(Task.__table__).order_by(Task.id)
     if favorite is not None:
-        query = query.filter(Task.favorite == int(favorite))
-    return query.offset(skip).limit(limit).all()
+        statement = statement.where(Task.favorite == int(favorite))
+    return statement
 
 
-def count_tasks_in_db(db, favorite: bool = None):
-    query = db.query(Task)
+def iter_task_batches_from_db(db, batch_size: int, favorite: bool = None):
+    """Yield all tasks as lists of up to ``batch_size`` row mappings, read
+    through a server-side cursor so memory does not grow with the table."""
+    result = db.execute(
+        export_tasks_statement(favorite), execution_options={"yield_per": batch_size}
+    )
+    yield from result.mappings().partitions()
+
+
+IMPORT_COLUMNS = tuple(
+    column.name for column in Task.__table__.columns if column.name != "id"
+)
+
+
+def import_tasks_to_db(db, rows: list[dict]):
+    """Insert task rows, dicts with a value for every column in
+    ``IMPORT_COLUMNS``, in one transaction. PostgreSQL through psycopg2 loads
+    them with COPY, other databases with one bulk INSERT. Returns the number
+    of rows."""
+    if not rows:
+        return 0
+    if db.get_bind().dialect.driver == "psycopg2":
+        _copy_tasks(db, rows)
+    else:
+        db.execute(insert(Task), rows)
+    return commit_task_import(db, rows)
+
+
+def commit_task_import(db, rows: list[dict]):
+    """Count the task ``rows`` inserted in this transaction and commit it.
+    Returns the number of rows."""
+    _record_task_changes(
+        db,
+        len(rows),
+        total=len(rows),
+        favorites=sum(1 for row in rows if row["favorite"]),
+    )
+    db.commit()
+    return len(rows)
+
+
+def _copy_tasks(db, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in IMPORT_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {DB_NAME_TASKS} ({', '.join(IMPORT_COLUMNS)}) FROM STDIN", buffer
+        )
+    finally:
+        cursor.close()
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value):
+    """A value in COPY's text format."""
+    if value is None:
+        return "\\N"
+    if type(value) is str:
+        # Most texts need no escaping, and checking is cheaper than translating.
+        if "\\" in value or "\t" in value or "\n" in value or "\r" in value:
+            return value.translate(_COPY_ESCAPES)
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def get_retained_task_times_from_db(db, limit: int, keep_favorites: bool = True):
+    """``created_at`` of the newest ``limit`` tasks that count against the
+    retention limit, newest first."""
+    query = db.query(Task.created_at)
+    if keep_favorites:
+        query = query.filter(Task.favorite == 0)
+    rows = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit).all()
+    return [row.created_at for row in rows]
+
+
+def get_task_texts_from_db(db, limit: int):
+    """Return ``(id, task_text)`` of the newest ``limit`` tasks, oldest first."""
+    rows = (
+        db.query(Task.id, Task.task_text)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(row.id, row.task_text) for row in reversed(rows)]
+
+
+def get_tasks_from_db(
+    db, skip: int = 0, limit: int = 10, favorite: bool = None, after=None
+):
+    """Return tasks newest first. ``after`` is the ``(created_at, id)`` of the
+    last task of the previous page and replaces ``skip`` with a keyset seek."""
+    query = db.query(Task).order_by(Task.created_at.desc(), Task.id.desc())
     if favorite is not None:
         query = query.filter(Task.favorite == int(favorite))
-    return query.count()
+    if after is not None:
+        query = query.filter(tuple_(Task.created_at, Task.id) < tuple(after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def parse_search_query(db, query: str, configs):
+    """Parse ``query`` with every text search configuration in ``configs``,
+    so a task matches in the language it was indexed in. Returns the distinct
+    results joined with OR as tsquery text, or None if only stop words are
+    left. Most words parse the same in several languages, and every
+    alternative left in the query makes ranking slower."""
+    parsed = db.scalars(
+        text(
+            "SELECT DISTINCT websearch_to_tsquery(config::regconfig, :query)::text "
+            "FROM unnest(CAST(:configs AS text[])) AS config"
+        ),
+        {"query": query, "configs": list(configs)},
+    ).all()
+    return (
+        " | ".join(f"( {tsquery} )" for tsquery in sorted(filter(None, parsed))) or None
+    )
+
+
+def search_tasks_statement(ts_query: str, limit: int = 10, after=None):
+    """PostgreSQL full-text search for a parsed query, best match first.
+    ``after`` is the ``(rank, id)`` of the last result of the previous page."""
+    search_vector = literal_column(f"{DB_NAME_TASKS}.search_vector")
+    ts_query = cast(ts_query, TSQUERY)
+    # OFFSET 0 keeps PostgreSQL from inlining the subquery, so every match is
+    # ranked once instead of again for the cursor condition and the sort.
+    matches = (
+        select(
+            Task.id,
+            Task.task_text,
+            Task.created_at,
+            Task.favorite,
+            func.ts_rank(search_vector, ts_query).label("rank"),
+        )
+        .where(search_vector.op("@@")(ts_query))
+        .offset(0)
+        .subquery()
+    )
+    statement = (
+        select(matches)
+        .order_by(matches.c.rank.desc(), matches.c.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        # ts_rank() returns a real; compare as one so cursors match exactly.
+        statement = statement.where(
+            tuple_(matches.c.rank, matches.c.id)
+            < tuple_(cast(after[0], REAL), after[1])
+        )
+    return statement
+
+
+def search_tasks_in_db(db, query: str, configs, limit: int = 10, after=None):
+    """Return ``(id, task_text, created_at, favorite, rank)`` rows."""
+    ts_query = parse_search_query(db, query, configs)
+    if ts_query is None:
+        return []
+    return db.execute(search_tasks_statement(ts_query, limit, after)).all()
+
+
+def get_tasks_by_ids_from_db(db, task_ids):
+    return db.query(Task).filter(Task.id.in_(list(task_ids))).all()
+
+
+def get_generation_stats_from_db(db, since):
+    """Return the model and Ollama timings of tasks generated after ``since``."""
+    return (
+        db.query(
+            Task.model,
+            Task.total_duration,
+            Task.load_duration,
+            Task.eval_count,
+            Task.eval_duration,
+        )
+        .filter(Task.created_at >= since, Task.total_duration.is_not(None))
+        .all()
+    )
+
+
+def count_tasks_in_db(db, favorite: bool = None):
+    """Read the maintained counters instead of counting the table."""
+    counters = db.get(TaskCounters, 1)
+    if counters is None:
+        repair_task_counters_in_db(db)
+        counters = db.get(TaskCounters, 1)
+    if favorite is None:
+        return counters.total
+    if favorite:
+        return counters.favorites
+    return counters.total - counters.favorites
 
 
 def delete_tasks_in_db(db, keep_favorites: bool = False):
-    query = db.query(Task)
-    if keep_favorites:
-        query = query.filter(Task.favorite == 0)
-    deleted_count = query.delete()
+    deleted_ids = _delete_tasks(db, *([Task.favorite == 0] if keep_favorites else []))
     db.commit()
-    return deleted_count
+    return len(deleted_ids)
 
 
 def get_app_settings_from_db(db):
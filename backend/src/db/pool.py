@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from services.metrics import percentile
+
+
+class PoolMetrics:
+    """Connection pool counters, checkout wait times and how long connections
+    stay checked out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self._holds = deque(maxlen=1000)
+        self._checkouts = 0
+        self._connects = 0
+        self._invalidations = 0
+        self._timeouts = 0
+        self._pool = None
+
+    def attach(self, engine):
+        """Start counting events of ``engine``'s pool."""
+        self._pool = engine.pool
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self._waits.append(seconds)
+            self._timeouts += timed_out
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self._checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            with self._lock:
+                self._holds.append(time.perf_counter() - started)
+
+    def _on_connect(self, *args):
+        with self._lock:
+            self._connects += 1
+
+    def _on_invalidate(self, *args):
+        with self._lock:
+            self._invalidations += 1
+
+    def stats(self):
+        pool = self._pool
+        with self._lock:
+            return {
+                "pool": pool.status() if pool is not None else None,
+                "checked_out": (
+                    pool.checkedout() if isinstance(pool, QueuePool) else None
+                ),
+                "checkouts": self._checkouts,
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+                "timeouts": self._timeouts,
+                "checkout_wait_ms": _summarize(self._waits),
+                "hold_ms": _summarize(self._holds),
+            }
+
+
+def _summarize(seconds):
+    values = sorted(seconds)
+    return {
+        "avg": 1000 * sum(values) / len(values) if values else None,
+        "p95": 1000 * percentile(values, 95) if values else None,
+        "max": 1000 * values[-1] if values else None,
+    }
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait is timed around the public ``connect()``, so it includes opening
+    a new connection and the pre-ping, not only the wait for a free one.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return connection
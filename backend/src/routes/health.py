@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from services.health import liveness, readiness
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/healthz", methods=["GET"])
+def get_liveness():
+    return jsonify(liveness()), 200
+
+
+@health_bp.route("/readyz", methods=["GET"])
+def get_readiness():
+    ready, report = readiness.check()
+    response = jsonify(report)
+    response.headers["Cache-Control"] = "no-store"
+    return response, 200 if ready else 503
@@ -0,0 +1,9 @@
+from flask import Blueprint, jsonify
+from services.metrics import collect_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    return jsonify(collect_metrics()), 200
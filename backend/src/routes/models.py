@@ -0,0 +1,36 @@
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.model_pulls import model_pulls
+from services.balancer import balancer
+
+models_bp = Blueprint("models", __name__)
+
+
+@models_bp.route("/models/<path:name>/pull", methods=["POST"])
+def start_pull(name):
+    return jsonify({url: model_pulls.start(url, name) for url in balancer.urls}), 202
+
+
+@models_bp.route("/models/<path:name>/pull", methods=["GET"])
+def get_pull(name):
+    jobs = {
+        url: job
+        for url in balancer.urls
+        if (job := model_pulls.get(url, name)) is not None
+    }
+    if not jobs:
+        return jsonify({"error": f"No pull started for model '{name}'."}), 404
+    if not request.args.get("stream", 0, type=int):
+        return jsonify(jobs), 200
+
+    def generate():
+        for url in jobs:
+            for snapshot in model_pulls.follow(url, name):
+                yield f"data: {json.dumps({'url': url, **snapshot})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
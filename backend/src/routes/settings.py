@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from services.settings import get_settings, save_settings
+from services.balancer import balancer
+from services.settings import save_settings, settings_cache, settings_etag
+from services.warmup import model_warmer
 
 settings_bp = Blueprint("settings", __name__)
 
@@ -7,9 +9,17 @@ settings_bp = Blueprint("settings", __name__)
 @settings_bp.route("/settings", methods=["GET", "POST"])
 def handle_settings():
     if request.method == "GET":
-        record = get_settings()
-        return jsonify(record.settings if record else {})
+        settings, etag = settings_cache.get()
+        response = jsonify(settings)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
     else:
         settings = request.json
         save_settings(settings)
-        return jsonify({"message": "Settings saved"})
+        if settings.get("MODEL"):
+            for url in balancer.urls:
+                model_warmer.warm_up_async(url, settings["MODEL"])
+        response = jsonify({"message": "Settings saved"})
+        response.set_etag(settings_etag(settings))
+        return response
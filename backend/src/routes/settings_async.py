@@ -0,0 +1,35 @@
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.http import parse_etags
+
+from db.async_db import run_in_session
+from services.balancer import balancer
+from services.settings import get_settings, save_settings, settings_cache, settings_etag
+from services.warmup import model_warmer
+
+
+async def handle_settings(request):
+    if request.method == "GET":
+        cached = settings_cache.cached()
+        if cached is None:
+            generation = settings_cache.generation
+            record = await run_in_session(get_settings)
+            cached = settings_cache.store(record.settings if record else {}, generation)
+        settings, etag = cached
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if parse_etags(request.headers.get("if-none-match")).contains(etag):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(settings, headers=headers)
+    else:
+        settings = await request.json()
+        await run_in_session(save_settings, settings)
+        if settings.get("MODEL"):
+            for url in balancer.urls:
+                model_warmer.warm_up_async(url, settings["MODEL"])
+        return JSONResponse(
+            {"message": "Settings saved"},
+            headers={"ETag": f'"{settings_etag(settings)}"'},
+        )
+
+
+settings_routes = [Route("/settings", handle_settings, methods=["GET", "POST"])]
@@ -1,17 +1,86 @@
-import os
-import threading
-from flask import Blueprint, request, jsonify
+import json
+import time
+
+from datetime import timezone
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.balancer import NoBackendAvailable, balancer
+from services.dedup import DuplicateTaskError
+from services.metrics import register_metrics
+from services.model_pulls import ModelNotReady
+from services.scheduler import (
+    OLLAMA_MODEL_CONCURRENCY,
+    OLLAMA_MODEL_CONCURRENCY_OVERRIDES,
+    GenerationScheduler,
+    SchedulerBusy,
+    parse_model_limits,
+)
+from services.search import (
+    MAX_QUERY_LENGTH,
+    MAX_SEARCH_LIMIT,
+    decode_search_cursor,
+    next_search_cursor,
+    search_tasks,
+)
+from services.task_pool import TaskPool, is_poolable
 from services.tasks import (
+    MAX_BATCH_SIZE,
+    MAX_BULK_LIKES,
     generate_task,
+    generate_task_batch,
+    generation_stats,
+    drop_pooled_task,
+    hold_pooled_task,
+    release_pooled_task,
+    request_unique_task_text,
+    save_task,
+    stream_task,
     list_tasks,
+    list_tasks_page,
     count_tasks,
+    task_data_version,
+    decode_cursor,
+    next_cursor,
     like_task,
+    like_tasks,
     delete_all_tasks,
+    ensure_model_exists,
 )
+from services.transfer import ImportRejected, TaskImport, export_tasks, import_tasks
 
 tasks_bp = Blueprint("tasks", __name__)
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
-ollama_lock = threading.Lock()
+# Concurrency limits are per Ollama backend.
+scheduler = GenerationScheduler(
+    default_limit=OLLAMA_MODEL_CONCURRENCY * len(balancer.urls),
+    limits={
+        model: limit * len(balancer.urls)
+        for model, limit in parse_model_limits(
+            OLLAMA_MODEL_CONCURRENCY_OVERRIDES
+        ).items()
+    },
+)
+register_metrics("scheduler", scheduler.stats)
+
+
+def _produce_pooled_task(language, model):
+    with scheduler.slot(model), balancer.backend(model) as url:
+        return hold_pooled_task(*request_unique_task_text(url, language, model))
+
+
+task_pool = TaskPool(
+    _produce_pooled_task, accepts=is_poolable, discard=drop_pooled_task
+)
+
+
+def _save_pooled_task(language, model):
+    """Save the next pooled task that is still unique; None once none is left."""
+    while (pooled := task_pool.take(language, model)) is not None:
+        if release_pooled_task(pooled):
+            return save_task(*pooled[1:])
+    return None
+
+
+register_metrics("task_pool", task_pool.stats)
 
 
 @tasks_bp.route("/tasks", methods=["POST"])
@@ -21,22 +90,183 @@ def create_task():
     model = data.get("model", "mistral:instruct")
 
     try:
-        with ollama_lock:
-            task = generate_task(OLLAMA_URL, language, model)
+        task = _save_pooled_task(language, model)
+        if task is None:
+            with scheduler.slot(model), balancer.backend(model) as url:
+                task = generate_task(url, language, model)
+        task_pool.ensure_filled(language, model)
         return jsonify({"task": task}), 201
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    except NoBackendAvailable as e:
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        return _not_ready_response(e)
+    except DuplicateTaskError:
+        return jsonify({"error": "Only duplicates of existing tasks generated."}), 409
+    except Exception:
+        return jsonify({"error": "Task generation failed."}), 500
+
+
+@tasks_bp.route("/tasks/batch", methods=["POST"])
+def create_task_batch():
+    data = request.get_json(silent=True) or {}
+    language = data.get("language", "english")
+    model = data.get("model", "mistral:instruct")
+    count = data.get("count", 5)
+
+    if type(count) is not int or not 1 <= count <= MAX_BATCH_SIZE:
+        return jsonify(
+            {"error": f"Invalid 'count' value, must be 1 to {MAX_BATCH_SIZE}"}
+        ), 400
+
+    try:
+        with scheduler.slot(model), balancer.backend(model) as url:
+            result = generate_task_batch(url, language, model, count)
+        return jsonify(result), 201
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    except NoBackendAvailable as e:
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        return _not_ready_response(e)
+    except Exception:
+        return jsonify({"error": "Task batch generation failed."}), 500
+
+
+@tasks_bp.route("/tasks/stream", methods=["POST"])
+def create_task_stream():
+    data = request.get_json(silent=True) or {}
+    language = data.get("language", "english")
+    model = data.get("model", "mistral:instruct")
+
+    try:
+        task = _save_pooled_task(language, model)
     except Exception:
         return jsonify({"error": "Task generation failed."}), 500
+    if task is not None:
+        task_pool.ensure_filled(language, model)
+        return _sse_response(iter([{"task": task}]))
+
+    try:
+        scheduler.acquire(model)
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    started = time.monotonic()
+    released = []
+    lease = None
+
+    def release(error=None):
+        # Runs when the stream ends and again when the response is closed.
+        if not released:
+            released.append(True)
+            scheduler.release(model, time.monotonic() - started)
+            if lease is not None:
+                lease.done(error)
+
+    try:
+        lease = balancer.acquire(model)
+        ensure_model_exists(lease.url, model)
+    except NoBackendAvailable as e:
+        release()
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        release()
+        return _not_ready_response(e)
+    except Exception as e:
+        release(e)
+        return jsonify({"error": "Task generation failed."}), 500
+
+    events = _refill_after(stream_task(lease.url, language, model), language, model)
+    return _sse_response(events, on_close=release)
+
+
+def _refill_after(events, language, model):
+    """Pass on the stream's events, then top up the pool, as a miss leaves
+    it as empty as the first request for the pair finds it."""
+    yield from events
+    task_pool.ensure_filled(language, model)
+
+
+def _sse_response(events, on_close=None):
+    def generate():
+        error = None
+        try:
+            for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        except DuplicateTaskError:
+            # Not a backend failure: the backend is released without an error.
+            message = {"error": "Only duplicates of existing tasks generated."}
+            yield f"data: {json.dumps(message)}\n\n"
+        except Exception as e:
+            error = e
+            yield f"data: {json.dumps({'error': 'Task generation failed.'})}\n\n"
+        finally:
+            if on_close:
+                on_close(error)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    if on_close:
+        response.call_on_close(on_close)
+    return response
+
+
+def _busy_response(error):
+    response = jsonify({"error": "Too many pending generations, retry later."})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, error.status_code
+
+
+def _unavailable_response(error):
+    response = jsonify({"error": "No Ollama backend available, retry later."})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
+def _not_ready_response(error):
+    response = jsonify(
+        {"error": "Model is being downloaded, retry later.", "pull": error.progress}
+    )
+    response.headers["Retry-After"] = "10"
+    return response, 503
 
 
 @tasks_bp.route("/tasks", methods=["GET"])
 def get_tasks():
+    after = request.args.get("after")
+    if after:
+        try:
+            decode_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid 'after' cursor"}), 400
+
     try:
         skip = request.args.get("skip", 0, type=int)
         limit = request.args.get("limit", 10, type=int)
         favorite = request.args.get("favorite", type=int)
 
-        tasks = list_tasks(skip=skip, limit=limit, favorite=favorite)
-        return jsonify(tasks), 200
+        def build():
+            if request.args.get("include_total", 0, type=int):
+                page = list_tasks_page(
+                    skip=skip, limit=limit, favorite=favorite, after=after
+                )
+                response = jsonify(page)
+                cursor = page["next_cursor"]
+            else:
+                tasks = list_tasks(
+                    skip=skip, limit=limit, favorite=favorite, after=after
+                )
+                response = jsonify(tasks)
+                cursor = next_cursor(tasks, limit)
+            if cursor:
+                response.headers["X-Next-Cursor"] = cursor
+            return response
+
+        return _conditional_response(build)
     except Exception:
         return jsonify({"error": "Failed to fetch tasks."}), 500
 
@@ -45,12 +275,105 @@ def get_tasks():
 def get_task_count():
     try:
         favorite = request.args.get("favorite", type=int)
-        count = count_tasks(favorite=favorite)
-        return jsonify({"count": count}), 200
+        return _conditional_response(
+            lambda: jsonify({"count": count_tasks(favorite=favorite)})
+        )
     except Exception:
         return jsonify({"error": "Counting tasks failed."}), 500
 
 
+@tasks_bp.route("/tasks/search", methods=["GET"])
+def get_search_results():
+    query = request.args.get("q", "").strip()
+    if not 1 <= len(query) <= MAX_QUERY_LENGTH:
+        return jsonify(
+            {"error": f"Invalid 'q' value, must be 1 to {MAX_QUERY_LENGTH} characters"}
+        ), 400
+    limit = request.args.get("limit", 10, type=int)
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        return jsonify(
+            {"error": f"Invalid 'limit' value, must be 1 to {MAX_SEARCH_LIMIT}"}
+        ), 400
+    after = request.args.get("after")
+    if after:
+        try:
+            decode_search_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid 'after' cursor"}), 400
+
+    try:
+        language = request.args.get("language")
+
+        def build():
+            results = search_tasks(query, limit=limit, after=after, language=language)
+            response = jsonify(results)
+            cursor = next_search_cursor(results, limit)
+            if cursor:
+                response.headers["X-Next-Cursor"] = cursor
+            return response
+
+        return _conditional_response(build)
+    except Exception:
+        return jsonify({"error": "Searching tasks failed."}), 500
+
+
+@tasks_bp.route("/tasks/export", methods=["GET"])
+def download_tasks():
+    favorite = request.args.get("favorite", type=int)
+    return Response(
+        export_tasks(favorite=favorite),
+        mimetype="application/x-ndjson",
+        headers={
+            "Content-Disposition": "attachment; filename=tasks.ndjson",
+            "Cache-Control": "no-cache",
+        },
+    )
+
+
+@tasks_bp.route("/tasks/import", methods=["POST"])
+def upload_tasks():
+    task_import = TaskImport()
+    try:
+        summary = import_tasks(request.stream, task_import)
+    except ImportRejected as e:
+        return jsonify({"error": str(e), **task_import.summary()}), 409
+    except Exception:
+        return jsonify(
+            {"error": "Importing tasks failed.", **task_import.summary()}
+        ), 500
+    if summary["skipped"] and not summary["imported"]:
+        return jsonify({"error": "No valid tasks to import.", **summary}), 400
+    return jsonify(summary), 200
+
+
+def _conditional_response(build):
+    """Answer with 304 while the tasks are unchanged since the client's copy,
+    otherwise build the response and tag it with the current data version."""
+    version, updated_at = task_data_version()
+    etag = f"tasks-{version}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    if updated_at is not None:
+        response.last_modified = updated_at.replace(tzinfo=timezone.utc)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@tasks_bp.route("/tasks/stats", methods=["GET"])
+def get_generation_stats():
+    window = request.args.get("window", 86400, type=int)
+    if window <= 0:
+        return jsonify({"error": "Invalid 'window' value, must be positive"}), 400
+
+    try:
+        return jsonify(generation_stats(window)), 200
+    except Exception:
+        return jsonify({"error": "Failed to compute generation stats."}), 500
+
+
 @tasks_bp.route("/tasks/<int:task_id>/like", methods=["POST"])
 def update_like(task_id):
     data = request.get_json(silent=True) or {}
@@ -66,6 +389,37 @@ def update_like(task_id):
         return jsonify({"error": "Failed to update like status."}), 500
 
 
+@tasks_bp.route("/tasks/likes", methods=["POST"])
+def update_likes():
+    data = request.get_json(silent=True) or {}
+    changes = data.get("likes")
+
+    if (
+        not isinstance(changes, list)
+        or not 1 <= len(changes) <= MAX_BULK_LIKES
+        or not all(
+            isinstance(change, dict)
+            and type(change.get("id")) is int
+            and change.get("like") in (0, 1)
+            for change in changes
+        )
+    ):
+        return jsonify(
+            {
+                "error": "Invalid 'likes' value, must be a list of 1 to "
+                f"{MAX_BULK_LIKES} objects with an integer 'id' and 'like' 0 or 1"
+            }
+        ), 400
+
+    try:
+        updated = like_tasks({change["id"]: change["like"] for change in changes})
+        return jsonify(
+            {"message": "Task like status updated.", "updated": updated}
+        ), 200
+    except Exception:
+        return jsonify({"error": "Failed to update like status."}), 500
+
+
 @tasks_bp.route("/tasks", methods=["DELETE"])
 def delete_tasks():
     try:
@@ -0,0 +1,543 @@
+import asyncio
+import json
+import time
+from datetime import date, timezone
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from db.async_db import run_in_session
+from services.balancer import NoBackendAvailable, balancer
+from services.dedup import DuplicateTaskError
+from services.metrics import register_metrics
+from services.model_pulls import ModelNotReady
+from services.scheduler import (
+    OLLAMA_MODEL_CONCURRENCY,
+    OLLAMA_MODEL_CONCURRENCY_OVERRIDES,
+    AsyncGenerationScheduler,
+    SchedulerBusy,
+    parse_model_limits,
+)
+from services.search import (
+    MAX_QUERY_LENGTH,
+    MAX_SEARCH_LIMIT,
+    decode_search_cursor,
+    next_search_cursor,
+    search_tasks,
+)
+from services.task_pool import TaskPool, is_poolable
+from services.tasks import (
+    MAX_BATCH_SIZE,
+    MAX_BULK_LIKES,
+    count_tasks,
+    decode_cursor,
+    delete_all_tasks,
+    generation_stats,
+    like_task,
+    like_tasks,
+    list_tasks,
+    list_tasks_page,
+    drop_pooled_task,
+    hold_pooled_task,
+    next_cursor,
+    save_task,
+    task_data_version,
+)
+from services.tasks_async import (
+    ensure_model_exists,
+    generate_task,
+    generate_task_batch,
+    release_pooled_task,
+    request_unique_task_text,
+    stream_task,
+)
+from services.transfer import ImportRejected, TaskImport
+from services.transfer_async import export_tasks, import_tasks
+
+# Concurrency limits are per Ollama backend.
+scheduler = AsyncGenerationScheduler(
+    default_limit=OLLAMA_MODEL_CONCURRENCY * len(balancer.urls),
+    limits={
+        model: limit * len(balancer.urls)
+        for model, limit in parse_model_limits(
+            OLLAMA_MODEL_CONCURRENCY_OVERRIDES
+        ).items()
+    },
+)
+register_metrics("scheduler", scheduler.stats)
+
+_event_loop = None
+
+
+def bind_event_loop(loop):
+    """Let the task pool's refill threads run generations on ``loop``."""
+    global _event_loop
+    _event_loop = loop
+
+
+async def _produce_async(language, model):
+    async with scheduler.slot(model):
+        with balancer.backend(model) as url:
+            return hold_pooled_task(
+                *await request_unique_task_text(url, language, model)
+            )
+
+
+def _produce_pooled_task(language, model):
+    return asyncio.run_coroutine_threadsafe(
+        _produce_async(language, model), _event_loop
+    ).result()
+
+
+task_pool = TaskPool(
+    _produce_pooled_task, accepts=is_poolable, discard=drop_pooled_task
+)
+
+
+async def _save_pooled_task(language, model):
+    """Save the next pooled task that is still unique; None once none is left."""
+    while True:
+        # Checking the pair may read the settings from the database.
+        pooled = await run_in_threadpool(task_pool.take, language, model)
+        if pooled is None:
+            return None
+        if await release_pooled_task(pooled):
+            return await run_in_session(save_task, *pooled[1:])
+
+
+register_metrics("task_pool", task_pool.stats)
+
+
+class _JSONResponse(JSONResponse):
+    """Serializes like Flask's ``jsonify``, so both modes answer the same."""
+
+    def render(self, content):
+        return json.dumps(
+            content, default=_json_default, separators=(",", ":"), sort_keys=True
+        ).encode()
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _json_body(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _int_arg(request, name, default=None):
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def create_task(request):
+    data = await _json_body(request)
+    language = data.get("language", "english")
+    model = data.get("model", "mistral:instruct")
+
+    try:
+        task = await _save_pooled_task(language, model)
+        if task is None:
+            async with scheduler.slot(model):
+                with balancer.backend(model) as url:
+                    task = await generate_task(url, language, model)
+        await run_in_threadpool(task_pool.ensure_filled, language, model)
+        return _JSONResponse({"task": task}, status_code=201)
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    except NoBackendAvailable as e:
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        return _not_ready_response(e)
+    except DuplicateTaskError:
+        return _JSONResponse(
+            {"error": "Only duplicates of existing tasks generated."}, status_code=409
+        )
+    except Exception:
+        return _JSONResponse({"error": "Task generation failed."}, status_code=500)
+
+
+async def create_task_batch(request):
+    data = await _json_body(request)
+    language = data.get("language", "english")
+    model = data.get("model", "mistral:instruct")
+    count = data.get("count", 5)
+
+    if type(count) is not int or not 1 <= count <= MAX_BATCH_SIZE:
+        return _JSONResponse(
+            {"error": f"Invalid 'count' value, must be 1 to {MAX_BATCH_SIZE}"},
+            status_code=400,
+        )
+
+    try:
+        async with scheduler.slot(model):
+            with balancer.backend(model) as url:
+                result = await generate_task_batch(url, language, model, count)
+        return _JSONResponse(result, status_code=201)
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    except NoBackendAvailable as e:
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        return _not_ready_response(e)
+    except Exception:
+        return _JSONResponse(
+            {"error": "Task batch generation failed."}, status_code=500
+        )
+
+
+async def create_task_stream(request):
+    data = await _json_body(request)
+    language = data.get("language", "english")
+    model = data.get("model", "mistral:instruct")
+
+    try:
+        task = await _save_pooled_task(language, model)
+    except Exception:
+        return _JSONResponse({"error": "Task generation failed."}, status_code=500)
+    if task is not None:
+        await run_in_threadpool(task_pool.ensure_filled, language, model)
+        return _sse_response(_single_event({"task": task}))
+
+    try:
+        await scheduler.acquire(model)
+    except SchedulerBusy as e:
+        return _busy_response(e)
+    started = time.monotonic()
+    released = []
+    lease = None
+
+    def release(error=None):
+        if not released:
+            released.append(True)
+            scheduler.release(model, time.monotonic() - started)
+            if lease is not None:
+                lease.done(error)
+
+    try:
+        lease = balancer.acquire(model)
+        await ensure_model_exists(lease.url, model)
+    except NoBackendAvailable as e:
+        release()
+        return _unavailable_response(e)
+    except ModelNotReady as e:
+        release()
+        return _not_ready_response(e)
+    except Exception as e:
+        release(e)
+        return _JSONResponse({"error": "Task generation failed."}, status_code=500)
+
+    events = _refill_after(stream_task(lease.url, language, model), language, model)
+    return _sse_response(events, on_close=release)
+
+
+async def _refill_after(events, language, model):
+    async for event in events:
+        yield event
+    await run_in_threadpool(task_pool.ensure_filled, language, model)
+
+
+async def _single_event(event):
+    yield event
+
+
+def _sse_response(events, on_close=None):
+    async def generate():
+        error = None
+        try:
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        except DuplicateTaskError:
+            # Not a backend failure: the backend is released without an error.
+            message = {"error": "Only duplicates of existing tasks generated."}
+            yield f"data: {json.dumps(message)}\n\n"
+        except Exception as e:
+            error = e
+            yield f"data: {json.dumps({'error': 'Task generation failed.'})}\n\n"
+        finally:
+            # Also runs when the client disconnects and the stream is cancelled.
+            if on_close:
+                on_close(error)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _busy_response(error):
+    return _JSONResponse(
+        {"error": "Too many pending generations, retry later."},
+        status_code=error.status_code,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _unavailable_response(error):
+    return _JSONResponse(
+        {"error": "No Ollama backend available, retry later."},
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _not_ready_response(error):
+    return _JSONResponse(
+        {"error": "Model is being downloaded, retry later.", "pull": error.progress},
+        status_code=503,
+        headers={"Retry-After": "10"},
+    )
+
+
+async def get_tasks(request):
+    after = request.query_params.get("after")
+    if after:
+        try:
+            decode_cursor(after)
+        except ValueError:
+            return _JSONResponse({"error": "Invalid 'after' cursor"}, status_code=400)
+
+    try:
+        skip = _int_arg(request, "skip", 0)
+        limit = _int_arg(request, "limit", 10)
+        favorite = _int_arg(request, "favorite")
+
+        async def build():
+            if _int_arg(request, "include_total", 0):
+                page = await run_in_session(
+                    list_tasks_page,
+                    skip=skip,
+                    limit=limit,
+                    favorite=favorite,
+                    after=after,
+                )
+                response = _JSONResponse(page)
+                cursor = page["next_cursor"]
+            else:
+                tasks = await run_in_session(
+                    list_tasks, skip=skip, limit=limit, favorite=favorite, after=after
+                )
+                response = _JSONResponse(tasks)
+                cursor = next_cursor(tasks, limit)
+            if cursor:
+                response.headers["X-Next-Cursor"] = cursor
+            return response
+
+        return await _conditional_response(request, build)
+    except Exception:
+        return _JSONResponse({"error": "Failed to fetch tasks."}, status_code=500)
+
+
+async def get_task_count(request):
+    try:
+        favorite = _int_arg(request, "favorite")
+
+        async def build():
+            count = await run_in_session(count_tasks, favorite=favorite)
+            return _JSONResponse({"count": count})
+
+        return await _conditional_response(request, build)
+    except Exception:
+        return _JSONResponse({"error": "Counting tasks failed."}, status_code=500)
+
+
+async def get_search_results(request):
+    query = request.query_params.get("q", "").strip()
+    if not 1 <= len(query) <= MAX_QUERY_LENGTH:
+        return _JSONResponse(
+            {"error": f"Invalid 'q' value, must be 1 to {MAX_QUERY_LENGTH} characters"},
+            status_code=400,
+        )
+    limit = _int_arg(request, "limit", 10)
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        return _JSONResponse(
+            {"error": f"Invalid 'limit' value, must be 1 to {MAX_SEARCH_LIMIT}"},
+            status_code=400,
+        )
+    after = request.query_params.get("after")
+    if after:
+        try:
+            decode_search_cursor(after)
+        except ValueError:
+            return _JSONResponse({"error": "Invalid 'after' cursor"}, status_code=400)
+
+    try:
+        language = request.query_params.get("language")
+
+        async def build():
+            results = await run_in_session(
+                search_tasks, query, limit=limit, after=after, language=language
+            )
+            response = _JSONResponse(results)
+            cursor = next_search_cursor(results, limit)
+            if cursor:
+                response.headers["X-Next-Cursor"] = cursor
+            return response
+
+        return await _conditional_response(request, build)
+    except Exception:
+        return _JSONResponse({"error": "Searching tasks failed."}, status_code=500)
+
+
+async def download_tasks(request):
+    favorite = _int_arg(request, "favorite")
+    return StreamingResponse(
+        export_tasks(favorite=favorite),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": "attachment; filename=tasks.ndjson",
+            "Cache-Control": "no-cache",
+        },
+    )
+
+
+async def upload_tasks(request):
+    task_import = TaskImport()
+    try:
+        summary = await import_tasks(request.stream(), task_import)
+    except ImportRejected as e:
+        return _JSONResponse(
+            {"error": str(e), **task_import.summary()}, status_code=409
+        )
+    except Exception:
+        return _JSONResponse(
+            {"error": "Importing tasks failed.", **task_import.summary()},
+            status_code=500,
+        )
+    if summary["skipped"] and not summary["imported"]:
+        return _JSONResponse(
+            {"error": "No valid tasks to import.", **summary}, status_code=400
+        )
+    return _JSONResponse(summary)
+
+
+async def _conditional_response(request, build):
+    """Answer with 304 while the tasks are unchanged since the client's copy,
+    otherwise build the response and tag it with the current data version."""
+    version, updated_at = await run_in_session(task_data_version)
+    etag = f"tasks-{version}"
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if updated_at is not None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+        headers["Last-Modified"] = http_date(updated_at)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        not_modified = parse_etags(if_none_match).contains(etag)
+    else:
+        modified_since = parse_date(request.headers.get("if-modified-since"))
+        not_modified = (
+            modified_since is not None
+            and updated_at is not None
+            and updated_at <= modified_since
+        )
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response = await build()
+    response.headers.update(headers)
+    return response
+
+
+async def get_generation_stats(request):
+    window = _int_arg(request, "window", 86400)
+    if window <= 0:
+        return _JSONResponse(
+            {"error": "Invalid 'window' value, must be positive"}, status_code=400
+        )
+
+    try:
+        return _JSONResponse(await run_in_session(generation_stats, window))
+    except Exception:
+        return _JSONResponse(
+            {"error": "Failed to compute generation stats."}, status_code=500
+        )
+
+
+async def update_like(request):
+    task_id = request.path_params["task_id"]
+    data = await _json_body(request)
+    like = data.get("like")
+
+    if like not in (0, 1):
+        return _JSONResponse(
+            {"error": "Invalid 'like' value, must be 0 or 1"}, status_code=400
+        )
+
+    try:
+        await run_in_session(like_task, task_id, like)
+        return _JSONResponse({"message": "Task like status updated."})
+    except Exception:
+        return _JSONResponse(
+            {"error": "Failed to update like status."}, status_code=500
+        )
+
+
+async def update_likes(request):
+    data = await _json_body(request)
+    changes = data.get("likes")
+
+    if (
+        not isinstance(changes, list)
+        or not 1 <= len(changes) <= MAX_BULK_LIKES
+        or not all(
+            isinstance(change, dict)
+            and type(change.get("id")) is int
+            and change.get("like") in (0, 1)
+            for change in changes
+        )
+    ):
+        return _JSONResponse(
+            {
+                "error": "Invalid 'likes' value, must be a list of 1 to "
+                f"{MAX_BULK_LIKES} objects with an integer 'id' and 'like' 0 or 1"
+            },
+            status_code=400,
+        )
+
+    try:
+        updated = await run_in_session(
+            like_tasks, {change["id"]: change["like"] for change in changes}
+        )
+        return _JSONResponse(
+            {"message": "Task like status updated.", "updated": updated}
+        )
+    except Exception:
+        return _JSONResponse(
+            {"error": "Failed to update like status."}, status_code=500
+        )
+
+
+async def delete_tasks(request):
+    try:
+        keep_favorites = _int_arg(request, "keep_favorites", 1)
+        await run_in_session(delete_all_tasks, keep_favorites=bool(keep_favorites))
+        return _JSONResponse({"message": "Task(s) deleted successfully."})
+    except Exception:
+        return _JSONResponse({"error": "Failed to delete tasks."}, status_code=500)
+
+
+tasks_routes = [
+    Route("/tasks", create_task, methods=["POST"]),
+    Route("/tasks", get_tasks, methods=["GET"]),
+    Route("/tasks", delete_tasks, methods=["DELETE"]),
+    Route("/tasks/batch", create_task_batch, methods=["POST"]),
+    Route("/tasks/stream", create_task_stream, methods=["POST"]),
+    Route("/tasks/count", get_task_count, methods=["GET"]),
+    Route("/tasks/search", get_search_results, methods=["GET"]),
+    Route("/tasks/export", download_tasks, methods=["GET"]),
+    Route("/tasks/import", upload_tasks, methods=["POST"]),
+    Route("/tasks/stats", get_generation_stats, methods=["GET"]),
+    Route("/tasks/{task_id:int}/like", update_like, methods=["POST"]),
+    Route("/tasks/likes", update_likes, methods=["POST"]),
+]
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import aiohttp
+import requests
+from services.metrics import register_metrics
+from services.model_cache import model_cache
+from services.ollama import OLLAMA_URLS, ollama_client
+
+OLLAMA_MAX_IN_FLIGHT = int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "4"))
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))
+OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
+OLLAMA_PROBE_TIMEOUT = float(os.getenv("OLLAMA_PROBE_TIMEOUT", "2"))
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every Ollama backend is ejected or at its in-flight limit."""
+
+    def __init__(self, retry_after):
+        super().__init__("No Ollama backend available")
+        self.retry_after = retry_after
+
+
+class _Backend:
+    def __init__(self, url):
+        self.url = url
+        self.in_flight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.latencies = {}
+        self.probe_latency = None
+        self.loaded_models = set()
+        self.requests = 0
+        self.errors = 0
+
+    def latency_for(self, model):
+        return self.latencies.get(model, self.probe_latency) or 0.0
+
+
+class Lease:
+    """A reserved in-flight slot on one backend; call ``done`` exactly once."""
+
+    def __init__(self, balancer, backend, model):
+        self._balancer = balancer
+        self._backend = backend
+        self._model = model
+        self._started = time.monotonic()
+        self._done = False
+        self.url = backend.url
+
+    def done(self, error=None):
+        if not self._done:
+            self._done = True
+            self._balancer._release(
+                self._backend, self._model, time.monotonic() - self._started, error
+            )
+
+
+class OllamaBalancer:
+    """Routes generations across several Ollama instances.
+
+    A request goes to the available backend that already has the model
+    loaded (then installed) and the lowest observed latency for it.
+    Backends that fail repeatedly are ejected for a while and re-probed by
+    the health check loop.
+    """
+
+    def __init__(
+        self,
+        urls=OLLAMA_URLS,
+        client=ollama_client,
+        max_in_flight=OLLAMA_MAX_IN_FLIGHT,
+        eject_after_failures=OLLAMA_EJECT_AFTER_FAILURES,
+        eject_seconds=OLLAMA_EJECT_SECONDS,
+    ):
+        self._backends = [_Backend(url) for url in urls]
+        self._client = client
+        self.max_in_flight = max_in_flight
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    @property
+    def urls(self):
+        return [backend.url for backend in self._backends]
+
+    def acquire(self, model):
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                b
+                for b in self._backends
+                if b.ejected_until <= now and b.in_flight < self.max_in_flight
+            ]
+            if not candidates:
+                raise NoBackendAvailable(self._retry_after(now))
+            backend = min(
+                candidates,
+                key=lambda b: (
+                    model not in b.loaded_models,
+                    not model_cache.peek(b.url, model),
+                    b.latency_for(model),
+                    b.in_flight,
+                ),
+            )
+            backend.in_flight += 1
+            backend.requests += 1
+        return Lease(self, backend, model)
+
+    @contextmanager
+    def backend(self, model):
+        """Yield the URL of the best backend for ``model``."""
+        lease = self.acquire(model)
+        try:
+            yield lease.url
+        except Exception as e:
+            lease.done(error=e)
+            raise
+        else:
+            lease.done()
+
+    def _release(self, backend, model, latency, error):
+        with self._lock:
+            backend.in_flight -= 1
+            if error is not None and _is_backend_failure(error):
+                backend.errors += 1
+                self._record_failure(backend)
+            elif error is None:
+                backend.failures = 0
+                backend.loaded_models.add(model)
+                previous = backend.latencies.get(model, latency)
+                backend.latencies[model] = 0.8 * previous + 0.2 * latency
+
+    def _record_failure(self, backend):
+        backend.failures += 1
+        if backend.failures >= self.eject_after_failures:
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+
+    def _retry_after(self, now):
+        ejected = [
+            b.ejected_until - now for b in self._backends if b.ejected_until > now
+        ]
+        return max(int(min(ejected)) + 1, 1) if ejected else 1
+
+    def probe(self):
+        """Check every backend (ejected ones included) and refresh its models."""
+        for backend in self._backends:
+            started = time.monotonic()
+            try:
+                loaded = self._models(backend.url, "/api/ps")
+                installed = self._models(backend.url, "/api/tags")
+            except Exception:
+                with self._lock:
+                    self._record_failure(backend)
+                continue
+            model_cache.mark_available(backend.url, *installed)
+            with self._lock:
+                backend.probe_latency = time.monotonic() - started
+                backend.loaded_models = loaded
+                backend.failures = 0
+                backend.ejected_until = 0.0
+
+    def _models(self, url, path):
+        response = self._client.get(f"{url}{path}", timeout=OLLAMA_PROBE_TIMEOUT)
+        response.raise_for_status()
+        return {m["name"] for m in response.json().get("models", [])}
+
+    def start_health_checks(self, interval=OLLAMA_HEALTH_INTERVAL):
+        with self._lock:
+            if self._health_thread is not None or interval <= 0:
+                return
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(interval,), daemon=True
+            )
+        self._health_thread.start()
+
+    def _health_loop(self, interval):
+        while True:
+            self.probe()
+            time.sleep(interval)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "backends": {
+                    b.url: {
+                        "healthy": b.ejected_until <= now,
+                        "in_flight": b.in_flight,
+                        "requests": b.requests,
+                        "errors": b.errors,
+                        "consecutive_failures": b.failures,
+                        "probe_latency_seconds": b.probe_latency,
+                        "latency_seconds": dict(b.latencies),
+                        "loaded_models": sorted(b.loaded_models),
+                    }
+                    for b in self._backends
+                },
+            }
+
+
+def _is_backend_failure(error):
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+    return isinstance(
+        error,
+        (
+            requests.exceptions.RequestException,
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+        ),
+    )
+
+
+balancer = OllamaBalancer()
+register_metrics("balancer", balancer.stats)
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from services.metrics import register_metrics
+
+DEDUP_MODE = os.getenv("DEDUP_MODE", "regenerate")
+DEDUP_MAX_ATTEMPTS = int(os.getenv("DEDUP_MAX_ATTEMPTS", "3"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))
+DEDUP_INDEX_CAPACITY = int(os.getenv("DEDUP_INDEX_CAPACITY", "0"))
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r"[\W_]+")
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)
+]
+
+
+class DuplicateTaskError(Exception):
+    """Raised when only near-duplicates of stored tasks could be generated."""
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def _word_hashes(normalized: str):
+    # Word sets make reordered or slightly reworded tasks look alike.
+    return [
+        int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), "big")
+        for w in set(normalized.split()) or {""}
+    ]
+
+
+def minhash_signature(normalized: str):
+    hashes = _word_hashes(normalized)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class DuplicateIndex:
+    """In-memory near-duplicate index over task texts.
+
+    Exact repeats are found through a hash of the normalized text, rephrasings
+    through MinHash signatures of the word sets, bucketed with locality-sensitive
+    hashing. Tasks are added when they are stored and removed when they are
+    pruned, so the index holds the tasks the table keeps. A ``capacity``
+    other than 0 also bounds it to the most recently added tasks.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, capacity=DEDUP_INDEX_CAPACITY):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._clear()
+        self.loaded = False
+        self._lookups = 0
+        self._lookup_seconds = 0.0
+        self._duplicates = 0
+        self._build_seconds = None
+
+    def _clear(self):
+        self._entries = OrderedDict()
+        self._exact = {}
+        self._buckets = {}
+
+    def build(self, rows):
+        """Replace the index content with ``(task_id, task_text)`` rows."""
+        started = time.perf_counter()
+        entries = [(task_id, self._fingerprint(text)) for task_id, text in rows]
+        with self._lock:
+            self._clear()
+            for task_id, fingerprint in entries:
+                self._insert(task_id, fingerprint)
+            self.loaded = True
+            self._build_seconds = time.perf_counter() - started
+
+    def clear(self):
+        """Empty the index; it is built again before the next lookup."""
+        with self._lock:
+            self._clear()
+            self.loaded = False
+
+    def add(self, task_id, text):
+        fingerprint = self._fingerprint(text)
+        with self._lock:
+            self._insert(task_id, fingerprint)
+
+    def remove(self, *task_ids):
+        with self._lock:
+            for task_id in task_ids:
+                self._delete(task_id)
+
+    def find_duplicate(self, text):
+        """Return the id of a stored near-duplicate of ``text``, or None."""
+        started = time.perf_counter()
+        exact, signature = self._fingerprint(text)
+        with self._lock:
+            match = next(iter(self._exact.get(exact, ())), None)
+            if match is None:
+                match = self._best_candidate(signature)
+            self._lookups += 1
+            self._lookup_seconds += time.perf_counter() - started
+            if match is not None:
+                self._duplicates += 1
+            return match
+
+    def _best_candidate(self, signature):
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates |= self._buckets.get((band, key), set())
+        best, best_similarity = None, self.threshold
+        for task_id in candidates:
+            other = self._entries[task_id][1]
+            similarity = sum(x == y for x, y in zip(signature, other)) / _NUM_PERM
+            if similarity >= best_similarity:
+                best, best_similarity = task_id, similarity
+        return best
+
+    @staticmethod
+    def _fingerprint(text):
+        normalized = normalize_text(text)
+        exact = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        return exact, minhash_signature(normalized)
+
+    @staticmethod
+    def _band_keys(signature):
+        return [signature[i * _ROWS : (i + 1) * _ROWS] for i in range(_BANDS)]
+
+    def _insert(self, task_id, fingerprint):
+        self._delete(task_id)
+        exact, signature = fingerprint
+        self._entries[task_id] = fingerprint
+        self._exact.setdefault(exact, set()).add(task_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets.setdefault((band, key), set()).add(task_id)
+        while self.capacity and len(self._entries) > self.capacity:
+            self._delete(next(iter(self._entries)))
+
+    def _delete(self, task_id):
+        fingerprint = self._entries.pop(task_id, None)
+        if fingerprint is None:
+            return
+        exact, signature = fingerprint
+        self._discard(self._exact, exact, task_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._discard(self._buckets, (band, key), task_id)
+
+    @staticmethod
+    def _discard(mapping, key, task_id):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del mapping[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": DEDUP_MODE,
+                "threshold": self.threshold,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "lookups": self._lookups,
+                "duplicates": self._duplicates,
+                "avg_lookup_ms": (
+                    1000 * self._lookup_seconds / self._lookups
+                    if self._lookups
+                    else None
+                ),
+                "build_seconds": self._build_seconds,
+            }
+
+
+duplicate_index = DuplicateIndex()
+register_metrics("dedup", duplicate_index.stats)
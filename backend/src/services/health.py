@@ -0,0 +1,112 @@
+"""Liveness and readiness of this backend process.
+
+Liveness only tells that the process serves requests. Readiness checks the
+dependencies a generation needs: the database, at least one Ollama backend
+and, once a model is saved in the settings, that model loaded into Ollama.
+"""
+
+import threading
+import time
+
+from db.db import db_init_stats, db_ready, ping_db, with_db_session
+from services.balancer import OLLAMA_PROBE_TIMEOUT, balancer
+from services.metrics import register_metrics
+from services.ollama import full_model_name, ollama_client
+from services.settings import settings_cache
+
+STARTED = time.monotonic()
+
+
+@with_db_session
+def ping_database(db):
+    ping_db(db)
+
+
+def _timed(check, *args):
+    """Run ``check``; return its result, latency in ms and error (if any)."""
+    started = time.monotonic()
+    try:
+        result, error = check(*args), None
+    except Exception as e:
+        result, error = None, str(e) or type(e).__name__
+    return result, round((time.monotonic() - started) * 1000, 2), error
+
+
+def _loaded_models(url):
+    response = ollama_client.request(
+        "GET", f"{url}/api/ps", idempotent=False, timeout=OLLAMA_PROBE_TIMEOUT
+    )
+    response.raise_for_status()
+    return {full_model_name(m["name"]) for m in response.json().get("models", [])}
+
+
+class Readiness:
+    """Runs the readiness checks and remembers when they first passed."""
+
+    def __init__(self, urls=None, started=STARTED, clock=time.monotonic):
+        self._urls = urls
+        self.started = started
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ready_after = None
+        self._checks = 0
+
+    def check(self):
+        """Return ``(ready, report)``; the checks never wait for init_db()."""
+        if db_ready():
+            _, latency, error = _timed(ping_database)
+            database = {"ok": error is None, "latency_ms": latency}
+        else:
+            error = "Not initialized yet"
+            database = {"ok": False}
+        if error:
+            database["error"] = error
+
+        backends = {}
+        loaded = set()
+        for url in self._urls if self._urls is not None else balancer.urls:
+            models, latency, error = _timed(_loaded_models, url)
+            backends[url] = {"ok": error is None, "latency_ms": latency}
+            if error:
+                backends[url]["error"] = error
+            else:
+                loaded |= models
+        ollama = {"ok": any(b["ok"] for b in backends.values()), "backends": backends}
+
+        model = {"name": None, "ok": database["ok"]}
+        if database["ok"]:
+            try:
+                model["name"] = settings_cache.get()[0].get("MODEL")
+            except Exception as e:
+                model.update(ok=False, error=str(e))
+            if model["name"]:
+                model["ok"] = full_model_name(model["name"]) in loaded
+
+        ready = database["ok"] and ollama["ok"] and model["ok"]
+        with self._lock:
+            self._checks += 1
+            if ready and self._ready_after is None:
+                self._ready_after = self._clock() - self.started
+        return ready, {
+            "status": "ready" if ready else "not ready",
+            "database": database,
+            "ollama": ollama,
+            "model": model,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(self._clock() - self.started, 3),
+                "time_to_ready_seconds": self._ready_after,
+                "readiness_checks": self._checks,
+                "database": db_init_stats(),
+            }
+
+
+def liveness():
+    return {"status": "ok", "uptime_seconds": round(time.monotonic() - STARTED, 3)}
+
+
+readiness = Readiness()
+register_metrics("startup", readiness.stats)
@@ -0,0 +1,26 @@
+import math
+import threading
+
+_collectors = {}
+_lock = threading.Lock()
+
+
+def register_metrics(name, collector):
+    """Register a callable returning a dict of metrics under ``name``."""
+    with _lock:
+        _collectors[name] = collector
+
+
+def collect_metrics():
+    """Return a snapshot of all registered metrics."""
+    with _lock:
+        collectors = dict(_collectors)
+    return {name: collector() for name, collector in collectors.items()}
+
+
+def percentile(values, p):
+    """The ``p``-th percentile of sorted ``values`` by nearest rank, or None
+    if there are none."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
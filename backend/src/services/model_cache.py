@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+from services.metrics import register_metrics
+from services.ollama import full_model_name
+
+MODEL_CACHE_TTL = float(os.getenv("MODEL_CACHE_TTL", "300"))
+
+
+class ModelCache:
+    """Remembers which models an Ollama instance has, for a limited time.
+    Untagged names stand for the default tag, as in Ollama."""
+
+    def __init__(self, ttl=MODEL_CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._expires = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def is_available(self, url, model):
+        key = (url, full_model_name(model))
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is not None and expires > self._clock():
+                self._hits += 1
+                return True
+            self._expires.pop(key, None)
+            self._misses += 1
+            return False
+
+    def peek(self, url, model):
+        """Like is_available, but neither counted in the stats nor evicting."""
+        with self._lock:
+            expires = self._expires.get((url, full_model_name(model)))
+            return expires is not None and expires > self._clock()
+
+    def mark_available(self, url, *models):
+        with self._lock:
+            expires = self._clock() + self.ttl
+            for model in models:
+                self._expires[(url, full_model_name(model))] = expires
+
+    def invalidate(self, url=None, model=None):
+        """Forget one model, all models of one instance, or everything."""
+        with self._lock:
+            self._invalidations += 1
+            if url is None:
+                self._expires.clear()
+                return
+            if model is not None:
+                model = full_model_name(model)
+            for key in list(self._expires):
+                if key[0] == url and model in (None, key[1]):
+                    del self._expires[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "entries": len(self._expires),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+            }
+
+
+model_cache = ModelCache()
+register_metrics("model_cache", model_cache.stats)
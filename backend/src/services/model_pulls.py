@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+
+from services.metrics import register_metrics
+from services.model_cache import model_cache
+from services.ollama import full_model_name, ollama_client
+
+
+class ModelNotReady(Exception):
+    """Raised when a model is still being downloaded."""
+
+    def __init__(self, model, progress):
+        super().__init__(f"Model '{model}' is not available yet")
+        self.model = model
+        self.progress = progress
+
+
+class ModelPullManager:
+    """Runs Ollama model pulls as background jobs, one per (url, model)."""
+
+    def __init__(self, client=ollama_client):
+        self._client = client
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def start(self, url, model):
+        """Start pulling ``model`` unless a pull is already running. Untagged
+        names share the job of the default tag."""
+        model = full_model_name(model)
+        with self._changed:
+            job = self._jobs.get((url, model))
+            if job and job["state"] == "pulling":
+                return dict(job)
+            job = {
+                "model": model,
+                "state": "pulling",
+                "status": "queued",
+                "completed": 0,
+                "total": None,
+                "percent": None,
+                "error": None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "version": 0,
+            }
+            self._jobs[(url, model)] = job
+        threading.Thread(target=self._run, args=(url, model, job), daemon=True).start()
+        return dict(job)
+
+    def get(self, url, model):
+        with self._changed:
+            job = self._jobs.get((url, full_model_name(model)))
+            return dict(job) if job else None
+
+    def is_pulling(self, url, model):
+        job = self.get(url, model)
+        return bool(job) and job["state"] == "pulling"
+
+    def wait(self, url, model, timeout=None):
+        """Block until the pull finished; return its final snapshot."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        model = full_model_name(model)
+        with self._changed:
+            while True:
+                job = self._jobs.get((url, model))
+                if not job or job["state"] != "pulling":
+                    return dict(job) if job else None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return dict(job)
+                self._changed.wait(remaining)
+
+    def follow(self, url, model, heartbeat=15):
+        """Yield a snapshot on every progress update until the pull finishes."""
+        version = -1
+        model = full_model_name(model)
+        while True:
+            with self._changed:
+                job = self._jobs.get((url, model))
+                if job and job["version"] == version and job["state"] == "pulling":
+                    self._changed.wait(heartbeat)
+                    job = self._jobs.get((url, model))
+                snapshot = dict(job) if job else None
+            if snapshot is None:
+                return
+            version = snapshot["version"]
+            yield snapshot
+            if snapshot["state"] != "pulling":
+                return
+
+    def _run(self, url, model, job):
+        try:
+            with self._client.post(
+                f"{url}/api/pull",
+                idempotent=True,
+                json={"name": model, "stream": True},
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    progress = json.loads(line)
+                    if "error" in progress:
+                        raise RuntimeError(progress["error"])
+                    self._update(job, progress)
+        except Exception as e:
+            print(f"Pulling model {model} from {url} failed: {e}")
+            self._finish(job, "error", error=str(e))
+        else:
+            model_cache.mark_available(url, model)
+            self._finish(job, "success")
+
+    def _update(self, job, progress):
+        with self._changed:
+            job["status"] = progress.get("status", job["status"])
+            if progress.get("total"):
+                job["total"] = progress["total"]
+                job["completed"] = progress.get("completed", 0)
+                job["percent"] = round(100 * job["completed"] / job["total"], 1)
+            job["version"] += 1
+            self._changed.notify_all()
+
+    def _finish(self, job, state, error=None):
+        with self._changed:
+            job["state"] = state
+            job["error"] = error
+            job["finished_at"] = time.time()
+            job["version"] += 1
+            self._changed.notify_all()
+
+    def stats(self):
+        with self._changed:
+            return {
+                f"{url}|{model}": {
+                    "state": job["state"],
+                    "percent": job["percent"],
+                }
+                for (url, model), job in self._jobs.items()
+            }
+
+
+model_pulls = ModelPullManager()
+register_metrics("model_pulls", model_pulls.stats)
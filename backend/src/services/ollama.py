@@ -0,0 +1,116 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from services.metrics import register_metrics
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+OLLAMA_URLS = [
+    url.strip()
+    for url in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",")
+    if url.strip()
+]
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "3"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "300"))
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def full_model_name(name):
+    """``name`` as Ollama lists it: with the default tag if it has none, so
+    "llama4" matches "llama4:latest"."""
+    if ":" in name.rsplit("/", 1)[-1]:
+        return name
+    return f"{name}:latest"
+
+
+class OllamaClient:
+    """Shared keep-alive HTTP session for talking to Ollama.
+
+    Every request gets connect/read timeouts. Idempotent requests are retried
+    on connection errors and timeouts with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+        read_timeout=OLLAMA_READ_TIMEOUT,
+        pool_size=OLLAMA_POOL_SIZE,
+        max_retries=OLLAMA_MAX_RETRIES,
+        retry_backoff=OLLAMA_RETRY_BACKOFF,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "connection_errors": 0,
+        }
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, idempotent=False, **kwargs):
+        return self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = self.max_retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            self._count("requests")
+            try:
+                return self._session.request(method, url, **kwargs)
+            except requests.exceptions.Timeout:
+                self._count("timeouts")
+                if attempt + 1 >= attempts:
+                    raise
+            except requests.exceptions.ConnectionError:
+                self._count("connection_errors")
+                if attempt + 1 >= attempts:
+                    raise
+            self._count("retries")
+            time.sleep(self.retry_backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        connections = 0
+        pooled_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "connect_timeout_seconds": self.timeout[0],
+            "read_timeout_seconds": self.timeout[1],
+            "connections_opened": connections,
+            "connections_reused": max(pooled_requests - connections, 0),
+        }
+
+
+ollama_client = OllamaClient()
+register_metrics("ollama_client", ollama_client.stats)
@@ -0,0 +1,109 @@
+import asyncio
+import random
+import threading
+
+import aiohttp
+from services.metrics import register_metrics
+from services.ollama import (
+    IDEMPOTENT_METHODS,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_MAX_RETRIES,
+    OLLAMA_READ_TIMEOUT,
+    OLLAMA_RETRY_BACKOFF,
+)
+
+
+class AsyncOllamaClient:
+    """OllamaClient for the ASGI app, built on a shared aiohttp session.
+
+    A generation waiting for Ollama is a suspended coroutine, so the number
+    of open requests is not capped by a pool. Timeouts and retries match
+    OllamaClient. Responses are read completely before they are returned;
+    use ``stream`` to consume a body while it arrives.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+        read_timeout=OLLAMA_READ_TIMEOUT,
+        max_retries=OLLAMA_MAX_RETRIES,
+        retry_backoff=OLLAMA_RETRY_BACKOFF,
+    ):
+        self.timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Created on first use, inside the event loop that serves the app.
+        self._session = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "connection_errors": 0,
+        }
+
+    def _http(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0), timeout=self.timeout
+            )
+        return self._session
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, idempotent=False, **kwargs):
+        return await self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    async def request(self, method, url, idempotent=None, **kwargs):
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            self._count("requests")
+            try:
+                async with self._http().request(method, url, **kwargs) as response:
+                    await response.read()
+                    return response
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                if attempt + 1 >= attempts:
+                    raise
+            except aiohttp.ClientConnectionError:
+                self._count("connection_errors")
+                if attempt + 1 >= attempts:
+                    raise
+            self._count("retries")
+            await asyncio.sleep(
+                self.retry_backoff * 2**attempt * random.uniform(0.5, 1.5)
+            )
+
+    def stream(self, method, url, **kwargs):
+        """``async with client.stream(...) as response`` for streamed bodies."""
+        self._count("requests")
+        return self._http().request(method, url, **kwargs)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "connect_timeout_seconds": self.timeout.sock_connect,
+            "read_timeout_seconds": self.timeout.sock_read,
+        }
+
+
+async_ollama_client = AsyncOllamaClient()
+register_metrics("ollama_async_client", async_ollama_client.stats)
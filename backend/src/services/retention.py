@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+from db.db import prune_tasks_in_db, with_db_session
+from services.dedup import duplicate_index
+from services.metrics import register_metrics
+
+TASK_RETENTION_MAX_ROWS = int(os.getenv("TASK_RETENTION_MAX_ROWS", "500"))
+TASK_RETENTION_MAX_AGE_DAYS = float(os.getenv("TASK_RETENTION_MAX_AGE_DAYS", "0"))
+TASK_RETENTION_KEEP_FAVORITES = os.getenv(
+    "TASK_RETENTION_KEEP_FAVORITES", "true"
+).lower() in ("1", "true", "yes")
+TASK_RETENTION_PRUNE_EVERY = int(os.getenv("TASK_RETENTION_PRUNE_EVERY", "50"))
+TASK_RETENTION_INTERVAL = float(os.getenv("TASK_RETENTION_INTERVAL", "300"))
+
+
+@with_db_session
+def _prune_tasks(db, **policy):
+    deleted_ids = prune_tasks_in_db(db, **policy)
+    duplicate_index.remove(*deleted_ids)
+    return len(deleted_ids)
+
+
+class TaskPruner:
+    """Applies the task retention policy in batches.
+
+    Inserts only bump a counter. Once ``prune_every`` tasks were added, a
+    background prune deletes everything the policy no longer keeps, and a
+    periodic prune catches tasks that aged out in between. The table can
+    therefore briefly hold up to ``prune_every`` tasks more than ``max_rows``.
+    """
+
+    def __init__(
+        self,
+        prune=_prune_tasks,
+        max_rows=TASK_RETENTION_MAX_ROWS,
+        max_age_days=TASK_RETENTION_MAX_AGE_DAYS,
+        keep_favorites=TASK_RETENTION_KEEP_FAVORITES,
+        prune_every=TASK_RETENTION_PRUNE_EVERY,
+    ):
+        self._prune = prune
+        self.max_rows = max(max_rows, 0)
+        self.max_age = timedelta(days=max_age_days) if max_age_days > 0 else None
+        self.keep_favorites = keep_favorites
+        self.prune_every = max(prune_every, 1)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pruning = False
+        self._runs = 0
+        self._deleted = 0
+        self._errors = 0
+        self._last_seconds = None
+        self._interval_thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.max_rows or self.max_age)
+
+    def record_inserts(self, count=1):
+        """Count new tasks and start a background prune once enough piled up."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._pending += count
+            if self._pruning or self._pending < self.prune_every:
+                return False
+            self._pruning = True
+        threading.Thread(target=self._prune_logged, daemon=True).start()
+        return True
+
+    def prune(self):
+        """Apply the policy now and return the number of deleted tasks."""
+        started = time.monotonic()
+        with self._lock:
+            pending = self._pending
+        deleted = self._prune(
+            max_rows=self.max_rows,
+            max_age=self.max_age,
+            keep_favorites=self.keep_favorites,
+        )
+        with self._lock:
+            self._pending = max(self._pending - pending, 0)
+            self._runs += 1
+            self._deleted += deleted
+            self._last_seconds = time.monotonic() - started
+        return deleted
+
+    def _prune_logged(self):
+        try:
+            self.prune()
+        except Exception as e:
+            print(f"Pruning tasks failed: {e}")
+            with self._lock:
+                self._errors += 1
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def start(self, interval=TASK_RETENTION_INTERVAL):
+        """Prune at startup and then every ``interval`` seconds."""
+        with self._lock:
+            if self._interval_thread is not None or not self.enabled:
+                return
+            self._interval_thread = threading.Thread(
+                target=self._prune_periodically, args=(interval,), daemon=True
+            )
+        self._interval_thread.start()
+
+    def _prune_periodically(self, interval):
+        while True:
+            with self._lock:
+                busy = self._pruning
+                self._pruning = True
+            if not busy:
+                self._prune_logged()
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_rows": self.max_rows,
+                "max_age_days": (
+                    self.max_age.total_seconds() / 86400 if self.max_age else None
+                ),
+                "keep_favorites": self.keep_favorites,
+                "prune_every": self.prune_every,
+                "pending_inserts": self._pending,
+                "runs": self._runs,
+                "deleted": self._deleted,
+                "errors": self._errors,
+                "last_seconds": self._last_seconds,
+            }
+
+
+task_pruner = TaskPruner()
+register_metrics("retention", task_pruner.stats)
@@ -0,0 +1,214 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from services.metrics import percentile
+
+OLLAMA_MODEL_CONCURRENCY = int(os.getenv("OLLAMA_MODEL_CONCURRENCY", "1"))
+OLLAMA_MODEL_CONCURRENCY_OVERRIDES = os.getenv("OLLAMA_MODEL_CONCURRENCY_OVERRIDES", "")
+OLLAMA_QUEUE_SIZE = int(os.getenv("OLLAMA_QUEUE_SIZE", "8"))
+OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "120"))
+
+
+def parse_model_limits(spec: str):
+    """Parse ``"llama3:70b=1,smollm2:1.7b=4"`` into a dict of limits."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, limit = entry.rpartition("=")
+        limits[model.strip()] = max(int(limit), 1)
+    return limits
+
+
+class SchedulerBusy(Exception):
+    """Raised when a generation cannot be admitted (queue full or wait timed out)."""
+
+    def __init__(self, model, retry_after, status_code):
+        super().__init__(f"Generation queue for '{model}' is busy")
+        self.model = model
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class GenerationScheduler:
+    """Per-model bounded concurrency with a bounded FIFO waiting queue.
+
+    Requests for a model run immediately while fewer than its limit are in
+    flight, otherwise they wait in arrival order. When the queue of a model
+    is full, new requests are rejected instead of piling up threads.
+    """
+
+    def __init__(
+        self,
+        default_limit=OLLAMA_MODEL_CONCURRENCY,
+        limits=None,
+        queue_size=OLLAMA_QUEUE_SIZE,
+        queue_timeout=OLLAMA_QUEUE_TIMEOUT,
+    ):
+        self.default_limit = max(default_limit, 1)
+        self.limits = (
+            parse_model_limits(OLLAMA_MODEL_CONCURRENCY_OVERRIDES)
+            if limits is None
+            else limits
+        )
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._running = {}
+        self._queues = {}
+        self._service_times = {}
+        self._queue_waits = deque(maxlen=500)
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def limit_for(self, model):
+        return self.limits.get(model, self.default_limit)
+
+    def acquire(self, model):
+        """Block until ``model`` has a free slot; raise SchedulerBusy otherwise."""
+        limit = self.limit_for(model)
+        with self._cond:
+            queue = self._queues.setdefault(model, deque())
+            if not queue and self._running.get(model, 0) < limit:
+                self._admit(model, 0.0)
+                return
+            if len(queue) >= self.queue_size:
+                self._rejected += 1
+                raise SchedulerBusy(model, self._retry_after(model), 429)
+
+            ticket = object()
+            queue.append(ticket)
+            queued_at = time.monotonic()
+            deadline = queued_at + self.queue_timeout
+            while queue[0] is not ticket or self._running.get(model, 0) >= limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    self._timed_out += 1
+                    self._cond.notify_all()
+                    raise SchedulerBusy(model, self._retry_after(model), 503)
+                self._cond.wait(remaining)
+            queue.popleft()
+            self._admit(model, time.monotonic() - queued_at)
+            # The next waiter may fit as well if the limit is above one.
+            self._cond.notify_all()
+
+    def _admit(self, model, waited):
+        self._running[model] = self._running.get(model, 0) + 1
+        self._admitted += 1
+        self._queue_waits.append(waited)
+
+    def release(self, model, service_time=None):
+        with self._cond:
+            self._running[model] = max(self._running.get(model, 0) - 1, 0)
+            if service_time is not None:
+                previous = self._service_times.get(model, service_time)
+                self._service_times[model] = 0.8 * previous + 0.2 * service_time
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, model):
+        self.acquire(model)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(model, time.monotonic() - started)
+
+    def _retry_after(self, model):
+        """Rough number of seconds until a new request could be served."""
+        service_time = self._service_times.get(model, 1.0)
+        waiting = len(self._queues.get(model, ())) + 1
+        return max(math.ceil(service_time * waiting / self.limit_for(model)), 1)
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._queue_waits)
+            return {
+                "default_limit": self.default_limit,
+                "queue_size": self.queue_size,
+                "models": {
+                    model: {
+                        "limit": self.limit_for(model),
+                        "running": self._running.get(model, 0),
+                        "queued": len(self._queues.get(model, ())),
+                        "avg_service_seconds": self._service_times.get(model),
+                    }
+                    for model in set(self._running) | set(self._queues)
+                },
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "queue_wait_seconds": {
+                    "avg": sum(waits) / len(waits) if waits else None,
+                    "p95": percentile(waits, 95),
+                    "max": waits[-1] if waits else None,
+                },
+            }
+
+
+class AsyncGenerationScheduler(GenerationScheduler):
+    """GenerationScheduler for the ASGI app.
+
+    Same limits, queue and statistics, but a waiting request is a future
+    awaited by its coroutine instead of a blocked thread. A released slot is
+    handed straight to the first waiter. Use it from a single event loop.
+    """
+
+    async def acquire(self, model):
+        limit = self.limit_for(model)
+        with self._cond:
+            queue = self._queues.setdefault(model, deque())
+            if not queue and self._running.get(model, 0) < limit:
+                self._admit(model, 0.0)
+                return
+            if len(queue) >= self.queue_size:
+                self._rejected += 1
+                raise SchedulerBusy(model, self._retry_after(model), 429)
+            waiter = asyncio.get_running_loop().create_future()
+            queue.append(waiter)
+            queued_at = time.monotonic()
+
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            with self._cond:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as the wait ended.
+                    self._running[model] -= 1
+                    self._wake(model)
+                elif waiter in queue:
+                    queue.remove(waiter)
+                if isinstance(e, TimeoutError):
+                    self._timed_out += 1
+                    raise SchedulerBusy(model, self._retry_after(model), 503) from None
+            raise
+        with self._cond:
+            self._admitted += 1
+            self._queue_waits.append(time.monotonic() - queued_at)
+
+    def release(self, model, service_time=None):
+        with self._cond:
+            super().release(model, service_time)
+            self._wake(model)
+
+    def _wake(self, model):
+        queue = self._queues.get(model, ())
+        while queue and self._running.get(model, 0) < self.limit_for(model):
+            waiter = queue.popleft()
+            if not waiter.done():
+                self._running[model] = self._running.get(model, 0) + 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, model):
+        await self.acquire(model)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(model, time.monotonic() - started)
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import Counter
+
+from db.db import (
+    SEARCH_CONFIGS,
+    get_task_texts_from_db,
+    get_tasks_by_ids_from_db,
+    search_tasks_in_db,
+    with_db_session,
+)
+from services.dedup import normalize_text
+from services.metrics import register_metrics
+
+MAX_SEARCH_LIMIT = 100
+MAX_QUERY_LENGTH = 200
+
+
+class SearchIndex:
+    """In-process inverted index over task texts, for databases without
+    full-text search (SQLite in tests and local setups).
+
+    Words are normalized like the duplicate index does, without stemming,
+    and a task matches when it contains every word of the query. The rank is
+    the share of the task's words that match. Deleted tasks are dropped when
+    a search runs into them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._lengths = {}
+        self.loaded = False
+        self._searches = 0
+        self._search_seconds = 0.0
+
+    def build(self, rows):
+        """Add ``(task_id, task_text)`` rows and mark the index as loaded.
+        Tasks added concurrently are kept."""
+        for task_id, task_text in rows:
+            self.add(task_id, task_text)
+        self.loaded = True
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._lengths = {}
+            self.loaded = False
+
+    def add(self, task_id, task_text):
+        words = normalize_text(task_text).split()
+        with self._lock:
+            if task_id in self._lengths:
+                return
+            self._lengths[task_id] = len(words)
+            for word, count in Counter(words).items():
+                self._postings.setdefault(word, {})[task_id] = count
+
+    def remove(self, task_ids):
+        with self._lock:
+            for task_id in task_ids:
+                self._lengths.pop(task_id, None)
+            for word in list(self._postings):
+                postings = self._postings[word]
+                for task_id in task_ids:
+                    postings.pop(task_id, None)
+                if not postings:
+                    del self._postings[word]
+
+    def search(self, query, limit=10, after=None):
+        """Return up to ``limit`` ``(rank, task_id)`` pairs, best match first
+        and newest first among equal ranks. ``after`` is the ``(rank, id)``
+        of the last result of the previous page."""
+        started = time.perf_counter()
+        words = set(normalize_text(query).split())
+        with self._lock:
+            postings = sorted((self._postings.get(word, {}) for word in words), key=len)
+            hits = []
+            if postings:
+                for task_id in postings[0]:
+                    if all(task_id in other for other in postings[1:]):
+                        matched = sum(p[task_id] for p in postings)
+                        hits.append((matched / self._lengths[task_id], task_id))
+            self._searches += 1
+            self._search_seconds += time.perf_counter() - started
+        if after is not None:
+            hits = [hit for hit in hits if hit < tuple(after)]
+        hits.sort(reverse=True)
+        return hits[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "tasks": len(self._lengths),
+                "words": len(self._postings),
+                "searches": self._searches,
+                "avg_search_ms": (
+                    1000 * self._search_seconds / self._searches
+                    if self._searches
+                    else None
+                ),
+            }
+
+
+search_index = SearchIndex()
+register_metrics("search_index", search_index.stats)
+
+
+def uses_full_text_search(db):
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def index_tasks(db, rows):
+    """Add new ``(task_id, task_text)`` rows to the fallback index."""
+    if not uses_full_text_search(db):
+        for task_id, task_text in rows:
+            search_index.add(task_id, task_text)
+
+
+@with_db_session
+def load_search_index(db):
+    """Add all tasks to the fallback index, where the database has no
+    full-text search."""
+    if not uses_full_text_search(db):
+        search_index.build(get_task_texts_from_db(db, limit=None))
+
+
+def search_configs(language=None):
+    """Text search configurations a query is parsed with: the one of
+    ``language``, or all of them if no language is given."""
+    if language:
+        return [SEARCH_CONFIGS.get(language.lower(), "simple")]
+    return ["simple", *SEARCH_CONFIGS.values()]
+
+
+@with_db_session
+def search_tasks(db, query, limit=10, after=None, language=None):
+    """Tasks matching ``query``, best match first, with a ``rank`` each."""
+    after = decode_search_cursor(after) if after else None
+    if uses_full_text_search(db):
+        rows = search_tasks_in_db(
+            db, query, search_configs(language), limit=limit, after=after
+        )
+        return [
+            {
+                "id": row.id,
+                "task_text": row.task_text,
+                "created_at": row.created_at,
+                "favorite": row.favorite,
+                "rank": row.rank,
+            }
+            for row in rows
+        ]
+
+    if not search_index.loaded:
+        search_index.build(get_task_texts_from_db(db, limit=None))
+    while True:
+        hits = search_index.search(query, limit=limit, after=after)
+        tasks = {
+            task.id: task for task in get_tasks_by_ids_from_db(db, [h[1] for h in hits])
+        }
+        deleted = [task_id for _, task_id in hits if task_id not in tasks]
+        if not deleted:
+            break
+        search_index.remove(deleted)
+    return [
+        {
+            "id": task_id,
+            "task_text": tasks[task_id].task_text,
+            "created_at": tasks[task_id].created_at,
+            "favorite": tasks[task_id].favorite,
+            "rank": rank,
+        }
+        for rank, task_id in hits
+    ]
+
+
+def next_search_cursor(results, limit):
+    """Cursor of the following page, or None if ``results`` was the last one."""
+    if results and len(results) == limit:
+        return f"{results[-1]['rank']!r},{results[-1]['id']}"
+    return None
+
+
+def decode_search_cursor(cursor):
+    """Parse a cursor into ``(rank, id)``; raises ValueError if invalid."""
+    rank, _, task_id = cursor.rpartition(",")
+    return float(rank), int(task_id)
@@ -1,4 +1,14 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
 from db.db import with_db_session, get_app_settings_from_db, save_app_settings_to_db
+from services.metrics import register_metrics
+from services.model_cache import model_cache
+
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
 
 
 @with_db_session
@@ -8,4 +18,87 @@ def get_settings(db):
 
 @with_db_session
 def save_settings(db, settings):
-    return save_app_settings_to_db(db, settings)
+    record = save_app_settings_to_db(db, settings)
+    model_cache.invalidate()
+    settings_cache.invalidate()
+    return record
+
+
+def settings_etag(settings):
+    """Content hash of a settings document, the same in every process."""
+    document = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(document.encode()).hexdigest()[:32]
+
+
+def _load_settings():
+    record = get_settings()
+    return record.settings if record else {}
+
+
+class SettingsCache:
+    """The settings document and its ETag, cached in this process.
+
+    Saving through this process invalidates the cache right away. The TTL
+    bounds how long a change saved through another worker stays unseen.
+    Each invalidation starts a new generation, and settings loaded in an
+    earlier one are not cached, as a save may have happened after the read.
+    """
+
+    def __init__(self, load=_load_settings, ttl=SETTINGS_CACHE_TTL, clock=None):
+        self._load = load
+        self.ttl = ttl
+        self._clock = clock or time.monotonic
+        self._lock = threading.Lock()
+        self._entry = None
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self):
+        """Return ``(settings, etag)``."""
+        cached = self.cached()
+        if cached is not None:
+            return cached
+        generation = self.generation
+        return self.store(self._load(), generation)
+
+    def cached(self):
+        """Return ``(settings, etag)`` while fresh, otherwise None. Callers
+        that load the settings themselves pass them to ``store`` with the
+        generation read before loading."""
+        with self._lock:
+            if self._entry is not None and self._clock() < self._entry[2]:
+                self._hits += 1
+                return self._entry[0], self._entry[1]
+            self._misses += 1
+            return None
+
+    @property
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def store(self, settings, generation):
+        etag = settings_etag(settings)
+        with self._lock:
+            if generation == self._generation:
+                self._entry = (settings, etag, self._clock() + self.ttl)
+        return settings, etag
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {"ttl_seconds": self.ttl, "hits": self._hits, "misses": self._misses}
+
+
+settings_cache = SettingsCache()
+register_metrics("settings_cache", settings_cache.stats)
+
+
+def get_saved_model():
+    settings, _ = settings_cache.get()
+    return settings.get("MODEL")
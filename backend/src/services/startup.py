@@ -0,0 +1,46 @@
+import threading
+
+from db.db import init_db
+from services.balancer import balancer
+from services.retention import task_pruner
+from services.settings import get_saved_model
+from services.tasks import check_task_counters_periodically, load_duplicate_index
+from services.warmup import model_warmer
+
+
+def init_database():
+    try:
+        init_db()
+    except Exception as e:
+        print(f"Could not initialize the database: {e}")
+
+
+def warm_up_saved_model():
+    try:
+        model = get_saved_model()
+    except Exception as e:
+        print(f"Could not read the saved model for warm-up: {e}")
+        return
+    if model:
+        for url in balancer.urls:
+            model_warmer.warm_up_async(url, model)
+
+
+def build_duplicate_index():
+    try:
+        load_duplicate_index()
+    except Exception as e:
+        print(f"Could not build the duplicate index: {e}")
+
+
+def start_background_jobs():
+    """Database setup, health checks, retention, warm-up and index building,
+    shared by the WSGI and the ASGI app. The database is set up in the
+    background so the process answers liveness probes while it waits for the
+    database; requests that need it wait for the setup to finish."""
+    threading.Thread(target=init_database, daemon=True).start()
+    balancer.start_health_checks()
+    task_pruner.start()
+    threading.Thread(target=warm_up_saved_model, daemon=True).start()
+    threading.Thread(target=build_duplicate_index, daemon=True).start()
+    threading.Thread(target=check_task_counters_periodically, daemon=True).start()
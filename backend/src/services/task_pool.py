@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from services.settings import get_saved_model
+
+TASK_POOL_HIGH_WATERMARK = int(os.getenv("TASK_POOL_HIGH_WATERMARK", "5"))
+TASK_POOL_LOW_WATERMARK = int(os.getenv("TASK_POOL_LOW_WATERMARK", "2"))
+TASK_POOL_MAX_KEYS = int(os.getenv("TASK_POOL_MAX_KEYS", "4"))
+TASK_POOL_LANGUAGES = frozenset(
+    language.strip().lower()
+    for language in os.getenv("TASK_POOL_LANGUAGES", "english,deutsch").split(",")
+    if language.strip()
+)
+
+
+def is_poolable(language, model):
+    """Only a known language with the model saved in the settings is pooled,
+    so arbitrary request values cannot start refills."""
+    return (
+        isinstance(language, str)
+        and isinstance(model, str)
+        and language.lower() in TASK_POOL_LANGUAGES
+        and model == get_saved_model()
+    )
+
+
+class TaskPool:
+    """Ready-made tasks per (language, model), refilled in the background.
+
+    A refill starts once a pool drops to the low watermark and keeps
+    generating until the high watermark is reached. A high watermark of 0
+    disables pooling. Only pairs that ``accepts`` allows get a pool, and at
+    most ``max_keys`` pools are kept: the least recently used idle one is
+    dropped to make room, passing each of its tasks to ``discard``.
+    """
+
+    def __init__(
+        self,
+        produce,
+        high_watermark=TASK_POOL_HIGH_WATERMARK,
+        low_watermark=TASK_POOL_LOW_WATERMARK,
+        max_keys=TASK_POOL_MAX_KEYS,
+        accepts=lambda language, model: True,
+        discard=lambda task: None,
+    ):
+        self._produce = produce
+        self.high_watermark = max(high_watermark, 0)
+        self.low_watermark = max(min(low_watermark, self.high_watermark - 1), 0)
+        self.max_keys = max(max_keys, 1)
+        self._accepts = accepts
+        self._discard = discard
+        self._pools = OrderedDict()
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._refill_errors = 0
+        self._refill_lags = deque(maxlen=100)
+
+    def take(self, language, model):
+        """Pop a pooled task, or return None if the pool is empty."""
+        if not self.high_watermark or not self._accepts(language, model):
+            return None
+        key = (language, model)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool:
+                self._pools.move_to_end(key)
+                self._hits += 1
+                return pool.popleft()
+            self._misses += 1
+            return None
+
+    def ensure_filled(self, language, model):
+        """Start a background refill if the pool is at or below the low watermark."""
+        if not self.high_watermark or not self._accepts(language, model):
+            return False
+        key = (language, model)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                if not self._make_room():
+                    return False
+                pool = self._pools[key] = deque()
+            self._pools.move_to_end(key)
+            if key in self._refilling or len(pool) > self.low_watermark:
+                return False
+            self._refilling.add(key)
+        threading.Thread(
+            target=self._refill, args=(key, time.monotonic()), daemon=True
+        ).start()
+        return True
+
+    def _make_room(self):
+        """Drop idle pools, least recently used first, until a new one fits.
+        Pools being refilled are kept; returns False if none could go."""
+        while len(self._pools) >= self.max_keys:
+            idle = next((k for k in self._pools if k not in self._refilling), None)
+            if idle is None:
+                return False
+            for task in self._pools.pop(idle):
+                self._discard(task)
+            self._evictions += 1
+        return True
+
+    def _refill(self, key, requested_at):
+        language, model = key
+        try:
+            while self.depth(language, model) < self.high_watermark:
+                task = self._produce(language, model)
+                with self._lock:
+                    self._pools[key].append(task)
+        except Exception as e:
+            print(f"Task pool refill for {key} failed: {e}")
+            with self._lock:
+                self._refill_errors += 1
+        else:
+            with self._lock:
+                self._refill_lags.append(time.monotonic() - requested_at)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def depth(self, language, model):
+        with self._lock:
+            return len(self._pools.get((language, model), ()))
+
+    def stats(self):
+        with self._lock:
+            requests_total = self._hits + self._misses
+            lags = list(self._refill_lags)
+            return {
+                "high_watermark": self.high_watermark,
+                "low_watermark": self.low_watermark,
+                "max_keys": self.max_keys,
+                "depth": {
+                    f"{language}|{model}": len(pool)
+                    for (language, model), pool in self._pools.items()
+                },
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": self._hits / requests_total if requests_total else None,
+                "refills_in_progress": len(self._refilling),
+                "refill_errors": self._refill_errors,
+                "refill_lag_seconds": {
+                    "last": lags[-1] if lags else None,
+                    "avg": sum(lags) / len(lags) if lags else None,
+                    "max": max(lags) if lags else None,
+                },
+            }
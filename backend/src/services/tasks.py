@@ -1,41 +1,283 @@
-import requests
+import itertools
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
 from db.db import (
     with_db_session,
+    release_request_session,
     add_task_to_db,
+    add_tasks_to_db,
+    get_generation_stats_from_db,
+    get_task_data_version_from_db,
+    get_task_texts_from_db,
+    utc_now,
     get_tasks_from_db,
     like_task_in_db,
+    like_tasks_in_db,
     count_tasks_in_db,
+    repair_task_counters_in_db,
     delete_tasks_in_db,
 )
+from services.dedup import (
+    DEDUP_MAX_ATTEMPTS,
+    DEDUP_MODE,
+    DuplicateTaskError,
+    duplicate_index,
+    normalize_text,
+)
+from services.metrics import percentile
+from services.model_cache import model_cache
+from services.model_pulls import ModelNotReady, model_pulls
+from services.ollama import OLLAMA_KEEP_ALIVE, full_model_name, ollama_client
+from services.retention import task_pruner
+from services.search import index_tasks, search_index
+
+TASK_COUNTER_CHECK_INTERVAL = float(os.getenv("TASK_COUNTER_CHECK_INTERVAL", "3600"))
+MAX_BATCH_SIZE = 25
+MAX_BULK_LIKES = 500
+MAX_BATCH_COMPLETIONS = 3
+_LIST_MARKER = re.compile(r"^\s*(?:[-*\u2022]|\d+[.):])\s*")
+# Pooled tasks wait in the duplicate index under negative ids.
+_pooled_ids = itertools.count(-1, -1)
+TIMING_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
 
 
 def ensure_model_exists(url, model):
-    tags_response = requests.get(f"{url}/api/tags")
+    """Return once ``model`` is installed, or start pulling it in the
+    background and raise ModelNotReady instead of waiting for the download."""
+    if model_cache.is_available(url, model):
+        return
+    if model_pulls.is_pulling(url, model):
+        raise ModelNotReady(model, model_pulls.get(url, model))
+    tags_response = ollama_client.get(f"{url}/api/tags")
     tags_response.raise_for_status()
-    models = [m["name"] for m in tags_response.json().get("models", [])]
-    if model not in models:
-        pull_response = requests.post(f"{url}/api/pull", json={"name": model})
-        pull_response.raise_for_status()
+    models = [
+        full_model_name(m["name"]) for m in tags_response.json().get("models", [])
+    ]
+    if full_model_name(model) not in models:
+        raise ModelNotReady(model, model_pulls.start(url, model))
+    model_cache.mark_available(url, *models)
 
 
-@with_db_session
-def generate_task(db, url, language, model):
+def generation_details(language, model, response=None):
+    """Task columns describing a generation, from Ollama's final response."""
+    details = {"model": model, "language": language}
+    for field in TIMING_FIELDS:
+        details[field] = (response or {}).get(field)
+    return details
+
+
+def request_task_text(url, language, model, retry_missing_model=True):
+    """Ask Ollama for a new task without storing it. Returns the task text
+    and the generation details to store with it."""
+    release_request_session()
     ensure_model_exists(url, model)
-    response = requests.post(
+    response = ollama_client.post(
         f"{url}/api/generate",
         json={
             "model": model,
             "prompt": generate_prompt(language),
             "stream": False,
             "temperature": 0.9,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
         },
     )
+    if response.status_code == 404:
+        # The model vanished since it was cached (e.g. removed via the Ollama CLI).
+        model_cache.invalidate(url, model)
+        if retry_missing_model:
+            return request_task_text(url, language, model, retry_missing_model=False)
     response.raise_for_status()
-    task_text = response.json()["response"].strip()
-    add_task_to_db(db, task_text)
+    payload = response.json()
+    return payload["response"].strip(), generation_details(language, model, payload)
+
+
+def stream_task(url, language, model):
+    """Yield ``{"token": ...}`` events while Ollama generates, then store the
+    task and yield a final ``{"task": ...}`` event.
+
+    The streamed text is checked for near-duplicates once it is complete. A
+    duplicate raises DuplicateTaskError in DEDUP_MODE "reject", and is
+    replaced by a task generated without streaming in "regenerate".
+    """
+    release_request_session()
+    ensure_model_exists(url, model)
+    tokens = []
+    generation = generation_details(language, model)
+    with ollama_client.post(
+        f"{url}/api/generate",
+        json={
+            "model": model,
+            "prompt": generate_prompt(language),
+            "stream": True,
+            "temperature": 0.9,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        },
+        stream=True,
+    ) as response:
+        if response.status_code == 404:
+            model_cache.invalidate(url, model)
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+            if token:
+                tokens.append(token)
+                yield {"token": token}
+            if chunk.get("done"):
+                generation = generation_details(language, model, chunk)
+                break
+    task_text = "".join(tokens).strip()
+    if _is_known_duplicate(task_text):
+        if DEDUP_MODE == "reject":
+            raise DuplicateTaskError(f"Only duplicates generated for '{model}'")
+        task_text, generation = request_unique_task_text(url, language, model)
+    yield {"task": save_task(task_text, generation)}
+
+
+def request_unique_task_text(url, language, model):
+    """Like request_task_text, but regenerates near-duplicates of stored tasks
+    (DEDUP_MODE "regenerate") or rejects them (DEDUP_MODE "reject")."""
+    if DEDUP_MODE == "off":
+        return request_task_text(url, language, model)
+    for _ in range(max(DEDUP_MAX_ATTEMPTS, 1)):
+        task_text, generation = request_task_text(url, language, model)
+        if not _is_known_duplicate(task_text):
+            return task_text, generation
+    if DEDUP_MODE == "reject":
+        raise DuplicateTaskError(f"Only duplicates generated for '{model}'")
+    return task_text, generation
+
+
+def _is_known_duplicate(task_text):
+    if DEDUP_MODE == "off":
+        return False
+    if not duplicate_index.loaded:
+        load_duplicate_index()
+    return duplicate_index.find_duplicate(task_text) is not None
+
+
+def hold_pooled_task(task_text, generation):
+    """Return a pool entry for a generated task. Its text stays in the
+    duplicate index under a temporary id until it is served or dropped, so
+    tasks generated meanwhile, pooled or not, are checked against it."""
+    pooled_id = next(_pooled_ids)
+    if DEDUP_MODE != "off":
+        duplicate_index.add(pooled_id, task_text)
+    return pooled_id, task_text, generation
+
+
+def drop_pooled_task(pooled):
+    duplicate_index.remove(pooled[0])
+
+
+def release_pooled_task(pooled):
+    """Drop ``pooled`` from the duplicate index and tell whether its text is
+    still unique: a duplicate may have been stored since it was generated."""
+    drop_pooled_task(pooled)
+    return not _is_known_duplicate(pooled[1])
+
+
+@with_db_session
+def load_duplicate_index(db):
+    duplicate_index.build(
+        get_task_texts_from_db(db, limit=duplicate_index.capacity or None)
+    )
+
+
+def generate_task(url, language, model):
+    # The session is only opened once the generation is done.
+    task_text, generation = request_unique_task_text(url, language, model)
+    return save_task(task_text, generation)
+
+
+@with_db_session
+def save_task(db, task_text, generation=None):
+    task_id = add_task_to_db(db, task_text, **(generation or {}))
+    duplicate_index.add(task_id, task_text)
+    index_tasks(db, [(task_id, task_text)])
+    task_pruner.record_inserts()
     return task_text
 
 
+def request_task_batch(url, language, model, count):
+    """Ask Ollama for ``count`` distinct tasks using as few completions as possible."""
+    ensure_model_exists(url, model)
+    tasks = []
+    seen = set()
+    for _ in range(MAX_BATCH_COMPLETIONS):
+        missing = count - len(tasks)
+        if missing <= 0:
+            break
+        # The duplicate check may have read from the database.
+        release_request_session()
+        response = ollama_client.post(
+            f"{url}/api/generate",
+            json={
+                "model": model,
+                "prompt": generate_batch_prompt(language, missing),
+                "stream": False,
+                "temperature": 0.9,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+            },
+        )
+        if response.status_code == 404:
+            model_cache.invalidate(url, model)
+        response.raise_for_status()
+        for task_text in parse_task_lines(response.json()["response"]):
+            key = normalize_text(task_text)
+            if key not in seen and not _is_known_duplicate(task_text):
+                seen.add(key)
+                tasks.append(task_text)
+    return tasks[:count]
+
+
+def generate_task_batch(url, language, model, count):
+    started = time.monotonic()
+    tasks = request_task_batch(url, language, model, count)
+    # One completion yields the whole batch, so its timings are not per task.
+    save_tasks(tasks, generation_details(language, model))
+    duration = time.monotonic() - started
+    return {
+        "tasks": tasks,
+        "count": len(tasks),
+        "duration_seconds": round(duration, 3),
+        "tasks_per_second": round(len(tasks) / duration, 3) if duration else None,
+    }
+
+
+@with_db_session
+def save_tasks(db, task_texts, generation=None):
+    task_ids = add_tasks_to_db(db, task_texts, **(generation or {}))
+    for task_id, task_text in zip(task_ids, task_texts):
+        duplicate_index.add(task_id, task_text)
+    index_tasks(db, zip(task_ids, task_texts))
+    task_pruner.record_inserts(len(task_ids))
+    return task_ids
+
+
+def parse_task_lines(text):
+    """Split a multi-task completion into clean task texts."""
+    tasks = []
+    for line in text.splitlines():
+        task_text = _LIST_MARKER.sub("", line).strip().strip('"').strip()
+        if task_text:
+            tasks.append(task_text)
+    return tasks
+
+
 def generate_prompt(language):
     examples = [
         "watch baby animal videos on Youtube",
@@ -58,18 +300,55 @@ Respond only with the task itself.
 """
 
 
+def generate_batch_prompt(language, count):
+    return f"""You are 'Procrastination Buddy', a creative assistant for generating procrastination tasks.
+
+Generate {count} different procrastination tasks that:
+- Are short.
+- Can be casual or elaborate, but must be fun.
+- Avoid giving explanations, reasons.
+- Language (no translations): {language}
+
+Respond only with the tasks, one per line, without numbering.
+"""
+
+
 @with_db_session
 def like_task(db, task_id, like):
     like_task_in_db(db, task_id, like)
 
 
 @with_db_session
-def list_tasks(db, skip=0, limit=10, favorite=None):
+def like_tasks(db, likes):
+    """Apply ``{task_id: like}`` changes; return how many tasks changed."""
+    return len(like_tasks_in_db(db, likes))
+
+
+@with_db_session
+def list_tasks(db, skip=0, limit=10, favorite=None, after=None):
+    return _list_tasks(db, skip, limit, favorite, after)
+
+
+@with_db_session
+def list_tasks_page(db, skip=0, limit=10, favorite=None, after=None):
+    """A page of tasks with the total count and the next cursor, read in one
+    database session."""
+    tasks = _list_tasks(db, skip, limit, favorite, after)
+    return {
+        "items": tasks,
+        "total": count_tasks_in_db(db, favorite=favorite),
+        "page": {"skip": 0 if after else skip, "limit": limit, "after": after},
+        "next_cursor": next_cursor(tasks, limit),
+    }
+
+
+def _list_tasks(db, skip, limit, favorite, after):
     tasks = get_tasks_from_db(
         db,
         skip=skip,
         limit=limit,
         favorite=bool(favorite) if favorite is not None else None,
+        after=decode_cursor(after) if after else None,
     )
     return [
         {
@@ -82,11 +361,99 @@ def list_tasks(db, skip=0, limit=10, favorite=None):
     ]
 
 
+def next_cursor(tasks, limit):
+    """Cursor of the following page, or None if ``tasks`` was the last one."""
+    return encode_cursor(tasks[-1]) if tasks and len(tasks) == limit else None
+
+
+def encode_cursor(task):
+    """Cursor pointing right after ``task`` in the newest-first listing."""
+    return f"{task['created_at'].isoformat()},{task['id']}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor into ``(created_at, id)``; raises ValueError if invalid."""
+    created_at, _, task_id = cursor.rpartition(",")
+    return datetime.fromisoformat(created_at), int(task_id)
+
+
+@with_db_session
+def generation_stats(db, window_seconds):
+    """Per-model latency percentiles and token throughput over a time window."""
+    rows = get_generation_stats_from_db(
+        db, utc_now() - timedelta(seconds=window_seconds)
+    )
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(row.model, []).append(row)
+    return {
+        "window_seconds": window_seconds,
+        "models": {
+            model: _summarize_generations(model_rows)
+            for model, model_rows in by_model.items()
+        },
+    }
+
+
+def _summarize_generations(rows):
+    latencies = sorted(row.total_duration / 1e6 for row in rows)
+    loads = [row.load_duration / 1e6 for row in rows if row.load_duration is not None]
+    rates = sorted(
+        row.eval_count / (row.eval_duration / 1e9)
+        for row in rows
+        if row.eval_count and row.eval_duration
+    )
+    tokens = sum(row.eval_count or 0 for row in rows if row.eval_duration)
+    eval_seconds = sum(row.eval_duration or 0 for row in rows if row.eval_count) / 1e9
+    return {
+        "count": len(rows),
+        "latency_ms": _percentiles(latencies),
+        "avg_load_ms": sum(loads) / len(loads) if loads else None,
+        "tokens_per_second": {
+            **_percentiles(rates),
+            "overall": tokens / eval_seconds if eval_seconds else None,
+        },
+    }
+
+
+def _percentiles(values):
+    """p50/p95/p99 of already sorted ``values``."""
+    return {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+
+@with_db_session
+def task_data_version(db):
+    """``(version, updated_at)`` of the tasks, for conditional requests."""
+    return get_task_data_version_from_db(db)
+
+
 @with_db_session
 def count_tasks(db, favorite=None):
     return count_tasks_in_db(db, favorite=favorite)
 
 
+@with_db_session
+def repair_task_counters(db):
+    """Compare the maintained task counts with the table and fix any drift."""
+    drift = repair_task_counters_in_db(db)
+    if any(drift.values()):
+        print(f"Repaired task counter drift: {drift}")
+    return drift
+
+
+def check_task_counters_periodically(interval=TASK_COUNTER_CHECK_INTERVAL):
+    while interval > 0:
+        time.sleep(interval)
+        try:
+            repair_task_counters()
+        except Exception as e:
+            print(f"Checking the task counters failed: {e}")
+
+
 @with_db_session
 def delete_all_tasks(db, keep_favorites=True):
     delete_tasks_in_db(db, keep_favorites=keep_favorites)
+    search_index.clear()
+    duplicate_index.build(
+        get_task_texts_from_db(db, limit=duplicate_index.capacity or None)
+    )
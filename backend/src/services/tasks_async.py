@@ -0,0 +1,180 @@
+"""Coroutine versions of the generation paths in services.tasks for the ASGI
+app. Prompts, parsing and storage are shared with the synchronous module."""
+
+import json
+import time
+
+from db.async_db import run_in_session
+from services.dedup import (
+    DEDUP_MAX_ATTEMPTS,
+    DEDUP_MODE,
+    DuplicateTaskError,
+    duplicate_index,
+    normalize_text,
+)
+from services.model_cache import model_cache
+from services.model_pulls import ModelNotReady, model_pulls
+from services.ollama import OLLAMA_KEEP_ALIVE, full_model_name
+from services.ollama_async import async_ollama_client
+from services.tasks import (
+    MAX_BATCH_COMPLETIONS,
+    generate_batch_prompt,
+    generate_prompt,
+    drop_pooled_task,
+    generation_details,
+    load_duplicate_index,
+    parse_task_lines,
+    save_task,
+    save_tasks,
+)
+
+
+async def ensure_model_exists(url, model):
+    if model_cache.is_available(url, model):
+        return
+    if model_pulls.is_pulling(url, model):
+        raise ModelNotReady(model, model_pulls.get(url, model))
+    tags_response = await async_ollama_client.get(f"{url}/api/tags")
+    tags_response.raise_for_status()
+    models = [
+        full_model_name(m["name"])
+        for m in (await tags_response.json(content_type=None)).get("models", [])
+    ]
+    if full_model_name(model) not in models:
+        raise ModelNotReady(model, model_pulls.start(url, model))
+    model_cache.mark_available(url, *models)
+
+
+async def request_task_text(url, language, model, retry_missing_model=True):
+    await ensure_model_exists(url, model)
+    response = await async_ollama_client.post(
+        f"{url}/api/generate",
+        json={
+            "model": model,
+            "prompt": generate_prompt(language),
+            "stream": False,
+            "temperature": 0.9,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        },
+    )
+    if response.status == 404:
+        model_cache.invalidate(url, model)
+        if retry_missing_model:
+            return await request_task_text(
+                url, language, model, retry_missing_model=False
+            )
+    response.raise_for_status()
+    payload = await response.json(content_type=None)
+    return payload["response"].strip(), generation_details(language, model, payload)
+
+
+async def stream_task(url, language, model):
+    await ensure_model_exists(url, model)
+    tokens = []
+    generation = generation_details(language, model)
+    async with async_ollama_client.stream(
+        "POST",
+        f"{url}/api/generate",
+        json={
+            "model": model,
+            "prompt": generate_prompt(language),
+            "stream": True,
+            "temperature": 0.9,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        },
+    ) as response:
+        if response.status == 404:
+            model_cache.invalidate(url, model)
+        response.raise_for_status()
+        async for line in response.content:
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+            if token:
+                tokens.append(token)
+                yield {"token": token}
+            if chunk.get("done"):
+                generation = generation_details(language, model, chunk)
+                break
+    task_text = "".join(tokens).strip()
+    if await _is_known_duplicate(task_text):
+        if DEDUP_MODE == "reject":
+            raise DuplicateTaskError(f"Only duplicates generated for '{model}'")
+        task_text, generation = await request_unique_task_text(url, language, model)
+    yield {"task": await run_in_session(save_task, task_text, generation)}
+
+
+async def request_unique_task_text(url, language, model):
+    if DEDUP_MODE == "off":
+        return await request_task_text(url, language, model)
+    for _ in range(max(DEDUP_MAX_ATTEMPTS, 1)):
+        task_text, generation = await request_task_text(url, language, model)
+        if not await _is_known_duplicate(task_text):
+            return task_text, generation
+    if DEDUP_MODE == "reject":
+        raise DuplicateTaskError(f"Only duplicates generated for '{model}'")
+    return task_text, generation
+
+
+async def _is_known_duplicate(task_text):
+    if DEDUP_MODE == "off":
+        return False
+    if not duplicate_index.loaded:
+        await run_in_session(load_duplicate_index)
+    return duplicate_index.find_duplicate(task_text) is not None
+
+
+async def release_pooled_task(pooled):
+    drop_pooled_task(pooled)
+    return not await _is_known_duplicate(pooled[1])
+
+
+async def generate_task(url, language, model):
+    # The session is only opened once the generation is done.
+    task_text, generation = await request_unique_task_text(url, language, model)
+    return await run_in_session(save_task, task_text, generation)
+
+
+async def request_task_batch(url, language, model, count):
+    await ensure_model_exists(url, model)
+    tasks = []
+    seen = set()
+    for _ in range(MAX_BATCH_COMPLETIONS):
+        missing = count - len(tasks)
+        if missing <= 0:
+            break
+        response = await async_ollama_client.post(
+            f"{url}/api/generate",
+            json={
+                "model": model,
+                "prompt": generate_batch_prompt(language, missing),
+                "stream": False,
+                "temperature": 0.9,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+            },
+        )
+        if response.status == 404:
+            model_cache.invalidate(url, model)
+        response.raise_for_status()
+        for task_text in parse_task_lines(
+            (await response.json(content_type=None))["response"]
+        ):
+            key = normalize_text(task_text)
+            if key not in seen and not await _is_known_duplicate(task_text):
+                seen.add(key)
+                tasks.append(task_text)
+    return tasks[:count]
+
+
+async def generate_task_batch(url, language, model, count):
+    started = time.monotonic()
+    tasks = await request_task_batch(url, language, model, count)
+    await run_in_session(save_tasks, tasks, generation_details(language, model))
+    duration = time.monotonic() - started
+    return {
+        "tasks": tasks,
+        "count": len(tasks),
+        "duration_seconds": round(duration, 3),
+        "tasks_per_second": round(len(tasks) / duration, 3) if duration else None,
+    }
@@ -0,0 +1,326 @@
+"""Export of all tasks as NDJSON (one JSON object per line) and import of
+such exports in chunks."""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from db.db import (
+    db_session,
+    get_retained_task_times_from_db,
+    import_tasks_to_db,
+    iter_task_batches_from_db,
+    utc_now,
+    with_db_session,
+)
+from services.metrics import register_metrics
+from services.retention import task_pruner
+from services.search import load_search_index
+from services.tasks import TIMING_FIELDS, load_duplicate_index
+
+TASK_EXPORT_BATCH_SIZE = int(os.getenv("TASK_EXPORT_BATCH_SIZE", "1000"))
+TASK_IMPORT_CHUNK_SIZE = int(os.getenv("TASK_IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_READ_SIZE = 64 * 1024
+MAX_IMPORT_ERRORS = 10
+
+
+class ImportRejected(Exception):
+    """Raised when the retention policy would delete imported tasks."""
+
+
+_encoder = json.JSONEncoder(default=datetime.isoformat, separators=(",", ":"))
+_decoder = json.JSONDecoder()
+
+
+def encode_tasks(rows):
+    """NDJSON lines for exported task rows."""
+    return "".join(_encoder.encode(dict(row)) + "\n" for row in rows)
+
+
+def export_tasks(favorite=None, batch_size=TASK_EXPORT_BATCH_SIZE):
+    """Yield all tasks, oldest first, as NDJSON text of ``batch_size`` tasks.
+    The rows are read in a session of the export's own, from one snapshot."""
+    with db_session() as db:
+        for rows in iter_task_batches_from_db(
+            db,
+            batch_size,
+            favorite=bool(favorite) if favorite is not None else None,
+        ):
+            yield encode_tasks(rows)
+
+
+def parse_task_record(line):
+    """Task columns from one NDJSON line; raises ValueError if it is invalid.
+
+    Only ``task_text`` is required. The ``id`` is ignored, so imported tasks
+    get new ids, while ``created_at`` keeps them in their original order.
+    """
+    record = _decoder.decode(line)
+    if not isinstance(record, dict):
+        raise ValueError("Not a JSON object")
+    task_text = record.get("task_text")
+    if not isinstance(task_text, str) or not task_text.strip():
+        raise ValueError("Missing 'task_text'")
+    favorite = record.get("favorite") or 0
+    if favorite not in (0, 1):
+        raise ValueError("Invalid 'favorite', must be 0 or 1")
+    created_at = record.get("created_at")
+    if created_at is None:
+        created_at = datetime.now(timezone.utc)
+    elif isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    else:
+        raise ValueError("Invalid 'created_at', must be an ISO 8601 timestamp")
+    if created_at.tzinfo is not None:
+        # Stored like utc_now() values: UTC without an offset.
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    row = {"task_text": task_text, "favorite": int(favorite), "created_at": created_at}
+    for field in ("model", "language"):
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Invalid '{field}', must be a string")
+        row[field] = value
+    for field in TIMING_FIELDS:
+        value = record.get(field)
+        if value is not None and type(value) is not int:
+            raise ValueError(f"Invalid '{field}', must be an integer")
+        row[field] = value
+    return row
+
+
+class TaskImport:
+    """One import: splits an NDJSON body, fed in pieces of any size, into
+    chunks of task rows and keeps count of the progress. Invalid lines are
+    skipped, and the first few are reported with their line number."""
+
+    def __init__(self, chunk_size=TASK_IMPORT_CHUNK_SIZE, pruner=task_pruner):
+        self.chunk_size = chunk_size
+        self.pruner = pruner
+        self.lines = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.finished = None
+        self._pending = b""
+        self._rows = []
+        self._kept = []
+
+    def feed(self, data):
+        """Parse ``data`` and return the chunks of rows that are complete."""
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        return self._parse(lines)
+
+    def close(self):
+        """Parse the rest of the body and return the remaining chunks."""
+        chunks = self._parse([self._pending] if self._pending.strip() else [])
+        self._pending = b""
+        if self._rows:
+            chunks.append(self._rows)
+            self._rows = []
+        return chunks
+
+    def record(self, count):
+        self.imported += count
+
+    def retain(self, created_ats):
+        """Start from the ``created_at`` of the newest tasks the table keeps
+        already, as read by retained_task_times()."""
+        self._kept = [(created_at, False) for created_at in created_ats]
+
+    def admit(self, rows):
+        """Raise ImportRejected if the retention policy would prune any of
+        ``rows`` once imported. Checked before each chunk is inserted, so an
+        import stops before it commits tasks that would be deleted."""
+        pruner = self.pruner
+        retained = [
+            row["created_at"]
+            for row in rows
+            if not (pruner.keep_favorites and row["favorite"])
+        ]
+        if pruner.max_age and retained:
+            cutoff = utc_now().replace(tzinfo=None) - pruner.max_age
+            if min(retained) < cutoff:
+                raise ImportRejected(
+                    "Tasks older than TASK_RETENTION_MAX_AGE_DAYS would be "
+                    "deleted after the import; raise or disable the limit first."
+                )
+        if pruner.max_rows and retained:
+            # Ranked like the prune ranks them: newest first, and imported
+            # tasks get higher ids than the tasks in the table.
+            kept = sorted(
+                self._kept + [(created_at, True) for created_at in retained],
+                reverse=True,
+            )
+            if any(imported for _, imported in kept[pruner.max_rows :]):
+                raise ImportRejected(
+                    f"Only the newest {pruner.max_rows} tasks are kept, so "
+                    "TASK_RETENTION_MAX_ROWS would delete imported tasks after "
+                    "the import; raise or disable the limit first."
+                )
+            self._kept = kept[: pruner.max_rows]
+
+    def _parse(self, lines):
+        chunks = []
+        for line in lines:
+            self.lines += 1
+            if not line.strip():
+                continue
+            try:
+                self._rows.append(parse_task_record(line.decode()))
+            except ValueError as e:
+                self.skipped += 1
+                if len(self.errors) < MAX_IMPORT_ERRORS:
+                    self.errors.append({"line": self.lines, "error": str(e)})
+            if len(self._rows) >= self.chunk_size:
+                chunks.append(self._rows)
+                self._rows = []
+        return chunks
+
+    def summary(self):
+        duration = (self.finished or time.monotonic()) - self.started
+        return {
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+            "duration_seconds": round(duration, 3),
+            "tasks_per_second": round(self.imported / duration, 1)
+            if duration
+            else None,
+        }
+
+
+class ImportTracker:
+    """Running imports and the last finished one, for the metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = []
+        self._last = None
+        self._imported = 0
+
+    def start(self, task_import):
+        with self._lock:
+            self._running.append(task_import)
+
+    def finish(self, task_import):
+        task_import.finished = time.monotonic()
+        with self._lock:
+            self._running.remove(task_import)
+            self._last = task_import
+            self._imported += task_import.imported
+
+    def stats(self):
+        with self._lock:
+            running, last, imported = list(self._running), self._last, self._imported
+        return {
+            "running": [task_import.summary() for task_import in running],
+            "last": last.summary() if last else None,
+            "imported": imported,
+        }
+
+
+task_imports = ImportTracker()
+register_metrics("task_import", task_imports.stats)
+
+
+@with_db_session
+def insert_task_rows(db, rows):
+    return import_tasks_to_db(db, rows)
+
+
+@with_db_session
+def retained_task_times(db, pruner=task_pruner):
+    """``created_at`` of the tasks the row limit of ``pruner`` keeps now."""
+    if not pruner.max_rows:
+        return []
+    return get_retained_task_times_from_db(
+        db, pruner.max_rows, keep_favorites=pruner.keep_favorites
+    )
+
+
+class IndexRebuild:
+    """Rebuilds the in-memory task indexes on a background thread, so no
+    request waits for it. Only one rebuild runs at a time: a rebuild asked
+    for meanwhile runs once more after it, for the tasks imported since."""
+
+    def __init__(self, rebuild):
+        self._rebuild = rebuild
+        self._lock = threading.Lock()
+        self._running = False
+        self._again = False
+        self._runs = 0
+        self._errors = 0
+
+    def start(self):
+        """Start a rebuild unless one is running; return whether it started."""
+        with self._lock:
+            if self._running:
+                self._again = True
+                return False
+            self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                self._rebuild()
+            except Exception as e:
+                print(f"Rebuilding the task indexes failed: {e}")
+                with self._lock:
+                    self._errors += 1
+            with self._lock:
+                self._runs += 1
+                if not self._again:
+                    self._running = False
+                    return
+                self._again = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._running,
+                "runs": self._runs,
+                "errors": self._errors,
+            }
+
+
+def rebuild_task_indexes():
+    # Until the rebuild is done, lookups use the indexes without the import.
+    load_duplicate_index()
+    load_search_index()
+
+
+index_rebuild = IndexRebuild(rebuild_task_indexes)
+register_metrics("task_index_rebuild", index_rebuild.stats)
+
+
+def finish_task_import(task_import):
+    """Record the end of an import and rebuild the in-memory indexes in the
+    background, as imported tasks may be older than indexed ones."""
+    task_imports.finish(task_import)
+    if task_import.imported:
+        index_rebuild.start()
+        task_pruner.record_inserts(task_import.imported)
+
+
+def import_tasks(stream, task_import):
+    """Import the NDJSON tasks read from ``stream``. Every chunk is committed
+    on its own, so an interrupted import keeps the chunks before the error."""
+    task_imports.start(task_import)
+    try:
+        task_import.retain(retained_task_times(task_import.pruner))
+        for data in iter(lambda: stream.read(IMPORT_READ_SIZE), b""):
+            for rows in task_import.feed(data):
+                task_import.admit(rows)
+                task_import.record(insert_task_rows(rows))
+        for rows in task_import.close():
+            task_import.admit(rows)
+            task_import.record(insert_task_rows(rows))
+    finally:
+        finish_task_import(task_import)
+    return task_import.summary()
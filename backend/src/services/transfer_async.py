@@ -0,0 +1,37 @@
+"""Coroutine versions of the export and import in services.transfer for the
+ASGI app."""
+
+from db.async_db import import_tasks_in_session, run_in_session, stream_in_session
+from db.db import export_tasks_statement
+from services.transfer import (
+    TASK_EXPORT_BATCH_SIZE,
+    encode_tasks,
+    finish_task_import,
+    retained_task_times,
+    task_imports,
+)
+
+
+async def export_tasks(favorite=None, batch_size=TASK_EXPORT_BATCH_SIZE):
+    statement = export_tasks_statement(bool(favorite) if favorite is not None else None)
+    async for rows in stream_in_session(statement, batch_size):
+        yield encode_tasks(rows)
+
+
+async def import_tasks(chunks, task_import):
+    """Import the NDJSON tasks of the async iterable of byte ``chunks``."""
+    task_imports.start(task_import)
+    try:
+        task_import.retain(
+            await run_in_session(retained_task_times, task_import.pruner)
+        )
+        async for data in chunks:
+            for rows in task_import.feed(data):
+                task_import.admit(rows)
+                task_import.record(await import_tasks_in_session(rows))
+        for rows in task_import.close():
+            task_import.admit(rows)
+            task_import.record(await import_tasks_in_session(rows))
+    finally:
+        finish_task_import(task_import)
+    return task_import.summary()
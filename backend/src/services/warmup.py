@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+from services.metrics import register_metrics
+from services.model_pulls import ModelNotReady, model_pulls
+from services.ollama import OLLAMA_KEEP_ALIVE, ollama_client
+from services.tasks import ensure_model_exists
+
+OLLAMA_KEEP_WARM_INTERVAL = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "600"))
+WARMUP_PULL_TIMEOUT = float(os.getenv("WARMUP_PULL_TIMEOUT", "3600"))
+
+
+class ModelWarmer:
+    """Preloads models into Ollama's memory and keeps the active ones resident.
+
+    A model counts as a cold load if Ollama did not list it under /api/ps
+    right before the warm-up, so the recorded latencies show what a first
+    generation would have cost with and without the warm-up.
+    """
+
+    def __init__(
+        self,
+        client=ollama_client,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        keep_warm_interval=OLLAMA_KEEP_WARM_INTERVAL,
+    ):
+        self._client = client
+        self.keep_alive = keep_alive
+        self.keep_warm_interval = keep_warm_interval
+        self._lock = threading.Lock()
+        self._active = {}
+        self._warming = set()
+        self._loads = {}
+        self._keep_warm_thread = None
+
+    def warm_up(self, url, model):
+        """Load ``model`` (pulling it first if needed); return the load latency."""
+        try:
+            ensure_model_exists(url, model)
+        except ModelNotReady:
+            job = model_pulls.wait(url, model, timeout=WARMUP_PULL_TIMEOUT)
+            if not job or job["state"] != "success":
+                print(f"Skipping warm-up of {model}, model is not available")
+                return None
+
+        cold = model not in self._loaded_models(url)
+        started = time.monotonic()
+        response = self._client.post(
+            f"{url}/api/generate",
+            json={"model": model, "keep_alive": self.keep_alive},
+        )
+        response.raise_for_status()
+        latency = time.monotonic() - started
+        self._record(model, cold, latency)
+        return latency
+
+    def warm_up_async(self, url, model):
+        """Warm ``model`` up in the background and keep it resident."""
+        with self._lock:
+            self._active[url] = model
+            if self._keep_warm_thread is None and self.keep_warm_interval > 0:
+                self._keep_warm_thread = threading.Thread(
+                    target=self._keep_warm, daemon=True
+                )
+                self._keep_warm_thread.start()
+        return self._start_warm_up(url, model)
+
+    def _start_warm_up(self, url, model):
+        """Warm up on a thread of its own, unless ``model`` is warming already."""
+        key = (url, model)
+        with self._lock:
+            if key in self._warming:
+                return False
+            self._warming.add(key)
+        threading.Thread(target=self._warm_up_logged, args=key, daemon=True).start()
+        return True
+
+    def _warm_up_logged(self, url, model):
+        try:
+            self.warm_up(url, model)
+        except Exception as e:
+            print(f"Warm-up of {model} on {url} failed: {e}")
+        finally:
+            with self._lock:
+                self._warming.discard((url, model))
+
+    def _keep_warm(self):
+        while True:
+            time.sleep(self.keep_warm_interval)
+            self.refresh()
+
+    def refresh(self):
+        """Warm all active models up again, each on its own thread, so a slow
+        backend or a pull in progress does not hold up the others."""
+        with self._lock:
+            active = list(self._active.items())
+        for url, model in active:
+            self._start_warm_up(url, model)
+
+    def _loaded_models(self, url):
+        try:
+            response = self._client.get(f"{url}/api/ps")
+            response.raise_for_status()
+            return {m["name"] for m in response.json().get("models", [])}
+        except Exception:
+            return set()
+
+    def _record(self, model, cold, latency):
+        with self._lock:
+            loads = self._loads.setdefault(
+                model, {"cold": [0, 0.0, None], "warm": [0, 0.0, None]}
+            )
+            entry = loads["cold" if cold else "warm"]
+            entry[0] += 1
+            entry[1] += latency
+            entry[2] = latency
+
+    def stats(self):
+        with self._lock:
+            return {
+                "keep_alive": self.keep_alive,
+                "active_models": dict(self._active),
+                "loads": {
+                    model: {
+                        kind: {
+                            "count": count,
+                            "avg_seconds": total / count if count else None,
+                            "last_seconds": last,
+                        }
+                        for kind, (count, total, last) in loads.items()
+                    }
+                    for model, loads in self._loads.items()
+                },
+            }
+
+
+model_warmer = ModelWarmer()
+register_metrics("warmup", model_warmer.stats)
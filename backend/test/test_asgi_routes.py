@@ -0,0 +1,160 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from asgi import app
+from services.scheduler import SchedulerBusy
+from services.search import search_tasks
+from services.tasks import count_tasks, list_tasks_page, task_data_version
+
+
+@pytest.fixture
+def client():
+    # Without a ``with`` block the lifespan (database, background jobs) stays off.
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def task_pool():
+    with patch("routes.tasks_async.task_pool") as mock_pool:
+        mock_pool.take.return_value = None
+        yield mock_pool
+
+
+def _fake_session(results):
+    async def run_in_session(service, *args, **kwargs):
+        return results[service]
+
+    return run_in_session
+
+
+def test_create_task(client):
+    with patch(
+        "routes.tasks_async.generate_task", new=AsyncMock(return_value="mock task")
+    ) as mock_generate:
+        response = client.post("/tasks", json={"language": "german", "model": "m"})
+
+    assert response.status_code == 201
+    assert response.json() == {"task": "mock task"}
+    assert mock_generate.await_args.args[1:] == ("german", "m")
+
+
+def test_create_task_busy(client):
+    with patch(
+        "routes.tasks_async.scheduler.acquire",
+        new=AsyncMock(side_effect=SchedulerBusy("m", 7, 429)),
+    ):
+        response = client.post("/tasks", json={"model": "m"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_create_task_batch_rejects_invalid_count(client):
+    response = client.post("/tasks/batch", json={"count": 0})
+    assert response.status_code == 400
+
+
+def test_get_tasks_page_is_conditional(client):
+    page = {
+        "items": [
+            {
+                "id": 1,
+                "task_text": "Nap",
+                "created_at": datetime(2025, 1, 1),
+                "favorite": 0,
+            }
+        ],
+        "total": 1,
+        "page": {"skip": 0, "limit": 1, "after": None},
+        "next_cursor": "2025-01-01T00:00:00,1",
+    }
+    results = {
+        task_data_version: (7, datetime(2025, 1, 2)),
+        list_tasks_page: page,
+        count_tasks: 1,
+    }
+    with patch("routes.tasks_async.run_in_session", new=_fake_session(results)):
+        response = client.get("/tasks?limit=1&include_total=1")
+        cached = client.get("/tasks?limit=1", headers={"If-None-Match": '"tasks-7"'})
+        count = client.get("/tasks/count")
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["created_at"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert response.headers["ETag"] == '"tasks-7"'
+    assert response.headers["Last-Modified"] == "Thu, 02 Jan 2025 00:00:00 GMT"
+    assert response.headers["X-Next-Cursor"] == "2025-01-01T00:00:00,1"
+    assert cached.status_code == 304
+    assert count.json() == {"count": 1}
+
+
+def test_create_task_stream_primes_the_pool_after_a_miss(client, task_pool):
+    async def stream_task(url, language, model):
+        yield {"token": "Nap"}
+        yield {"task": "Nap"}
+
+    with (
+        patch("routes.tasks_async.ensure_model_exists", new=AsyncMock()),
+        patch("routes.tasks_async.stream_task", new=stream_task),
+    ):
+        response = client.post("/tasks/stream", json={"model": "fake-model"})
+
+    assert response.text == 'data: {"token": "Nap"}\n\ndata: {"task": "Nap"}\n\n'
+    task_pool.ensure_filled.assert_called_once_with("english", "fake-model")
+
+
+def test_get_tasks_rejects_invalid_cursor(client):
+    assert client.get("/tasks?after=nope").status_code == 400
+
+
+def test_search_tasks(client):
+    results = {
+        task_data_version: (7, datetime(2025, 1, 2)),
+        search_tasks: [{"id": 3, "task_text": "Nap", "rank": 0.5}],
+    }
+    with patch("routes.tasks_async.run_in_session", new=_fake_session(results)):
+        response = client.get("/tasks/search?q=nap&limit=1")
+
+    assert response.json() == [{"id": 3, "rank": 0.5, "task_text": "Nap"}]
+    assert response.headers["X-Next-Cursor"] == "0.5,3"
+    assert client.get("/tasks/search?q=%20").status_code == 400
+
+
+def test_update_likes_validates_changes(client):
+    response = client.post("/tasks/likes", json={"likes": [{"id": 1, "like": 2}]})
+    assert response.status_code == 400
+
+
+def test_get_settings_is_conditional(client):
+    with patch(
+        "routes.settings_async.settings_cache.cached",
+        return_value=({"MODEL": "m"}, "abc"),
+    ):
+        response = client.get("/settings")
+        cached = client.get("/settings", headers={"If-None-Match": '"abc"'})
+
+    assert response.json() == {"MODEL": "m"}
+    assert response.headers["ETag"] == '"abc"'
+    assert cached.status_code == 304
+
+
+def test_import_tasks(client):
+    async def import_tasks_in_session(rows):
+        return len(rows)
+
+    with (
+        patch(
+            "services.transfer_async.import_tasks_in_session",
+            new=import_tasks_in_session,
+        ),
+        patch("services.transfer_async.run_in_session", new=AsyncMock(return_value=[])),
+        patch("services.transfer_async.finish_task_import"),
+    ):
+        response = client.post(
+            "/tasks/import", content=b'{"task_text":"Nap"}\n{"task_text":"Hum"}'
+        )
+
+    assert response.status_code == 200
+    assert (response.json()["imported"], response.json()["skipped"]) == (2, 0)
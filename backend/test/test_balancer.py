@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services.balancer import NoBackendAvailable, OllamaBalancer
+from services.model_cache import model_cache
+from services.ollama import OllamaClient
+
+
+class _OllamaStub:
+    """Stand-in for one Ollama instance that answers /api/ps and /api/tags."""
+
+    def __init__(self, loaded=(), delay=0.0):
+        self.loaded = list(loaded)
+        self.delay = delay
+        self.healthy = True
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(stub.delay)
+                names = stub.loaded if self.path == "/api/ps" else ["m", "other"]
+                body = json.dumps({"models": [{"name": n} for n in names]}).encode()
+                self.send_response(200 if stub.healthy else 500)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(**kwargs):
+        stub = _OllamaStub(**kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def _balancer(*stubs, **kwargs):
+    return OllamaBalancer(
+        [stub.url for stub in stubs], client=OllamaClient(max_retries=0), **kwargs
+    )
+
+
+def test_prefers_backend_with_model_loaded(stubs):
+    cold, warm = stubs(), stubs(loaded=["m"])
+    balancer = _balancer(cold, warm)
+    balancer.probe()
+
+    lease = balancer.acquire("m")
+    assert lease.url == warm.url
+    lease.done()
+
+
+def test_prefers_lowest_latency(stubs):
+    slow, fast = stubs(loaded=["m"], delay=0.05), stubs(loaded=["m"])
+    balancer = _balancer(slow, fast)
+    balancer.probe()
+
+    with balancer.backend("m") as url:
+        assert url == fast.url
+
+
+def test_in_flight_limit_spreads_and_rejects(stubs):
+    first, second = stubs(loaded=["m"]), stubs()
+    balancer = _balancer(first, second, max_in_flight=1)
+    balancer.probe()
+
+    leases = [balancer.acquire("m"), balancer.acquire("m")]
+    assert {lease.url for lease in leases} == {first.url, second.url}
+    with pytest.raises(NoBackendAvailable):
+        balancer.acquire("m")
+
+    leases[0].done()
+    leases[0].done()
+    assert balancer.stats()["backends"][leases[0].url]["in_flight"] == 0
+
+
+def test_failing_backend_is_ejected_and_reprobed(stubs):
+    flaky, steady = stubs(loaded=["m"]), stubs()
+    balancer = _balancer(flaky, steady, eject_after_failures=2, eject_seconds=60)
+    balancer.probe()
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            with balancer.backend("m") as url:
+                assert url == flaky.url
+                raise requests.exceptions.ConnectionError()
+    assert not balancer.stats()["backends"][flaky.url]["healthy"]
+    assert balancer.acquire("m").url == steady.url
+
+    flaky.healthy = False
+    balancer.probe()
+    assert not balancer.stats()["backends"][flaky.url]["healthy"]
+
+    flaky.healthy = True
+    balancer.probe()
+    assert balancer.stats()["backends"][flaky.url]["healthy"]
+    assert balancer.acquire("m").url == flaky.url
+
+
+def test_all_backends_ejected(stubs):
+    stub = stubs()
+    stub.healthy = False
+    balancer = _balancer(stub, eject_after_failures=1, eject_seconds=30)
+    balancer.probe()
+
+    with pytest.raises(NoBackendAvailable) as exc:
+        balancer.acquire("m")
+    assert 1 <= exc.value.retry_after <= 31
+
+
+def test_routing_does_not_count_as_model_cache_lookups(stubs):
+    first, second = stubs(), stubs()
+    balancer = _balancer(first, second)
+    balancer.probe()
+    before = model_cache.stats()
+
+    balancer.acquire("m").done()
+
+    after = model_cache.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
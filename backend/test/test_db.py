@@ -1,16 +1,28 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 
 from db.db import (
     Base,
     add_task_to_db,
+    add_tasks_to_db,
     like_task_in_db,
+    like_tasks_in_db,
     get_tasks_from_db,
     count_tasks_in_db,
     delete_tasks_in_db,
     save_app_settings_to_db,
     get_app_settings_from_db,
+    get_task_texts_from_db,
+    get_generation_stats_from_db,
+    add_missing_columns,
+    prune_tasks_in_db,
+    repair_task_counters_in_db,
+    get_task_data_version_from_db,
+    utc_now,
+    Task,
 )
 
 # -----------------------
@@ -43,14 +55,40 @@ def test_add_and_count_tasks(in_memory_db):
     assert count_tasks_in_db(in_memory_db) == 2
 
 
+def test_add_tasks_in_bulk(in_memory_db):
+    task_ids = add_tasks_to_db(in_memory_db, ["Bulk 1", "Bulk 2", "Bulk 3"])
+    assert len(task_ids) == 3
+    assert count_tasks_in_db(in_memory_db) == 3
+    assert add_tasks_to_db(in_memory_db, []) == []
+    assert [text for _, text in get_task_texts_from_db(in_memory_db, 2)] == [
+        "Bulk 2",
+        "Bulk 3",
+    ]
+
+
 def test_like_task(in_memory_db):
     add_task_to_db(in_memory_db, "Like me!")
     task = get_tasks_from_db(in_memory_db)[0]
-    updated = like_task_in_db(in_memory_db, task.id, like=0)
-    assert updated.favorite == 0
+    assert like_task_in_db(in_memory_db, task.id, like=0) is False
+    assert get_tasks_from_db(in_memory_db)[0].favorite == 0
+
+    assert like_task_in_db(in_memory_db, task.id, like=1) is True
+    assert get_tasks_from_db(in_memory_db)[0].favorite == 1
+    assert like_task_in_db(in_memory_db, 9999, like=1) is False
+
+
+def test_like_tasks_in_bulk(in_memory_db):
+    task_ids = add_tasks_to_db(in_memory_db, ["A", "B", "C"])
+    like_task_in_db(in_memory_db, task_ids[2], like=1)
 
-    updated = like_task_in_db(in_memory_db, task.id, like=1)
-    assert updated.favorite == 1
+    changed = like_tasks_in_db(
+        in_memory_db, {task_ids[0]: 1, task_ids[1]: 0, task_ids[2]: 0}
+    )
+
+    assert sorted(changed) == [task_ids[0], task_ids[2]]
+    favorites = get_tasks_from_db(in_memory_db, favorite=True)
+    assert [t.id for t in favorites] == [task_ids[0]]
+    assert count_tasks_in_db(in_memory_db, favorite=True) == 1
 
 
 def test_get_tasks_filter_favorites(in_memory_db):
@@ -84,3 +122,130 @@ def test_app_settings_crud(in_memory_db):
     save_app_settings_to_db(in_memory_db, new_settings)
     fetched = get_app_settings_from_db(in_memory_db)
     assert fetched.settings["theme"] == "light"
+
+
+def test_generation_stats_skip_tasks_without_timings(in_memory_db):
+    add_task_to_db(in_memory_db, "Timed", model="m", total_duration=5_000_000)
+    add_task_to_db(in_memory_db, "Untimed", model="m")
+
+    rows = get_generation_stats_from_db(in_memory_db, utc_now() - timedelta(hours=1))
+    assert [(row.model, row.total_duration) for row in rows] == [("m", 5_000_000)]
+    assert get_generation_stats_from_db(in_memory_db, utc_now()) == []
+
+
+def test_add_missing_columns_upgrades_old_tasks_table():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE tasks (id INTEGER PRIMARY KEY, task_text VARCHAR NOT NULL,"
+                " favorite INTEGER, created_at DATETIME)"
+            )
+        )
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("tasks")}
+    assert {"model", "language", "total_duration", "eval_count"} <= columns
+
+
+def test_keyset_pages_match_offset_pages(in_memory_db):
+    add_tasks_to_db(in_memory_db, [f"Task {i}" for i in range(7)])
+
+    by_offset = [t.id for t in get_tasks_from_db(in_memory_db, limit=7)]
+    by_keyset = []
+    after = None
+    while True:
+        page = get_tasks_from_db(in_memory_db, limit=3, after=after)
+        if not page:
+            break
+        by_keyset += [t.id for t in page]
+        after = (page[-1].created_at, page[-1].id)
+
+    assert by_keyset == by_offset
+
+
+def test_task_listing_indexes_exist(in_memory_db):
+    indexes = {
+        index["name"]: index["column_names"]
+        for index in inspect(in_memory_db.get_bind()).get_indexes("tasks")
+    }
+    assert indexes["ix_tasks_favorite_created_at_id"] == [
+        "favorite",
+        "created_at",
+        "id",
+    ]
+
+
+def test_prune_keeps_newest_rows_and_favorites(in_memory_db):
+    task_ids = add_tasks_to_db(in_memory_db, [f"Task {i}" for i in range(6)])
+    like_task_in_db(in_memory_db, task_ids[0], like=1)
+
+    assert sorted(prune_tasks_in_db(in_memory_db, max_rows=2)) == task_ids[1:4]
+    remaining = {t.id for t in get_tasks_from_db(in_memory_db, limit=10)}
+    assert remaining == {task_ids[0], task_ids[4], task_ids[5]}
+
+
+def test_prune_by_age(in_memory_db):
+    old_id = add_task_to_db(in_memory_db, "Old")
+    add_task_to_db(in_memory_db, "New")
+    in_memory_db.query(Task).filter(Task.id == old_id).update(
+        {Task.created_at: utc_now() - timedelta(days=10)}
+    )
+    in_memory_db.commit()
+
+    assert prune_tasks_in_db(in_memory_db, max_age=timedelta(days=7)) == [old_id]
+    assert [t.task_text for t in get_tasks_from_db(in_memory_db)] == ["New"]
+    assert prune_tasks_in_db(in_memory_db, max_rows=0) == []
+
+
+def test_counters_follow_every_write(in_memory_db):
+    task_ids = add_tasks_to_db(in_memory_db, [f"Task {i}" for i in range(4)])
+    add_task_to_db(in_memory_db, "Single")
+    like_task_in_db(in_memory_db, task_ids[0], like=1)
+    like_task_in_db(in_memory_db, task_ids[0], like=1)
+    like_task_in_db(in_memory_db, task_ids[1], like=1)
+    like_task_in_db(in_memory_db, task_ids[1], like=0)
+    prune_tasks_in_db(in_memory_db, max_rows=2)
+
+    assert count_tasks_in_db(in_memory_db) == 3
+    assert count_tasks_in_db(in_memory_db, favorite=True) == 1
+    assert count_tasks_in_db(in_memory_db, favorite=False) == 2
+    assert repair_task_counters_in_db(in_memory_db) == {"total": 0, "favorites": 0}
+
+    delete_tasks_in_db(in_memory_db, keep_favorites=False)
+    assert count_tasks_in_db(in_memory_db) == 0
+    assert count_tasks_in_db(in_memory_db, favorite=True) == 0
+
+
+def test_repair_fixes_counter_drift(in_memory_db):
+    add_tasks_to_db(in_memory_db, ["A", "B"])
+    in_memory_db.query(Task).delete()
+    in_memory_db.commit()
+
+    assert count_tasks_in_db(in_memory_db) == 2
+    assert repair_task_counters_in_db(in_memory_db) == {"total": -2, "favorites": 0}
+    assert count_tasks_in_db(in_memory_db) == 0
+
+
+def test_data_version_grows_with_every_change(in_memory_db):
+    task_id = add_task_to_db(in_memory_db, "A")
+    versions = [get_task_data_version_from_db(in_memory_db)[0]]
+
+    like_task_in_db(in_memory_db, task_id, like=1)
+    versions.append(get_task_data_version_from_db(in_memory_db)[0])
+    like_task_in_db(in_memory_db, task_id, like=1)
+    versions.append(get_task_data_version_from_db(in_memory_db)[0])
+    delete_tasks_in_db(in_memory_db)
+    versions.append(get_task_data_version_from_db(in_memory_db)[0])
+
+    assert versions[0] < versions[1] == versions[2] < versions[3]
+    assert get_task_data_version_from_db(in_memory_db)[1] is not None
+
+
+def test_aware_datetimes_are_bound_as_utc_without_offset():
+    column_type = Task.__table__.c.created_at.type
+    local = datetime(2026, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=2)))
+
+    assert column_type.process_bind_param(local, None) == datetime(2026, 1, 1, 8, 0)
+    assert column_type.process_bind_param(None, None) is None
@@ -0,0 +1,153 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import db.db
+from db.db import (
+    connect_backoff,
+    create_db_engine_with_retries,
+    db_init_stats,
+    db_ready,
+    engine_options,
+    init_db,
+)
+from db.pool import MeteredQueuePool, PoolMetrics, pool_metrics
+
+
+def test_engine_options_for_postgres():
+    with patch("db.db.DB_STATEMENT_TIMEOUT_MS", 5000):
+        options = engine_options("postgresql://user:pw@db:5432/tasks")
+
+    assert options["echo"] is False
+    assert options["pool_pre_ping"] is True
+    assert options["poolclass"] is MeteredQueuePool
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+
+def test_engine_options_for_in_memory_sqlite():
+    assert set(engine_options("sqlite:///:memory:")) == {"echo", "pool_pre_ping"}
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+    timeouts_before = pool_metrics.stats()["timeouts"]
+
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    with engine.connect():
+        pass
+
+    stats = metrics.stats()
+    assert stats["checkouts"] == 2
+    assert stats["connects"] == 1
+    assert stats["checked_out"] == 0
+    assert pool_metrics.stats()["timeouts"] == timeouts_before + 1
+    assert pool_metrics.stats()["checkout_wait_ms"]["max"] >= 50
+    engine.dispose()
+
+
+def test_pool_metrics_record_connection_hold_time(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=MeteredQueuePool)
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+
+    assert metrics.stats()["hold_ms"]["max"] is None
+    with engine.connect():
+        time.sleep(0.02)
+
+    assert metrics.stats()["hold_ms"]["max"] >= 20
+    engine.dispose()
+
+
+def test_connect_backoff_grows_and_is_capped():
+    with patch("db.db.random.uniform", side_effect=lambda low, high: high):
+        delays = [connect_backoff(attempt, base=0.25, cap=5) for attempt in range(8)]
+
+    assert delays == [0.25, 0.5, 1.0, 2.0, 4.0, 5, 5, 5]
+
+
+def test_connect_backoff_jitters_below_the_cap():
+    delays = [connect_backoff(5000, base=0.25, cap=2) for _ in range(200)]
+
+    assert all(0 <= delay <= 2 for delay in delays)
+    # Capped attempts still spread out instead of all waiting exactly 2 s.
+    assert min(delays) < 1 < max(delays)
+
+
+def test_engine_retries_until_the_database_accepts_connections():
+    engine = MagicMock()
+    refused = OperationalError("connect", {}, Exception("refused"))
+    engine.connect.side_effect = [refused, refused, MagicMock()]
+
+    with (
+        patch("db.db.create_engine", return_value=engine),
+        patch("db.db.pool_metrics"),
+        patch("db.db.connect_backoff", side_effect=[0.1, 0.2]),
+        patch("db.db.time.sleep") as mock_sleep,
+    ):
+        assert create_db_engine_with_retries("sqlite:///x.db") == (engine, 3)
+
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.1, 0.2]
+
+
+def test_engine_gives_up_at_the_deadline():
+    engine = MagicMock()
+    engine.connect.side_effect = OperationalError("connect", {}, Exception("refused"))
+
+    with (
+        patch("db.db.create_engine", return_value=engine),
+        patch("db.db.pool_metrics"),
+        patch("db.db.time.sleep") as mock_sleep,
+        pytest.raises(RuntimeError),
+    ):
+        create_db_engine_with_retries("sqlite:///x.db", timeout=0)
+
+    mock_sleep.assert_not_called()
+    engine.dispose.assert_called_once()
+
+
+@pytest.fixture
+def uninitialized_db(tmp_path):
+    with (
+        patch("db.db.DATABASE_URL", f"sqlite:///{tmp_path}/init.db"),
+        patch("db.db._engine", None),
+        patch("db.db._Session", None),
+    ):
+        yield
+
+
+def test_init_db_runs_once_for_concurrent_callers(uninitialized_db):
+    calls = []
+    connect = create_db_engine_with_retries
+
+    def slow_connect(url):
+        calls.append(url)
+        time.sleep(0.05)
+        return connect(url)
+
+    with patch("db.db.create_db_engine_with_retries", side_effect=slow_connect):
+        assert not db_ready()
+        threads = [threading.Thread(target=init_db) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(calls) == 1
+    assert db_ready()
+    assert db_init_stats()["connect_attempts"] == 1
+    db.db._engine.dispose()
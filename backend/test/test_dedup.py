@@ -0,0 +1,35 @@
+from services.dedup import DuplicateIndex, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("  Écris un POÈME, vite!! ") == "ecris un poeme vite"
+
+
+def test_exact_and_near_duplicates_are_found():
+    index = DuplicateIndex(threshold=0.6, capacity=0)
+    index.build(
+        [
+            (1, "Organize your pens by color and size"),
+            (2, "Write a poem about the dust bunnies under your bed"),
+        ]
+    )
+
+    assert index.find_duplicate("organize your pens by color and size!") == 1
+    assert index.find_duplicate("Organize your pens by size and color") == 1
+    assert index.find_duplicate("Write a poem about dust bunnies under the bed") == 2
+    assert index.find_duplicate("Watch baby animal videos on Youtube") is None
+    assert index.stats()["duplicates"] == 3
+
+
+def test_remove_and_capacity_eviction():
+    index = DuplicateIndex(threshold=0.6, capacity=2)
+    index.add(1, "Count the tiles in the bathroom")
+    index.add(2, "Sort your socks by length")
+    index.add(3, "Hum the national anthem backwards")
+
+    assert len(index) == 2
+    assert index.find_duplicate("Count the tiles in the bathroom") is None
+
+    index.remove(2)
+    assert index.find_duplicate("Sort your socks by length") is None
+    assert index.find_duplicate("Hum the national anthem backwards") == 3
@@ -0,0 +1,49 @@
+import runpy
+from pathlib import Path
+
+from gunicorn.config import Config
+
+CONF = Path(__file__).resolve().parents[1] / "gunicorn.conf.py"
+
+
+def _load(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    settings = {
+        name: value
+        for name, value in runpy.run_path(str(CONF)).items()
+        if not name.startswith("_") and name != "os"
+    }
+    config = Config()
+    for name, value in settings.items():
+        config.set(name, value)
+    return config
+
+
+def test_defaults_use_threads_and_recycle_workers(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    config = _load(monkeypatch)
+
+    assert config.worker_class_str == "gthread"
+    assert config.workers == 1
+    assert config.threads == 32
+    assert config.max_requests == 10000
+    assert config.graceful_timeout == 120
+    assert config.bind == ["0.0.0.0:5001"]
+    assert config.accesslog is None
+
+
+def test_environment_overrides(monkeypatch):
+    config = _load(
+        monkeypatch,
+        WEB_CONCURRENCY="4",
+        GUNICORN_THREADS="8",
+        GUNICORN_MAX_REQUESTS="0",
+        GUNICORN_GRACEFUL_TIMEOUT="30",
+        GUNICORN_ACCESS_LOG="true",
+    )
+
+    assert (config.workers, config.threads) == (4, 8)
+    assert config.max_requests == 0
+    assert config.graceful_timeout == 30
+    assert config.accesslog == "-"
@@ -0,0 +1,143 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from flask import Flask
+from starlette.testclient import TestClient
+
+from asgi import app as asgi_app
+from routes.health import health_bp
+from services.health import Readiness, _loaded_models
+
+URLS = ["http://ollama-a", "http://ollama-b"]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(health_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def dependencies():
+    """Database up, ollama-a up with model "m" loaded, ollama-b down."""
+
+    def loaded_models(url):
+        if url == "http://ollama-b":
+            raise ConnectionError("refused")
+        return {"m:latest"}
+
+    with (
+        patch("services.health.db_ready", return_value=True) as db_ready,
+        patch("services.health.ping_database") as ping,
+        patch("services.health._loaded_models", side_effect=loaded_models) as loaded,
+        patch("services.health.settings_cache") as settings,
+    ):
+        settings.get.return_value = ({"MODEL": "m:latest"}, "etag")
+        yield {
+            "db_ready": db_ready,
+            "ping": ping,
+            "loaded_models": loaded,
+            "settings": settings,
+        }
+
+
+def test_ready_with_database_and_model_on_one_backend(dependencies):
+    ready, report = Readiness(urls=URLS).check()
+
+    assert ready
+    assert report["database"]["ok"]
+    assert report["database"]["latency_ms"] >= 0
+    assert report["ollama"]["ok"]
+    backend_b = report["ollama"]["backends"]["http://ollama-b"]
+    assert (backend_b["ok"], backend_b["error"]) == (False, "refused")
+    assert report["model"] == {"name": "m:latest", "ok": True}
+
+
+def test_not_ready_while_the_database_is_initializing(dependencies):
+    dependencies["db_ready"].return_value = False
+
+    ready, report = Readiness(urls=URLS).check()
+
+    assert not ready
+    assert report["database"] == {"ok": False, "error": "Not initialized yet"}
+    dependencies["ping"].assert_not_called()
+    dependencies["settings"].get.assert_not_called()
+
+
+def test_not_ready_until_the_saved_model_is_loaded(dependencies):
+    dependencies["settings"].get.return_value = ({"MODEL": "other"}, "etag")
+
+    ready, report = Readiness(urls=URLS).check()
+
+    assert not ready
+    assert report["model"] == {"name": "other", "ok": False}
+
+
+@pytest.mark.parametrize("saved", ["llama4", "llama4:latest"])
+def test_untagged_model_names_match_the_latest_tag(dependencies, saved):
+    dependencies["settings"].get.return_value = ({"MODEL": saved}, "etag")
+    with patch(
+        "services.health.ollama_client.request",
+        return_value=Mock(json=Mock(return_value={"models": [{"name": "llama4"}]})),
+    ):
+        loaded = _loaded_models("http://ollama-a")
+    dependencies["loaded_models"].side_effect = lambda url: loaded
+
+    ready, report = Readiness(urls=URLS[:1]).check()
+
+    assert loaded == {"llama4:latest"}
+    assert ready
+    assert report["model"] == {"name": saved, "ok": True}
+
+
+def test_ready_without_a_saved_model(dependencies):
+    dependencies["settings"].get.return_value = ({}, "etag")
+
+    assert Readiness(urls=URLS).check()[0]
+
+
+def test_time_to_ready_is_taken_at_the_first_ready_check(dependencies):
+    now = [10.0]
+    readiness = Readiness(urls=URLS, started=0.0, clock=lambda: now[0])
+    dependencies["db_ready"].return_value = False
+    readiness.check()
+    dependencies["db_ready"].return_value = True
+    now[0] = 12.5
+    readiness.check()
+    now[0] = 20.0
+    readiness.check()
+
+    stats = readiness.stats()
+    assert stats["time_to_ready_seconds"] == 12.5
+    assert stats["readiness_checks"] == 3
+    assert stats["uptime_seconds"] == 20.0
+
+
+def test_liveness(client):
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ok"
+
+
+@pytest.mark.parametrize("ready, status_code", [(True, 200), (False, 503)])
+def test_readiness_status_code(client, ready, status_code):
+    report = {"status": "ready" if ready else "not ready"}
+    with patch("routes.health.readiness.check", return_value=(ready, report)):
+        response = client.get("/readyz")
+
+    assert response.status_code == status_code
+    assert response.get_json() == report
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_asgi_probes():
+    # Without a ``with`` block the lifespan (database, background jobs) stays off.
+    client = TestClient(asgi_app)
+    with patch("asgi.readiness.check", return_value=(False, {"status": "not ready"})):
+        ready = client.get("/readyz")
+
+    assert client.get("/healthz").status_code == 200
+    assert ready.status_code == 503
+    assert ready.json() == {"status": "not ready"}
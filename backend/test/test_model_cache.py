@@ -0,0 +1,48 @@
+from services.model_cache import ModelCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_available_until_ttl_expires():
+    clock = FakeClock()
+    cache = ModelCache(ttl=10, clock=clock)
+    assert cache.is_available("http://a", "m") is False
+
+    cache.mark_available("http://a", "m")
+    clock.now = 9
+    assert cache.is_available("http://a", "m") is True
+    clock.now = 11
+    assert cache.is_available("http://a", "m") is False
+
+
+def test_invalidate_single_model_and_everything():
+    cache = ModelCache(ttl=10, clock=FakeClock())
+    cache.mark_available("http://a", "m1", "m2")
+    cache.mark_available("http://b", "m1")
+
+    cache.invalidate("http://a", "m1")
+    assert cache.is_available("http://a", "m1") is False
+    assert cache.is_available("http://a", "m2") is True
+    assert cache.is_available("http://b", "m1") is True
+
+    cache.invalidate()
+    assert cache.is_available("http://b", "m1") is False
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_peek_is_not_counted_and_keeps_expired_entries():
+    clock = FakeClock()
+    cache = ModelCache(ttl=10, clock=clock)
+    cache.mark_available("http://a", "m")
+    assert cache.peek("http://a", "m") is True
+    clock.now = 11
+    assert cache.peek("http://a", "m") is False
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 1)
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+
+from services.model_cache import model_cache
+from services.model_pulls import ModelPullManager
+
+
+def _client_streaming(lines):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = lines
+    client = MagicMock()
+    client.post.return_value = response
+    return client
+
+
+def test_pull_reports_progress_and_marks_model_available():
+    client = _client_streaming(
+        [
+            b'{"status": "pulling manifest"}',
+            b'{"status": "downloading", "total": 200, "completed": 50}',
+            b'{"status": "success"}',
+        ]
+    )
+    pulls = ModelPullManager(client=client)
+    pulls.start("http://ollama-test", "new-model")
+    job = pulls.wait("http://ollama-test", "new-model", timeout=2)
+
+    assert job["state"] == "success"
+    assert job["percent"] == 25.0
+    assert model_cache.is_available("http://ollama-test", "new-model")
+    model_cache.invalidate()
+
+
+def test_pull_error_is_reported():
+    client = _client_streaming(
+        [b'{"error": "pull model manifest: file does not exist"}']
+    )
+    pulls = ModelPullManager(client=client)
+    pulls.start("http://ollama-test", "missing-model")
+    job = pulls.wait("http://ollama-test", "missing-model", timeout=2)
+
+    assert job["state"] == "error"
+    assert "does not exist" in job["error"]
+    assert list(pulls.follow("http://ollama-test", "missing-model"))[-1] == job
+
+
+def test_running_pull_is_single_flight():
+    client = MagicMock()
+    client.post.return_value.__enter__.side_effect = lambda: (_ for _ in ()).throw(
+        AssertionError("not reached")
+    )
+    pulls = ModelPullManager(client=client)
+    pulls._jobs[("http://ollama-test", "m:latest")] = {"state": "pulling", "version": 0}
+
+    # Untagged names share the job of the default tag.
+    assert pulls.start("http://ollama-test", "m")["state"] == "pulling"
+    assert pulls.is_pulling("http://ollama-test", "m:latest")
+    client.post.assert_not_called()
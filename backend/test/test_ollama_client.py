@@ -0,0 +1,69 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from services.ollama import OllamaClient
+
+
+class _TagsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"models": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_stub():
+    server = HTTPServer(("127.0.0.1", 0), _TagsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused(ollama_stub):
+    client = OllamaClient()
+    for _ in range(3):
+        client.get(f"{ollama_stub}/api/tags").raise_for_status()
+
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 2
+
+
+def test_idempotent_requests_are_retried_on_timeout():
+    client = OllamaClient(max_retries=2, retry_backoff=0)
+    with patch.object(
+        client._session, "request", side_effect=requests.exceptions.ReadTimeout
+    ) as mock_request:
+        with pytest.raises(requests.exceptions.Timeout):
+            client.get("http://ollama-test/api/tags")
+
+    assert mock_request.call_count == 3
+    assert mock_request.call_args.kwargs["timeout"] == client.timeout
+    assert client.stats()["timeouts"] == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_generation_is_not_retried():
+    client = OllamaClient(max_retries=2, retry_backoff=0)
+    with patch.object(
+        client._session, "request", side_effect=requests.exceptions.ConnectionError
+    ) as mock_request:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post("http://ollama-test/api/generate", json={})
+
+    assert mock_request.call_count == 1
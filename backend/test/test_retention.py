@@ -0,0 +1,62 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from services.dedup import DuplicateIndex
+from services.retention import TaskPruner
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_prunes_once_per_batch_of_inserts():
+    prune = MagicMock(return_value=4)
+    pruner = TaskPruner(prune=prune, max_rows=10, prune_every=3)
+
+    assert not pruner.record_inserts()
+    assert not pruner.record_inserts()
+    assert pruner.record_inserts()
+    assert _wait_for(lambda: pruner.stats()["runs"] == 1)
+
+    prune.assert_called_once_with(max_rows=10, max_age=None, keep_favorites=True)
+    stats = pruner.stats()
+    assert stats["deleted"] == 4
+    assert stats["pending_inserts"] == 0
+
+
+def test_disabled_policy_never_prunes():
+    prune = MagicMock()
+    pruner = TaskPruner(prune=prune, max_rows=0, max_age_days=0, prune_every=1)
+
+    assert not pruner.record_inserts(5)
+    pruner.start(interval=0)
+    prune.assert_not_called()
+
+
+def test_failed_prune_is_counted_and_retried_later():
+    prune = MagicMock(side_effect=[Exception("db down"), 1])
+    pruner = TaskPruner(prune=prune, max_rows=10, prune_every=1)
+
+    pruner.record_inserts()
+    assert _wait_for(lambda: pruner.stats()["errors"] == 1)
+    assert _wait_for(lambda: pruner.record_inserts())
+    assert _wait_for(lambda: pruner.stats()["runs"] == 1)
+
+
+def test_pruned_tasks_leave_the_duplicate_index():
+    index = DuplicateIndex()
+    index.build([(1, "Fold socks"), (2, "Water the plants")])
+    db = MagicMock()
+    with (
+        patch("db.db.get_db", side_effect=lambda: iter([db])),
+        patch("services.retention.duplicate_index", index),
+        patch("services.retention.prune_tasks_in_db", return_value=[1]) as prune,
+    ):
+        assert TaskPruner(max_rows=1).prune() == 1
+
+    prune.assert_called_once_with(db, max_rows=1, max_age=None, keep_favorites=True)
+    assert index.find_duplicate("Fold socks") is None
+    assert index.find_duplicate("Water the plants") == 2
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.scheduler import (
+    AsyncGenerationScheduler,
+    GenerationScheduler,
+    SchedulerBusy,
+    parse_model_limits,
+)
+
+
+def test_parse_model_limits():
+    assert parse_model_limits("llama3:70b=1, smollm2:1.7b=4,") == {
+        "llama3:70b": 1,
+        "smollm2:1.7b": 4,
+    }
+
+
+def test_models_do_not_block_each_other():
+    scheduler = GenerationScheduler(default_limit=1, limits={}, queue_size=0)
+    scheduler.acquire("slow")
+    scheduler.acquire("fast")
+    assert scheduler.stats()["models"]["fast"]["running"] == 1
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    scheduler = GenerationScheduler(default_limit=1, limits={}, queue_size=0)
+    scheduler.acquire("m")
+    with pytest.raises(SchedulerBusy) as excinfo:
+        scheduler.acquire("m")
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after >= 1
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_queue_wait_times_out():
+    scheduler = GenerationScheduler(
+        default_limit=1, limits={}, queue_size=1, queue_timeout=0.05
+    )
+    scheduler.acquire("m")
+    with pytest.raises(SchedulerBusy) as excinfo:
+        scheduler.acquire("m")
+    assert excinfo.value.status_code == 503
+    assert scheduler.stats()["models"]["m"]["queued"] == 0
+
+
+def test_waiters_are_served_in_fifo_order():
+    scheduler = GenerationScheduler(default_limit=1, limits={}, queue_size=5)
+    order = []
+    scheduler.acquire("m")
+
+    def worker(name):
+        with scheduler.slot("m"):
+            order.append(name)
+
+    threads = []
+    for name in ("first", "second", "third"):
+        thread = threading.Thread(target=worker, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while scheduler.stats()["models"]["m"]["queued"] < len(threads):
+            time.sleep(0.001)
+
+    scheduler.release("m")
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert order == ["first", "second", "third"]
+    assert scheduler.stats()["queue_wait_seconds"]["max"] > 0
+
+
+def test_async_waiters_are_handed_slots_in_fifo_order():
+    async def run():
+        scheduler = AsyncGenerationScheduler(default_limit=1, limits={}, queue_size=5)
+        order = []
+        await scheduler.acquire("m")
+
+        async def worker(name):
+            async with scheduler.slot("m"):
+                order.append(name)
+
+        workers = []
+        for name in ("first", "second", "third"):
+            workers.append(asyncio.create_task(worker(name)))
+            await asyncio.sleep(0)
+        assert scheduler.stats()["models"]["m"]["queued"] == 3
+        scheduler.release("m")
+        await asyncio.gather(*workers)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["first", "second", "third"]
+    assert stats["models"]["m"]["running"] == 0
+    assert stats["admitted"] == 4
+
+
+def test_async_queue_full_and_timeout():
+    async def run():
+        scheduler = AsyncGenerationScheduler(
+            default_limit=1, limits={}, queue_size=1, queue_timeout=0.05
+        )
+        await scheduler.acquire("m")
+        waiting = asyncio.create_task(scheduler.acquire("m"))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerBusy) as rejected:
+            await scheduler.acquire("m")
+        with pytest.raises(SchedulerBusy) as timed_out:
+            await waiting
+        return scheduler.stats(), rejected.value, timed_out.value
+
+    stats, rejected, timed_out = asyncio.run(run())
+    assert rejected.status_code == 429
+    assert timed_out.status_code == 503
+    assert stats["models"]["m"]["queued"] == 0
+    assert stats["timed_out"] == 1
+
+
+def test_async_cancelled_waiter_leaves_the_queue():
+    async def run():
+        scheduler = AsyncGenerationScheduler(default_limit=1, limits={}, queue_size=5)
+        await scheduler.acquire("m")
+        cancelled = asyncio.create_task(scheduler.acquire("m"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        scheduler.release("m")
+        await scheduler.acquire("m")
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["models"]["m"] == {
+        "limit": 1,
+        "running": 1,
+        "queued": 0,
+        "avg_service_seconds": None,
+    }
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from db.db import Base, add_tasks_to_db, delete_tasks_in_db, search_tasks_statement
+from services.search import (
+    SearchIndex,
+    decode_search_cursor,
+    next_search_cursor,
+    search_configs,
+    search_index,
+    search_tasks,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    search_index.clear()
+    try:
+        yield session
+    finally:
+        session.close()
+        search_index.clear()
+
+
+def test_search_index_matches_all_words_and_ranks_by_share():
+    index = SearchIndex()
+    index.build(
+        [
+            (1, "Count the tiles in the bathroom"),
+            (2, "Count tiles"),
+            (3, "Sort pens"),
+            (4, "Count the pens"),
+        ]
+    )
+
+    assert index.search("count tiles") == [(1.0, 2), (2 / 6, 1)]
+    assert index.search("Tiles!") == [(0.5, 2), (1 / 6, 1)]
+    assert index.search("count missing") == []
+
+
+def test_search_index_pages_with_keyset_cursor():
+    index = SearchIndex()
+    index.build([(task_id, "Nap") for task_id in range(1, 6)])
+
+    first = index.search("nap", limit=2)
+    second = index.search("nap", limit=2, after=first[-1])
+    index.remove([2])
+
+    assert [task_id for _, task_id in first] == [5, 4]
+    assert [task_id for _, task_id in second] == [3, 2]
+    assert index.search("nap", after=second[0]) == [(1.0, 1)]
+
+
+def test_search_tasks_falls_back_to_the_index_and_drops_deleted_tasks(db):
+    add_tasks_to_db(db, ["Hum a tune", "Hum loudly", "Nap"])
+    search = search_tasks.__wrapped__
+
+    page = search(db, "hum", limit=1)
+    assert [task["task_text"] for task in page] == ["Hum loudly"]
+    cursor = next_search_cursor(page, 1)
+    assert decode_search_cursor(cursor) == (0.5, 2)
+    assert [task["task_text"] for task in search(db, "hum", after=cursor)] == [
+        "Hum a tune"
+    ]
+
+    delete_tasks_in_db(db)
+    assert search(db, "hum") == []
+    # Only the deleted tasks the search ran into are dropped.
+    assert search_index.stats()["tasks"] == 1
+
+
+def test_search_statement_uses_the_indexed_tsvector():
+    statement = search_tasks_statement("( 'tile' )", limit=5, after=(0.1, 7))
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "WHERE tasks.search_vector @@ CAST(%(param_1)s AS TSQUERY)" in sql
+    assert "ts_rank(tasks.search_vector" in sql
+    assert "AS REAL)" in sql
+    assert search_configs("Deutsch") == ["german"]
+    assert search_configs("Klingon") == ["simple"]
+    assert "simple" in search_configs()
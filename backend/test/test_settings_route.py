@@ -1,7 +1,9 @@
 import pytest
 from flask import Flask
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from routes.settings import settings_bp
+from services.settings import SettingsCache, settings_etag
+from services.ollama import OLLAMA_URL
 
 
 @pytest.fixture
@@ -19,16 +21,70 @@ def client(app):
 def test_get_settings(client):
     mock_settings = {"theme": "dark"}
 
-    with patch("routes.settings.get_settings") as mocked_get:
-        mocked_get.return_value = type("obj", (object,), {"settings": mock_settings})()
+    with patch(
+        "routes.settings.settings_cache.get", return_value=(mock_settings, "abc")
+    ):
         response = client.get("/settings")
         assert response.status_code == 200
         assert response.get_json() == mock_settings
+        assert response.headers["ETag"] == '"abc"'
+
+        response = client.get("/settings", headers={"If-None-Match": '"abc"'})
+        assert response.status_code == 304
+        assert response.data == b""
 
 
 def test_post_settings(client):
-    with patch("routes.settings.save_settings") as mocked_save:
+    with (
+        patch("routes.settings.save_settings") as mocked_save,
+        patch("routes.settings.model_warmer") as mocked_warmer,
+    ):
         response = client.post("/settings", json={"theme": "light"})
         mocked_save.assert_called_once_with({"theme": "light"})
+        mocked_warmer.warm_up_async.assert_not_called()
         assert response.status_code == 200
         assert response.get_json() == {"message": "Settings saved"}
+        assert response.headers["ETag"] == f'"{settings_etag({"theme": "light"})}"'
+
+
+def test_post_settings_warms_up_model(client):
+    with (
+        patch("routes.settings.save_settings"),
+        patch("routes.settings.model_warmer") as mocked_warmer,
+    ):
+        client.post("/settings", json={"MODEL": "smollm2:1.7b"})
+        mocked_warmer.warm_up_async.assert_called_once_with(OLLAMA_URL, "smollm2:1.7b")
+
+
+def test_settings_cache_reloads_after_invalidate_or_ttl():
+    now = [0.0]
+    load = MagicMock(side_effect=[{"MODEL": "a"}, {"MODEL": "b"}, {"MODEL": "c"}])
+    cache = SettingsCache(load=load, ttl=30, clock=lambda: now[0])
+
+    settings, etag = cache.get()
+    assert cache.get() == (settings, etag)
+    assert load.call_count == 1
+
+    cache.invalidate()
+    assert cache.get()[0] == {"MODEL": "b"}
+
+    now[0] = 31
+    assert cache.get() == ({"MODEL": "c"}, settings_etag({"MODEL": "c"}))
+    assert cache.stats()["hits"] == 1
+
+
+def test_settings_loaded_before_a_save_are_not_cached():
+    loaded = iter([{"MODEL": "old"}, {"MODEL": "new"}])
+
+    def load():
+        settings = next(loaded)
+        if settings["MODEL"] == "old":
+            # A save and its invalidate() land while the old settings load.
+            cache.invalidate()
+        return settings
+
+    cache = SettingsCache(load=load, ttl=30, clock=lambda: 0.0)
+
+    assert cache.get()[0] == {"MODEL": "old"}
+    assert cache.get()[0] == {"MODEL": "new"}
+    assert cache.get()[0] == {"MODEL": "new"}
@@ -0,0 +1,124 @@
+import threading
+from unittest.mock import patch
+
+from services.task_pool import TaskPool, is_poolable
+
+
+def _wait_for_refill(pool):
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join(timeout=2)
+
+
+def test_take_from_empty_pool_is_a_miss():
+    pool = TaskPool(lambda language, model: "task", high_watermark=3, low_watermark=1)
+    assert pool.take("english", "m") is None
+    assert pool.stats()["misses"] == 1
+
+
+def test_refill_up_to_high_watermark_and_serve_hits():
+    produced = []
+
+    def produce(language, model):
+        produced.append((language, model))
+        return f"task {len(produced)}"
+
+    pool = TaskPool(produce, high_watermark=3, low_watermark=1)
+    assert pool.ensure_filled("english", "m") is True
+    _wait_for_refill(pool)
+
+    assert pool.depth("english", "m") == 3
+    assert pool.take("english", "m") == "task 1"
+    assert pool.ensure_filled("english", "m") is False  # still above low watermark
+
+    stats = pool.stats()
+    assert stats["hits"] == 1
+    assert stats["depth"] == {"english|m": 2}
+    assert stats["refill_lag_seconds"]["last"] is not None
+
+
+def test_refill_errors_are_counted():
+    def produce(language, model):
+        raise RuntimeError("ollama down")
+
+    pool = TaskPool(produce, high_watermark=2, low_watermark=0)
+    pool.ensure_filled("english", "m")
+    _wait_for_refill(pool)
+
+    assert pool.depth("english", "m") == 0
+    assert pool.stats()["refill_errors"] == 1
+    assert pool.stats()["refills_in_progress"] == 0
+
+
+def test_disabled_pool_never_refills():
+    pool = TaskPool(lambda language, model: "task", high_watermark=0)
+    assert pool.ensure_filled("english", "m") is False
+    assert pool.take("english", "m") is None
+
+
+def test_take_on_a_miss_creates_no_pool():
+    pool = TaskPool(lambda language, model: "task", high_watermark=3, low_watermark=1)
+    pool.take("english", "m")
+    assert pool.stats()["depth"] == {}
+
+
+def test_rejected_pairs_are_not_pooled():
+    produced = []
+    pool = TaskPool(
+        lambda language, model: produced.append(language),
+        high_watermark=3,
+        accepts=lambda language, model: language == "english",
+    )
+    assert pool.ensure_filled("klingon", "m") is False
+    assert pool.take("klingon", "m") is None
+    assert produced == []
+    assert pool.stats()["depth"] == {}
+    assert pool.stats()["misses"] == 0
+
+
+def test_least_recently_used_idle_pool_is_evicted():
+    discarded = []
+    pool = TaskPool(
+        lambda language, model: f"task {model}",
+        high_watermark=1,
+        low_watermark=0,
+        max_keys=2,
+        discard=discarded.append,
+    )
+    pool.ensure_filled("english", "a")
+    pool.ensure_filled("english", "b")
+    _wait_for_refill(pool)
+    assert pool.take("english", "a") == "task a"
+    pool.ensure_filled("english", "a")
+    pool.ensure_filled("english", "c")
+    _wait_for_refill(pool)
+
+    stats = pool.stats()
+    assert set(stats["depth"]) == {"english|a", "english|c"}
+    assert stats["evictions"] == 1
+    assert discarded == ["task b"]
+
+
+def test_pools_being_refilled_are_not_evicted():
+    release = threading.Event()
+
+    def produce(language, model):
+        release.wait(timeout=2)
+        return "task"
+
+    pool = TaskPool(produce, high_watermark=1, low_watermark=0, max_keys=1)
+    assert pool.ensure_filled("english", "a") is True
+    assert pool.ensure_filled("english", "b") is False
+    release.set()
+    _wait_for_refill(pool)
+
+    assert pool.stats()["depth"] == {"english|a": 1}
+
+
+def test_only_known_languages_and_the_saved_model_are_poolable():
+    with patch("services.task_pool.get_saved_model", return_value="m"):
+        assert is_poolable("English", "m")
+        assert is_poolable("deutsch", "m")
+        assert not is_poolable("klingon", "m")
+        assert not is_poolable("english", "other")
+        assert not is_poolable(["english"], "m")
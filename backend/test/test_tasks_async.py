@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+
+from db import async_db
+from db.db import Base
+from services.model_cache import model_cache
+from services.ollama_async import async_ollama_client
+from services.tasks import count_tasks, list_tasks, save_task
+from services.tasks_async import request_task_text, stream_task
+from services.transfer import parse_task_record
+
+
+class _OllamaStub:
+    """Stand-in for Ollama's /api/tags and /api/generate."""
+
+    def __init__(self):
+        self.missing_model_responses = 0
+        self.generate_requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._reply(200, [{"models": [{"name": "m"}]}])
+
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                stub.generate_requests += 1
+                if stub.missing_model_responses:
+                    stub.missing_model_responses -= 1
+                    self._reply(404, [{"error": "model 'm' not found"}])
+                elif request["stream"]:
+                    self._reply(
+                        200,
+                        [
+                            {"response": "Hum ", "done": False},
+                            {"response": "a tune", "done": False},
+                            {"response": "", "done": True, "eval_count": 2},
+                        ],
+                    )
+                else:
+                    self._reply(200, [{"response": " Nap ", "total_duration": 5}])
+
+            def _reply(self, status, chunks):
+                body = b"".join(json.dumps(c).encode() + b"\n" for c in chunks)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def ollama():
+    stub = _OllamaStub()
+    yield stub
+    stub.close()
+    model_cache.invalidate()
+
+
+def _run(coroutine):
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await async_ollama_client.close()
+
+    return asyncio.run(run())
+
+
+def test_request_task_text_retries_after_missing_model(ollama):
+    model_cache.mark_available(ollama.url, "m")
+    ollama.missing_model_responses = 1
+
+    task, generation = _run(request_task_text(ollama.url, "english", "m"))
+
+    assert task == "Nap"
+    assert generation["total_duration"] == 5
+    assert ollama.generate_requests == 2
+
+
+def test_stream_task_yields_tokens_then_stored_task(ollama):
+    async def collect():
+        return [event async for event in stream_task(ollama.url, "english", "m")]
+
+    with patch(
+        "services.tasks_async.run_in_session", new=AsyncMock(return_value="Hum a tune")
+    ) as mock_run:
+        events = _run(collect())
+
+    assert events == [{"token": "Hum "}, {"token": "a tune"}, {"task": "Hum a tune"}]
+    service, task_text, generation = mock_run.await_args.args
+    assert service is save_task
+    assert task_text == "Hum a tune"
+    assert generation["eval_count"] == 2
+
+
+def test_run_in_session_runs_services_on_the_async_driver(tmp_path):
+    path = tmp_path / "tasks.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    async_db.init_async_db(f"sqlite+aiosqlite:///{path}")
+
+    async def run():
+        try:
+            await async_db.run_in_session(save_task, "Sort pens")
+            return await async_db.run_in_session(list_tasks, limit=5)
+        finally:
+            await async_db.dispose_async_db()
+
+    tasks = asyncio.run(run())
+    assert [task["task_text"] for task in tasks] == ["Sort pens"]
+
+
+def test_import_tasks_in_session_counts_the_imported_tasks(tmp_path):
+    path = tmp_path / "tasks.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    async_db.init_async_db(f"sqlite+aiosqlite:///{path}")
+    rows = [
+        parse_task_record('{"task_text": "Sort pens", "favorite": 1}'),
+        parse_task_record('{"task_text": "Hum"}'),
+    ]
+
+    async def run():
+        try:
+            imported = await async_db.import_tasks_in_session(rows)
+            total = await async_db.run_in_session(count_tasks)
+            favorites = await async_db.run_in_session(count_tasks, favorite=True)
+            return imported, total, favorites
+        finally:
+            await async_db.dispose_async_db()
+
+    assert asyncio.run(run()) == (2, 2, 1)
@@ -1,7 +1,13 @@
+from datetime import datetime
+
 import pytest
 from flask import Flask
 from unittest.mock import patch
 from routes.tasks import tasks_bp
+from services.dedup import DuplicateTaskError
+from services.ollama import OLLAMA_URL
+from services.model_pulls import ModelNotReady
+from services.scheduler import SchedulerBusy
 
 
 @pytest.fixture
@@ -16,6 +22,21 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture(autouse=True)
+def data_version():
+    with patch(
+        "routes.tasks.task_data_version", return_value=(7, datetime(2025, 1, 1))
+    ) as mock_version:
+        yield mock_version
+
+
+@pytest.fixture(autouse=True)
+def task_pool():
+    with patch("routes.tasks.task_pool") as mock_pool:
+        mock_pool.take.return_value = None
+        yield mock_pool
+
+
 def test_create_task_success(client):
     with patch("routes.tasks.generate_task", return_value="mock task") as mock_gen:
         response = client.post(
@@ -26,6 +47,37 @@ def test_create_task_success(client):
         mock_gen.assert_called_once()
 
 
+def test_create_task_from_pool(client, task_pool):
+    task_pool.take.return_value = (-1, "pooled task", {"model": "fake-model"})
+    with (
+        patch("routes.tasks.generate_task") as mock_gen,
+        patch("routes.tasks.release_pooled_task", return_value=True),
+        patch("routes.tasks.save_task", return_value="pooled task") as mock_save,
+    ):
+        response = client.post(
+            "/tasks", json={"language": "german", "model": "fake-model"}
+        )
+        assert response.status_code == 201
+        assert response.get_json() == {"task": "pooled task"}
+        mock_gen.assert_not_called()
+        mock_save.assert_called_once_with("pooled task", {"model": "fake-model"})
+        task_pool.ensure_filled.assert_called_once_with("german", "fake-model")
+
+
+def test_create_task_skips_pooled_duplicates(client, task_pool):
+    stale = (-1, "Fold socks", {"model": "fake-model"})
+    task_pool.take.side_effect = [stale, stale, None]
+    with (
+        patch("routes.tasks.generate_task", return_value="fresh task") as mock_gen,
+        patch("routes.tasks.release_pooled_task", return_value=False),
+        patch("routes.tasks.save_task") as mock_save,
+    ):
+        response = client.post("/tasks", json={"model": "fake-model"})
+        assert response.get_json() == {"task": "fresh task"}
+        mock_save.assert_not_called()
+        mock_gen.assert_called_once()
+
+
 def test_create_task_failure(client):
     with patch("routes.tasks.generate_task", side_effect=Exception("fail")):
         response = client.post("/tasks")
@@ -33,6 +85,91 @@ def test_create_task_failure(client):
         assert "error" in response.get_json()
 
 
+def test_create_task_busy_returns_retry_after(client):
+    with patch(
+        "routes.tasks.generate_task",
+        side_effect=SchedulerBusy("fake-model", retry_after=7, status_code=429),
+    ):
+        response = client.post("/tasks", json={"model": "fake-model"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+
+
+def test_create_task_stream_forwards_tokens(client, task_pool):
+    events = iter([{"token": "Count "}, {"token": "tiles"}, {"task": "Count tiles"}])
+    with (
+        patch("routes.tasks.ensure_model_exists"),
+        patch("routes.tasks.stream_task", return_value=events),
+    ):
+        response = client.post("/tasks/stream", json={"model": "fake-model"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.get_data(as_text=True) == (
+            'data: {"token": "Count "}\n\n'
+            'data: {"token": "tiles"}\n\n'
+            'data: {"task": "Count tiles"}\n\n'
+        )
+    # A miss primes the pool for the next request.
+    task_pool.ensure_filled.assert_called_once_with("english", "fake-model")
+
+
+def test_create_task_stream_reports_rejected_duplicates(client, task_pool):
+    def events():
+        yield {"token": "Count tiles"}
+        raise DuplicateTaskError("Only duplicates generated for 'fake-model'")
+
+    with (
+        patch("routes.tasks.ensure_model_exists"),
+        patch("routes.tasks.stream_task", return_value=events()),
+    ):
+        response = client.post("/tasks/stream", json={"model": "fake-model"})
+        assert response.get_data(as_text=True) == (
+            'data: {"token": "Count tiles"}\n\n'
+            'data: {"error": "Only duplicates of existing tasks generated."}\n\n'
+        )
+    task_pool.ensure_filled.assert_not_called()
+
+
+def test_create_task_stream_serves_pooled_task(client, task_pool):
+    task_pool.take.return_value = (-1, "pooled task", {"model": "fake-model"})
+    with (
+        patch("routes.tasks.stream_task") as mock_stream,
+        patch("routes.tasks.release_pooled_task", return_value=True),
+        patch("routes.tasks.save_task", return_value="pooled task") as mock_save,
+    ):
+        response = client.post("/tasks/stream", json={"model": "fake-model"})
+        assert response.get_data(as_text=True) == 'data: {"task": "pooled task"}\n\n'
+        mock_stream.assert_not_called()
+        mock_save.assert_called_once_with("pooled task", {"model": "fake-model"})
+
+
+def test_create_task_batch(client):
+    result = {"tasks": ["a", "b"], "count": 2, "tasks_per_second": 1.0}
+    with patch("routes.tasks.generate_task_batch", return_value=result) as mock_gen:
+        response = client.post("/tasks/batch", json={"model": "m", "count": 2})
+        assert response.status_code == 201
+        assert response.get_json() == result
+        mock_gen.assert_called_once_with(OLLAMA_URL, "english", "m", 2)
+
+
+def test_create_task_batch_invalid_count(client):
+    response = client.post("/tasks/batch", json={"count": 0})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_create_task_while_model_is_pulled(client):
+    progress = {"model": "fake-model", "state": "pulling", "percent": 42.0}
+    with patch(
+        "routes.tasks.generate_task",
+        side_effect=ModelNotReady("fake-model", progress),
+    ):
+        response = client.post("/tasks", json={"model": "fake-model"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "10"
+        assert response.get_json()["pull"] == progress
+
+
 def test_get_tasks(client):
     with patch(
         "routes.tasks.list_tasks", return_value=[{"id": 1, "task_text": "test"}]
@@ -42,6 +179,130 @@ def test_get_tasks(client):
         assert isinstance(response.get_json(), list)
 
 
+def test_get_tasks_returns_next_cursor(client):
+    tasks = [
+        {"id": 2, "task_text": "b", "created_at": datetime(2025, 1, 2, 10, 0)},
+        {"id": 1, "task_text": "a", "created_at": datetime(2025, 1, 1, 10, 0)},
+    ]
+    with patch("routes.tasks.list_tasks", return_value=tasks) as mock_list:
+        response = client.get("/tasks?limit=2&after=2025-01-03T00:00:00,3")
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "2025-01-01T10:00:00,1"
+        mock_list.assert_called_once_with(
+            skip=0, limit=2, favorite=None, after="2025-01-03T00:00:00,3"
+        )
+
+
+def test_get_tasks_with_total(client):
+    page = {
+        "items": [{"id": 1, "task_text": "a"}],
+        "total": 11,
+        "page": {"skip": 10, "limit": 10, "after": None},
+        "next_cursor": None,
+    }
+    with (
+        patch("routes.tasks.list_tasks_page", return_value=page) as mock_page,
+        patch("routes.tasks.list_tasks") as mock_list,
+    ):
+        response = client.get("/tasks?skip=10&limit=10&favorite=1&include_total=1")
+        assert response.status_code == 200
+        assert response.get_json() == page
+        assert "X-Next-Cursor" not in response.headers
+        mock_page.assert_called_once_with(skip=10, limit=10, favorite=1, after=None)
+        mock_list.assert_not_called()
+
+
+def test_search_tasks_returns_next_cursor(client):
+    results = [
+        {"id": 4, "task_text": "Count tiles", "rank": 0.2},
+        {"id": 2, "task_text": "Tile the roof", "rank": 0.1},
+    ]
+    with patch("routes.tasks.search_tasks", return_value=results) as mock_search:
+        response = client.get("/tasks/search?q=%20tiles%20&limit=2&language=english")
+
+    assert response.status_code == 200
+    assert response.get_json() == results
+    assert response.headers["X-Next-Cursor"] == "0.1,2"
+    assert response.headers["ETag"] == '"tasks-7"'
+    mock_search.assert_called_once_with(
+        "tiles", limit=2, after=None, language="english"
+    )
+
+
+@pytest.mark.parametrize(
+    "query", ["", "q=", "q=x&limit=0", "q=x&limit=101", "q=x&after=best"]
+)
+def test_search_tasks_invalid_arguments(client, query):
+    with patch("routes.tasks.search_tasks") as mock_search:
+        response = client.get(f"/tasks/search?{query}")
+
+    assert response.status_code == 400
+    mock_search.assert_not_called()
+
+
+def test_export_tasks_streams_ndjson(client):
+    lines = ['{"id":1,"task_text":"Nap"}\n', '{"id":2,"task_text":"Hum"}\n']
+    with patch("routes.tasks.export_tasks", return_value=iter(lines)) as mock_export:
+        response = client.get("/tasks/export?favorite=1")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.get_data(as_text=True) == "".join(lines)
+    mock_export.assert_called_once_with(favorite=1)
+
+
+def test_import_tasks_reports_skipped_lines(client):
+    with (
+        patch("services.transfer.insert_task_rows", side_effect=len) as mock_insert,
+        patch("services.transfer.retained_task_times", return_value=[]),
+        patch("services.transfer.finish_task_import"),
+    ):
+        response = client.post(
+            "/tasks/import", data=b'{"task_text":"Nap"}\n{"task_text":""}\n'
+        )
+
+    assert response.status_code == 200
+    assert response.get_json()["imported"] == 1
+    assert response.get_json()["errors"] == [
+        {"line": 2, "error": "Missing 'task_text'"}
+    ]
+    assert mock_insert.call_args.args[0][0]["task_text"] == "Nap"
+
+
+def test_import_tasks_without_valid_lines(client):
+    with (
+        patch("services.transfer.insert_task_rows") as mock_insert,
+        patch("services.transfer.retained_task_times", return_value=[]),
+        patch("services.transfer.finish_task_import"),
+    ):
+        response = client.post("/tasks/import", data=b"[1, 2]\n")
+
+    assert response.status_code == 400
+    assert response.get_json()["skipped"] == 1
+    mock_insert.assert_not_called()
+
+
+def test_get_tasks_invalid_cursor(client):
+    response = client.get("/tasks?after=yesterday")
+    assert response.status_code == 400
+
+
+def test_get_tasks_not_modified(client, data_version):
+    with patch("routes.tasks.list_tasks", return_value=[]) as mock_list:
+        response = client.get("/tasks")
+        assert response.headers["ETag"] == '"tasks-7"'
+        assert response.headers["Last-Modified"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+        response = client.get("/tasks", headers={"If-None-Match": '"tasks-7"'})
+        assert response.status_code == 304
+        assert mock_list.call_count == 1
+
+        data_version.return_value = (8, datetime(2025, 1, 2))
+        response = client.get("/tasks", headers={"If-None-Match": '"tasks-7"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"tasks-8"'
+
+
 def test_get_task_count(client):
     with patch("routes.tasks.count_tasks", return_value=42):
         response = client.get("/tasks/count")
@@ -67,3 +328,34 @@ def test_delete_tasks(client):
         response = client.delete("/tasks?keep_favorites=0")
         assert response.status_code == 200
         mock_delete.assert_called_once_with(keep_favorites=False)
+
+
+def test_update_likes_in_bulk(client):
+    with patch("routes.tasks.like_tasks", return_value=2) as mock_like:
+        response = client.post(
+            "/tasks/likes",
+            json={"likes": [{"id": 1, "like": 1}, {"id": 2, "like": 0}]},
+        )
+        assert response.status_code == 200
+        assert response.get_json()["updated"] == 2
+        mock_like.assert_called_once_with({1: 1, 2: 0})
+
+
+def test_update_likes_invalid(client):
+    for body in ({}, {"likes": []}, {"likes": [{"id": "1", "like": 1}]}):
+        response = client.post("/tasks/likes", json=body)
+        assert response.status_code == 400
+
+
+def test_get_generation_stats(client):
+    stats = {"window_seconds": 3600, "models": {}}
+    with patch("routes.tasks.generation_stats", return_value=stats) as mock_stats:
+        response = client.get("/tasks/stats?window=3600")
+        assert response.status_code == 200
+        assert response.get_json() == stats
+        mock_stats.assert_called_once_with(3600)
+
+
+def test_get_generation_stats_invalid_window(client):
+    response = client.get("/tasks/stats?window=0")
+    assert response.status_code == 400
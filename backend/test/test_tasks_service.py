@@ -1,4 +1,27 @@
-from services.tasks import generate_prompt
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from db.db import begin_request_session, end_request_session
+from services.dedup import DuplicateIndex, DuplicateTaskError
+from services.metrics import percentile
+from services.model_cache import model_cache
+from services.tasks import (
+    count_tasks,
+    ensure_model_exists,
+    generate_prompt,
+    generation_stats,
+    hold_pooled_task,
+    list_tasks_page,
+    parse_task_lines,
+    release_pooled_task,
+    request_task_text,
+    request_unique_task_text,
+    stream_task,
+    task_data_version,
+)
 
 
 def test_generate_prompt_contains_language_and_examples():
@@ -9,3 +32,273 @@ def test_generate_prompt_contains_language_and_examples():
     assert "Examples of my favorites" in prompt
     assert "You are 'Procrastination Buddy'" in prompt
     assert prompt.count("\n") > 5
+
+
+def test_parse_task_lines_strips_list_markers():
+    text = '1. Count tiles\n\n- "Sort pens"\n2) Hum a tune\n• Nap'
+    assert parse_task_lines(text) == ["Count tiles", "Sort pens", "Hum a tune", "Nap"]
+
+
+def test_ensure_model_exists_uses_cache():
+    with patch("services.tasks.ollama_client") as mock_client:
+        mock_client.get.return_value = MagicMock(
+            json=lambda: {"models": [{"name": "cached-model"}]}
+        )
+        ensure_model_exists("http://ollama-test", "cached-model")
+        ensure_model_exists("http://ollama-test", "cached-model")
+
+        mock_client.get.assert_called_once_with("http://ollama-test/api/tags")
+        mock_client.post.assert_not_called()
+    model_cache.invalidate()
+
+
+@pytest.mark.parametrize(
+    "installed, requested", [("llama4:latest", "llama4"), ("llama4", "llama4:latest")]
+)
+def test_ensure_model_exists_matches_the_default_tag(installed, requested):
+    with (
+        patch("services.tasks.ollama_client") as mock_client,
+        patch("services.tasks.model_pulls.start") as start,
+    ):
+        mock_client.get.return_value = MagicMock(
+            json=lambda: {"models": [{"name": installed}]}
+        )
+        ensure_model_exists("http://ollama-test", requested)
+
+        assert model_cache.is_available("http://ollama-test", "llama4")
+        start.assert_not_called()
+    model_cache.invalidate()
+
+
+def test_request_task_text_invalidates_cache_on_missing_model():
+    model_cache.mark_available("http://ollama-test", "gone-model")
+    with patch("services.tasks.ollama_client") as mock_client:
+        mock_client.get.return_value = MagicMock(
+            json=lambda: {"models": [{"name": "gone-model"}]}
+        )
+        mock_client.post.side_effect = [
+            MagicMock(status_code=404),
+            MagicMock(
+                status_code=200,
+                json=lambda: {"response": " task ", "total_duration": 1500},
+            ),
+        ]
+        task, generation = request_task_text(
+            "http://ollama-test", "english", "gone-model"
+        )
+
+        assert task == "task"
+        assert generation["model"] == "gone-model"
+        assert generation["total_duration"] == 1500
+        assert generation["eval_count"] is None
+        mock_client.get.assert_called_once_with("http://ollama-test/api/tags")
+    model_cache.invalidate()
+
+
+def _streamed_response():
+    response = MagicMock(status_code=200)
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = [
+        b'{"response": " Count", "done": false}',
+        b"",
+        b'{"response": " tiles ", "done": false}',
+        b'{"response": "", "done": true, "eval_count": 2, "eval_duration": 40}',
+    ]
+    return response
+
+
+def test_stream_task_yields_tokens_and_saves_final_text():
+    model_cache.mark_available("http://ollama-test", "stream-model")
+    index = DuplicateIndex()
+    index.build([])
+    with (
+        patch("services.tasks.ollama_client.post", return_value=_streamed_response()),
+        patch("services.tasks.duplicate_index", index),
+        patch(
+            "services.tasks.save_task", side_effect=lambda text, generation: text
+        ) as save,
+    ):
+        events = list(stream_task("http://ollama-test", "english", "stream-model"))
+
+    assert events == [
+        {"token": " Count"},
+        {"token": " tiles "},
+        {"task": "Count tiles"},
+    ]
+    text, generation = save.call_args.args
+    assert text == "Count tiles"
+    assert generation["eval_count"] == 2
+    assert generation["eval_duration"] == 40
+    model_cache.invalidate()
+
+
+def test_stream_task_replaces_a_streamed_duplicate():
+    model_cache.mark_available("http://ollama-test", "stream-model")
+    index = DuplicateIndex()
+    index.build([(1, "Count tiles")])
+    with (
+        patch("services.tasks.ollama_client.post", return_value=_streamed_response()),
+        patch("services.tasks.duplicate_index", index),
+        patch("services.tasks.request_task_text", return_value=("Nap", {})),
+        patch("services.tasks.save_task", side_effect=lambda text, _: text) as save,
+    ):
+        events = list(stream_task("http://ollama-test", "english", "stream-model"))
+
+    assert events[-1] == {"task": "Nap"}
+    assert save.call_args.args == ("Nap", {})
+    model_cache.invalidate()
+
+
+def test_stream_task_rejects_a_streamed_duplicate():
+    model_cache.mark_available("http://ollama-test", "stream-model")
+    index = DuplicateIndex()
+    index.build([(1, "Count tiles")])
+    with (
+        patch("services.tasks.ollama_client.post", return_value=_streamed_response()),
+        patch("services.tasks.duplicate_index", index),
+        patch("services.tasks.DEDUP_MODE", "reject"),
+        patch("services.tasks.save_task") as save,
+    ):
+        events = stream_task("http://ollama-test", "english", "stream-model")
+        with pytest.raises(DuplicateTaskError):
+            list(events)
+
+    save.assert_not_called()
+    model_cache.invalidate()
+
+
+def test_request_unique_task_text_regenerates_duplicates():
+    with (
+        patch(
+            "services.tasks.request_task_text",
+            side_effect=[("dup", {}), ("fresh", {"model": "m"})],
+        ),
+        patch("services.tasks.duplicate_index") as mock_index,
+    ):
+        mock_index.loaded = True
+        mock_index.find_duplicate.side_effect = lambda text: (
+            1 if text == "dup" else None
+        )
+        assert request_unique_task_text("http://ollama-test", "english", "m") == (
+            "fresh",
+            {"model": "m"},
+        )
+
+
+def test_pooled_tasks_are_duplicates_until_served():
+    index = DuplicateIndex()
+    index.build([])
+    with (
+        patch("services.tasks.duplicate_index", index),
+        patch(
+            "services.tasks.request_task_text",
+            side_effect=[("Fold socks", {}), ("Fold socks", {}), ("Nap", {})],
+        ),
+    ):
+        first = hold_pooled_task(*request_unique_task_text("http://o", "en", "m"))
+        second = hold_pooled_task(*request_unique_task_text("http://o", "en", "m"))
+
+        assert second[1] == "Nap"
+        assert release_pooled_task(first)
+        assert len(index) == 1
+
+
+def test_pooled_task_stored_meanwhile_is_not_released_as_unique():
+    index = DuplicateIndex()
+    index.build([])
+    with patch("services.tasks.duplicate_index", index):
+        pooled = hold_pooled_task("Fold socks", {})
+        index.add(7, "Fold socks")
+
+        assert not release_pooled_task(pooled)
+
+
+def test_generation_stats_per_model_percentiles():
+    rows = [
+        SimpleNamespace(
+            model="m",
+            total_duration=ms * 1_000_000,
+            load_duration=0,
+            eval_count=20,
+            eval_duration=1_000_000_000,
+        )
+        for ms in range(100, 1100, 100)
+    ]
+    with (
+        patch("db.db.get_db", side_effect=lambda: iter([MagicMock()])),
+        patch("services.tasks.get_generation_stats_from_db", return_value=rows),
+    ):
+        stats = generation_stats(3600)
+
+    summary = stats["models"]["m"]
+    assert stats["window_seconds"] == 3600
+    assert summary["count"] == 10
+    assert summary["latency_ms"] == {"p50": 500.0, "p95": 1000.0, "p99": 1000.0}
+    assert summary["tokens_per_second"]["overall"] == 20.0
+
+
+def test_list_tasks_page_reads_page_and_total_in_one_session():
+    task = SimpleNamespace(
+        id=3, task_text="a", created_at=datetime(2025, 1, 1), favorite=1
+    )
+    sessions = []
+
+    def get_db():
+        sessions.append(MagicMock())
+        return iter(sessions[-1:])
+
+    with (
+        patch("db.db.get_db", side_effect=get_db),
+        patch("services.tasks.get_tasks_from_db", return_value=[task]),
+        patch("services.tasks.count_tasks_in_db", return_value=4) as count,
+    ):
+        page = list_tasks_page(limit=1, favorite=1)
+
+    assert len(sessions) == 1
+    count.assert_called_once_with(sessions[0], favorite=1)
+    assert page["total"] == 4
+    assert page["items"][0]["id"] == 3
+    assert page["next_cursor"] == "2025-01-01T00:00:00,3"
+
+
+def test_request_session_is_shared_and_released_before_ollama_calls():
+    sessions = []
+
+    def get_db():
+        sessions.append(MagicMock())
+        yield sessions[-1]
+        sessions[-1].close()
+
+    def generate(*args, **kwargs):
+        # Both reads used the first session, which is closed by now.
+        assert len(sessions) == 1
+        sessions[0].close.assert_called_once()
+        return MagicMock(status_code=200, json=lambda: {"response": "Nap"})
+
+    model_cache.mark_available("http://ollama-test", "m")
+    begin_request_session()
+    try:
+        with (
+            patch("db.db.get_db", side_effect=get_db),
+            patch(
+                "services.tasks.get_task_data_version_from_db", return_value=(1, None)
+            ),
+            patch("services.tasks.count_tasks_in_db", return_value=4),
+            patch("services.tasks.ollama_client.post", side_effect=generate),
+        ):
+            task_data_version()
+            count_tasks()
+            request_task_text("http://ollama-test", "english", "m")
+            count_tasks()
+    finally:
+        end_request_session()
+    model_cache.invalidate()
+
+    assert len(sessions) == 2
+    sessions[1].close.assert_called_once()
+
+
+def test_percentiles_use_the_nearest_rank():
+    assert [percentile([100, 10000], p) for p in (50, 95, 99)] == [100, 10000, 10000]
+    assert percentile(list(range(1, 11)), 99) == 10
+    assert percentile([], 95) is None
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.db import (
+    Base,
+    add_tasks_to_db,
+    count_tasks_in_db,
+    delete_tasks_in_db,
+    get_tasks_from_db,
+    import_tasks_to_db,
+    iter_task_batches_from_db,
+    like_task_in_db,
+)
+from routes.tasks import tasks_bp
+from services.retention import TaskPruner
+from services.transfer import (
+    ImportRejected,
+    IndexRebuild,
+    TaskImport,
+    encode_tasks,
+    finish_task_import,
+    parse_task_record,
+    retained_task_times,
+    task_imports,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_export_and_import_keep_tasks(db):
+    task_ids = add_tasks_to_db(db, ["Nap", "Hum\ta tune", "Count tiles"], model="m")
+    like_task_in_db(db, task_ids[1], 1)
+    before = [(t.task_text, t.favorite, t.created_at) for t in get_tasks_from_db(db)]
+
+    batches = list(iter_task_batches_from_db(db, batch_size=2))
+    body = "".join(encode_tasks(rows) for rows in batches).encode()
+    delete_tasks_in_db(db)
+
+    task_import = TaskImport(chunk_size=2)
+    chunks = []
+    for offset in range(0, len(body), 7):
+        chunks.extend(task_import.feed(body[offset : offset + 7]))
+    chunks.extend(task_import.close())
+    for rows in chunks:
+        task_import.record(import_tasks_to_db(db, rows))
+
+    assert [len(rows) for rows in batches] == [2, 1]
+    assert json.loads(body.splitlines()[0])["model"] == "m"
+    assert [len(rows) for rows in chunks] == [2, 1]
+    assert task_import.summary()["imported"] == 3
+    after = [(t.task_text, t.favorite, t.created_at) for t in get_tasks_from_db(db)]
+    assert after == before
+    assert (count_tasks_in_db(db), count_tasks_in_db(db, favorite=True)) == (3, 1)
+
+
+def test_task_import_skips_invalid_lines():
+    task_import = TaskImport()
+    task_import.feed(
+        b'not json\n{"task_text": "Nap"}\n\n{"task_text": " "}\n'
+        b'{"task_text": "Hum", "favorite": 2}\n\xff\n{"task_text": "Sing"}'
+    )
+    rows = task_import.close()
+
+    assert [row["task_text"] for row in rows[0]] == ["Nap", "Sing"]
+    assert task_import.skipped == 4
+    assert [error["line"] for error in task_import.errors] == [1, 4, 5, 6]
+
+
+def test_parse_task_record_stores_timestamps_in_utc():
+    row = parse_task_record(
+        '{"id": 9, "task_text": "Nap", "created_at": "2025-01-01T12:00:00+02:00"}'
+    )
+
+    assert "id" not in row
+    assert row["created_at"] == datetime(2025, 1, 1, 10, 0)
+    assert (row["favorite"], row["model"], row["eval_count"]) == (0, None, None)
+
+
+def test_finish_task_import_rebuilds_the_indexes_in_the_background():
+    task_import = TaskImport()
+    task_imports.start(task_import)
+    running = len(task_imports.stats()["running"])
+    task_import.record(5)
+    with patch("services.transfer.index_rebuild") as rebuild:
+        finish_task_import(task_import)
+
+    rebuild.start.assert_called_once_with()
+    assert task_imports.stats()["last"]["imported"] == 5
+    assert len(task_imports.stats()["running"]) == running - 1
+
+
+def test_index_rebuilds_run_one_at_a_time():
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def rebuild():
+        runs.append(len(runs))
+        started.set()
+        release.wait(5)
+
+    index_rebuild = IndexRebuild(rebuild)
+    assert index_rebuild.start()
+    started.wait(5)
+    # Both fold into one more run after the current one.
+    assert not index_rebuild.start()
+    assert not index_rebuild.start()
+    release.set()
+    for _ in range(100):
+        if not index_rebuild.stats()["running"]:
+            break
+        time.sleep(0.01)
+
+    assert runs == [0, 1]
+    assert index_rebuild.stats() == {"running": False, "runs": 2, "errors": 0}
+
+
+def _rows(count, favorite=0, created_at=None):
+    return [
+        {"task_text": f"Task {i}", "favorite": favorite, "created_at": created_at}
+        for i in range(count)
+    ]
+
+
+def test_import_is_rejected_before_the_row_limit_would_prune_it():
+    task_import = TaskImport(pruner=TaskPruner(max_rows=5, keep_favorites=True))
+    task_import.admit(_rows(3, created_at=datetime(2025, 1, 1)))
+    # Favorites are kept beyond the limit, so they do not count.
+    task_import.admit(_rows(4, favorite=1, created_at=datetime(2025, 1, 1)))
+
+    with pytest.raises(ImportRejected, match="TASK_RETENTION_MAX_ROWS"):
+        task_import.admit(_rows(3, created_at=datetime(2025, 1, 1)))
+    task_import.admit(_rows(2, created_at=datetime(2025, 1, 1)))
+
+
+def test_import_is_rejected_when_newer_tasks_in_the_table_fill_the_limit(db):
+    pruner = TaskPruner(max_rows=5, keep_favorites=True)
+    add_tasks_to_db(db, [f"Task {i}" for i in range(5)])
+    with patch("db.db.get_db", side_effect=lambda: iter([db])):
+        retained = retained_task_times(pruner)
+    task_import = TaskImport(pruner=pruner)
+    task_import.retain(retained)
+
+    with pytest.raises(ImportRejected, match="TASK_RETENTION_MAX_ROWS"):
+        task_import.admit(_rows(1, created_at=datetime(2025, 1, 1)))
+    # Newer tasks push out tasks of the table, which the policy allows.
+    task_import.admit(_rows(2, created_at=datetime.now() + timedelta(days=1)))
+    # Favorites are kept beyond the limit.
+    task_import.admit(_rows(1, favorite=1, created_at=datetime(2025, 1, 1)))
+
+
+def test_import_of_tasks_past_the_age_limit_is_rejected():
+    task_import = TaskImport(pruner=TaskPruner(max_rows=0, max_age_days=7))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    task_import.admit(_rows(2, created_at=now - timedelta(days=1)))
+
+    with pytest.raises(ImportRejected, match="TASK_RETENTION_MAX_AGE_DAYS"):
+        task_import.admit(_rows(1, created_at=now - timedelta(days=8)))
+
+
+def test_import_route_answers_409_when_rejected():
+    app = Flask(__name__)
+    app.register_blueprint(tasks_bp)
+    body = "".join(json.dumps({"task_text": f"Task {i}"}) + "\n" for i in range(3))
+    pruner = TaskPruner(max_rows=2)
+    with (
+        patch("routes.tasks.TaskImport", lambda: TaskImport(pruner=pruner)),
+        patch("services.transfer.retained_task_times", return_value=[]),
+        patch("services.transfer.insert_task_rows") as insert,
+        patch("services.transfer.finish_task_import"),
+    ):
+        response = app.test_client().post("/tasks/import", data=body)
+
+    assert response.status_code == 409
+    assert response.get_json()["imported"] == 0
+    insert.assert_not_called()
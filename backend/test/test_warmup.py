@@ -0,0 +1,73 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from services.model_pulls import ModelNotReady
+from services.warmup import ModelWarmer
+
+
+def _client(loaded_models):
+    client = MagicMock()
+    client.get.return_value.json.return_value = {
+        "models": [{"name": name} for name in loaded_models]
+    }
+    return client
+
+
+@patch("services.warmup.ensure_model_exists")
+def test_warm_up_records_cold_and_warm_loads(mock_ensure):
+    warmer = ModelWarmer(client=_client([]), keep_alive="10m")
+    assert warmer.warm_up("http://ollama-test", "m") is not None
+
+    warmer._client.get.return_value.json.return_value = {"models": [{"name": "m"}]}
+    warmer.warm_up("http://ollama-test", "m")
+
+    warmer._client.post.assert_called_with(
+        "http://ollama-test/api/generate", json={"model": "m", "keep_alive": "10m"}
+    )
+    loads = warmer.stats()["loads"]["m"]
+    assert loads["cold"]["count"] == 1
+    assert loads["warm"]["count"] == 1
+
+
+@patch("services.warmup.model_pulls")
+@patch("services.warmup.ensure_model_exists")
+def test_warm_up_skips_model_that_failed_to_download(mock_ensure, mock_pulls):
+    mock_ensure.side_effect = ModelNotReady("m", {})
+    mock_pulls.wait.return_value = {"state": "error"}
+    warmer = ModelWarmer(client=_client([]))
+
+    assert warmer.warm_up("http://ollama-test", "m") is None
+    warmer._client.post.assert_not_called()
+
+
+def test_refresh_does_not_wait_for_a_slow_backend():
+    release = threading.Event()
+    warmed = []
+
+    def warm_up(url, model):
+        if url == "http://slow":
+            release.wait(timeout=2)
+        warmed.append(url)
+
+    warmer = ModelWarmer(client=_client([]), keep_warm_interval=0)
+    with patch.object(warmer, "warm_up", side_effect=warm_up) as mock_warm_up:
+        warmer.warm_up_async("http://slow", "m")
+        warmer.warm_up_async("http://fast", "m")
+        _wait_until(lambda: "http://fast" in warmed)
+
+        warmed.clear()
+        warmer.refresh()
+        _wait_until(lambda: "http://fast" in warmed)
+        assert "http://slow" not in warmed
+        # The slow warm-up is still running, so it is not started twice.
+        assert mock_warm_up.call_count == 3
+        release.set()
+        _wait_until(lambda: "http://slow" in warmed)
+
+
+def _wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -19,6 +19,21 @@ case "$1" in
       wget --post-data='{\"name\": \"smollm2:1.7b\"}' --header='Content-Type: application/json' -qO- http://procrastinationbuddy-ollama:11434/api/pull
     "
 
+    echo "Waiting for the backend to be ready..."
+    ready=false
+    for _ in $(seq 1 120); do
+      if docker exec procrastinationbuddy-backend wget -qO /dev/null http://localhost:5001/readyz 2>/dev/null
+      then
+        ready=true
+        break
+      fi
+      sleep 1
+    done
+    if [ "$ready" = false ]
+    then
+        echo "Backend is not ready yet, see http://localhost:5001/readyz"
+    fi
+
     echo -e "\033[0;32m##################################\033[0m"
     echo -e "\033[0;32mAccess UI at http://localhost:8501\033[0m"
     echo -e "\033[0;32m##################################\033[0m"
@@ -21,6 +21,7 @@ TEXTS = {
             "generate_button": "Generate",
             "spinner_text": "Generating task...",
             "no_tasks_text": "No tasks to display.",
+            "model_downloading": "The model is still downloading ({percent}% done), try again shortly.",
         },
         "help": {
             "title": "Why other tools don't help you!",
@@ -57,6 +58,7 @@ TEXTS = {
             "generate_button": "Generiere",
             "spinner_text": "Aufgabe wird generiert...",
             "no_tasks_text": "Keine Aufgaben zum Anzeigen.",
+            "model_downloading": "Das Modell wird noch heruntergeladen ({percent}% fertig), versuche es gleich nochmal.",
         },
         "help": {
             "title": "Warum andere Tools dir nicht helfen!",
@@ -93,6 +95,7 @@ TEXTS = {
             "generate_button": "Generar",
             "spinner_text": "Generando tarea...",
             "no_tasks_text": "No hay tareas para mostrar.",
+            "model_downloading": "El modelo aún se está descargando ({percent}% listo), inténtalo de nuevo en breve.",
         },
         "help": {
             "title": "¡Por qué otras herramientas no te ayudan!",
@@ -129,6 +132,7 @@ TEXTS = {
             "generate_button": "Générer",
             "spinner_text": "Génération de tâche...",
             "no_tasks_text": "Aucune tâche à afficher.",
+            "model_downloading": "Le modèle est encore en téléchargement ({percent}% terminé), réessaie dans un instant.",
         },
         "help": {
             "title": "Pourquoi les autres outils ne vous aident pas !",
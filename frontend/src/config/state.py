@@ -11,6 +11,7 @@ def configure_states():
     st.session_state.setdefault("old_page_number", 1)
     st.session_state.setdefault("show_help_dialog", False)
     st.session_state.setdefault("show_settings_dialog", False)
+    st.session_state.setdefault("notice", None)
 
     backend_settings = load_settings()
     if backend_settings:
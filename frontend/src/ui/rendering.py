@@ -1,5 +1,5 @@
 import streamlit as st
-from utils.tasks_api import create_task, set_task_as_favorite, get_task_count
+from utils.tasks_api import stream_task, set_task_as_favorite
 from utils.text import get_local_text, get_generic_text
 from utils.time import format_time
 
@@ -119,9 +119,12 @@ def render_loading_spinner():
     if st.session_state.running:
         with st.session_state.get("loading_spinner", st.container()):
             with st.spinner(get_local_text()["main"]["spinner_text"]):
-                create_task()
+                st.write_stream(stream_task())
                 st.session_state.running = False
                 st.rerun()
+    elif notice := st.session_state.pop("notice", None):
+        with st.session_state.get("loading_spinner", st.container()):
+            st.info(notice)
     else:
         st.empty()
 
@@ -129,7 +132,7 @@ def render_loading_spinner():
 def render_pagination():
     """Render page navigation pills."""
     page_size = st.session_state.settings["PAGE_SIZE"]
-    total_tasks = get_task_count(st.session_state.feedback_filter)
+    total_tasks = st.session_state.get("task_total", 0)
     total_pages = (total_tasks + page_size - 1) // page_size  # correct ceiling division
 
     if total_pages <= 1:
@@ -5,16 +5,30 @@ from utils.text import handle_request_error
 
 
 def load_settings():
-    """Fetch settings from the backend."""
+    """Fetch settings from the backend, revalidating the copy cached in the
+    session with its ETag instead of downloading it again."""
+    cached = st.session_state.get("settings_cache")
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
     try:
-        response = requests.get(f"{BACKEND_URL}/settings")
+        response = requests.get(f"{BACKEND_URL}/settings", headers=headers)
+        if cached and response.status_code == 304:
+            return cached["settings"]
         response.raise_for_status()
-        return response.json()
+        settings = response.json()
+        _cache_settings(settings, response)
+        return settings
     except requests.exceptions.RequestException as e:
         handle_request_error("loading", e)
         return None
 
 
+def _cache_settings(settings, response):
+    etag = response.headers.get("ETag")
+    st.session_state.settings_cache = (
+        {"settings": settings, "etag": etag} if etag else None
+    )
+
+
 def save_settings():
     """Send updated settings to the backend."""
     try:
@@ -22,6 +36,7 @@ def save_settings():
             f"{BACKEND_URL}/settings", json=st.session_state.settings
         )
         response.raise_for_status()
+        _cache_settings(dict(st.session_state.settings), response)
         return True
     except requests.exceptions.RequestException as e:
         handle_request_error("saving", e)
@@ -1,55 +1,105 @@
+import json
+
 import requests
 import streamlit as st
 from datetime import datetime
 from email.utils import parsedate_to_datetime
 from config.constants import BACKEND_URL
-from utils.text import handle_request_error
+from utils.text import get_local_text, handle_request_error
 
 
 def _get_setting(key: str):
     return st.session_state.settings.get(key)
 
 
-def create_task():
-    """Create a new task based on current language and model settings."""
+def stream_task():
+    """Create a new task and yield its text fragments as they are generated."""
     try:
-        response = requests.post(
-            f"{BACKEND_URL}/tasks",
+        with requests.post(
+            f"{BACKEND_URL}/tasks/stream",
             json={
                 "language": _get_setting("LANGUAGE"),
                 "model": _get_setting("MODEL"),
             },
-        )
-        response.raise_for_status()
-        task_text = response.json()["task"].strip('"')
-
-        task_entry = {"text": task_text, "time": datetime.now().astimezone()}
-        st.session_state.setdefault("task_list", []).insert(0, task_entry)
-
-        page_size = _get_setting("PAGE_SIZE")
-        st.session_state.task_list = st.session_state.task_list[:page_size]
-        return task_text
+            stream=True,
+        ) as response:
+            if _is_model_downloading(response):
+                return
+            response.raise_for_status()
+            streamed = False
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:") :])
+                if "token" in event:
+                    streamed = True
+                    yield event["token"]
+                elif "task" in event:
+                    task_text = event["task"].strip('"')
+                    if not streamed:
+                        yield task_text
+                    _add_to_task_list(task_text)
+                elif "error" in event:
+                    handle_request_error("generating task", event["error"])
     except requests.exceptions.RequestException as e:
         handle_request_error("generating task", e)
-        return "Failed to get a task."
+
+
+def _is_model_downloading(response):
+    """Keep a notice with the pull progress if the backend is still
+    downloading the model. The generation ends with a rerun, so the notice
+    is shown by the next run."""
+    if response.status_code != 503:
+        return False
+    pull = response.json().get("pull")
+    if not pull:
+        return False
+    st.session_state.notice = get_local_text()["main"]["model_downloading"].format(
+        percent=pull.get("percent") or 0
+    )
+    return True
+
+
+def _add_to_task_list(task_text):
+    task_entry = {"text": task_text, "time": datetime.now().astimezone()}
+    st.session_state.setdefault("task_list", []).insert(0, task_entry)
+
+    page_size = _get_setting("PAGE_SIZE")
+    st.session_state.task_list = st.session_state.task_list[:page_size]
 
 
 def fetch_tasks():
-    """Fetch a paginated list of tasks with optional filtering by favorite."""
+    """Fetch a page of tasks, optionally only favorites, together with the
+    total count needed for the pagination."""
     try:
         page = st.session_state.page_number
         page_size = _get_setting("PAGE_SIZE")
         params = {
             "skip": (page - 1) * page_size,
             "limit": page_size,
+            "include_total": 1,
         }
         if st.session_state.feedback_filter:
             params["favorite"] = 1
 
-        response = requests.get(f"{BACKEND_URL}/tasks", params=params)
-        response.raise_for_status()
-
-        task_data = response.json()
+        # Revalidate the last page fetched with the same parameters.
+        cached = st.session_state.get("tasks_cache")
+        headers = (
+            {"If-None-Match": cached["etag"]}
+            if cached and cached["params"] == params
+            else {}
+        )
+        response = requests.get(f"{BACKEND_URL}/tasks", params=params, headers=headers)
+        if headers and response.status_code == 304:
+            task_page = cached["page"]
+        else:
+            response.raise_for_status()
+            task_page = response.json()
+            etag = response.headers.get("ETag")
+            st.session_state.tasks_cache = (
+                {"params": params, "etag": etag, "page": task_page} if etag else None
+            )
+        st.session_state.task_total = task_page["total"]
         st.session_state.task_list = sorted(
             [
                 {
@@ -58,7 +108,7 @@ def fetch_tasks():
                     "time": parsedate_to_datetime(task["created_at"]),
                     "favorite": task.get("favorite", False),
                 }
-                for task in task_data
+                for task in task_page["items"]
             ],
             key=lambda t: t["time"],
             reverse=True,
@@ -80,18 +130,6 @@ def set_task_as_favorite(task, like=0):
         handle_request_error("updating favorite status", e)
 
 
-def get_task_count(favorite=False):
-    """Return the count of tasks, optionally filtered by favorite status."""
-    try:
-        params = {"favorite": 1} if favorite else {}
-        response = requests.get(f"{BACKEND_URL}/tasks/count", params=params)
-        response.raise_for_status()
-        return response.json().get("count", 0)
-    except requests.exceptions.RequestException as e:
-        handle_request_error("fetching task count", e)
-        return 0
-
-
 def delete_tasks():
     """Delete all tasks, optionally preserving favorites."""
     try:
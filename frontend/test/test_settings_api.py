@@ -4,12 +4,41 @@ import requests
 from utils.settings_api import load_settings, save_settings
 
 
+class SessionState(dict):
+    def __getattr__(self, key):
+        return self[key]
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+@patch("utils.settings_api.requests.get")
+@patch("utils.settings_api.st")
+def test_load_settings_revalidates_cached_copy(mock_st, mock_get):
+    mock_st.session_state = SessionState()
+    mock_get.side_effect = [
+        MagicMock(
+            status_code=200,
+            json=lambda: {"theme": "dark"},
+            headers={"ETag": '"v1"'},
+        ),
+        MagicMock(status_code=304),
+    ]
+
+    assert load_settings() == {"theme": "dark"}
+    assert load_settings() == {"theme": "dark"}
+    assert mock_get.call_args_list[0].kwargs["headers"] == {}
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
 @patch("utils.settings_api.handle_request_error")
+@patch("utils.settings_api.st")
 @patch(
     "utils.settings_api.requests.get",
     side_effect=requests.exceptions.RequestException("Network error"),
 )
-def test_load_settings_failure(mock_get, mock_error_handler):
+def test_load_settings_failure(mock_get, mock_st, mock_error_handler):
+    mock_st.session_state = SessionState()
     result = load_settings()
     assert result is None
     mock_error_handler.assert_called_once()
@@ -22,12 +51,16 @@ def test_load_settings_failure(mock_get, mock_error_handler):
 def test_save_settings_success(mock_st, mock_post):
     mock_st.session_state.settings = {"theme": "light"}
 
-    mock_response = MagicMock()
+    mock_response = MagicMock(headers={"ETag": '"v2"'})
     mock_response.raise_for_status.return_value = None
     mock_post.return_value = mock_response
 
     result = save_settings()
     assert result is True
+    assert mock_st.session_state.settings_cache == {
+        "settings": {"theme": "light"},
+        "etag": '"v2"',
+    }
     mock_post.assert_called_once_with(
         "http://localhost:8000/settings", json={"theme": "light"}
     )
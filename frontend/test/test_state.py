@@ -30,6 +30,7 @@ def test_configure_states_with_backend_settings(fake_session_state):
     assert fake_session_state["keep_favorites"] is True
     assert fake_session_state["page_number"] == 1
     assert fake_session_state["old_page_number"] == 1
+    assert fake_session_state["notice"] is None
     assert fake_session_state["settings"] == backend_settings
 
 
@@ -1,14 +1,21 @@
 from unittest.mock import patch, MagicMock
 from config.constants import BACKEND_URL
 from utils.tasks_api import (
-    create_task,
     fetch_tasks,
     set_task_as_favorite,
-    get_task_count,
     delete_tasks,
+    stream_task,
 )
 
 
+class SessionState(dict):
+    def __getattr__(self, key):
+        return self[key]
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
 mock_settings = {
     "LANGUAGE": "en",
     "MODEL": "gpt",
@@ -16,19 +23,39 @@ mock_settings = {
 }
 
 
-@patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
-@patch("utils.tasks_api.requests.post")
-@patch("utils.tasks_api.st")
-def test_create_task_success(mock_st, mock_post, mock_get_setting):
+def _mock_stream_response(mock_post, lines):
     mock_response = MagicMock()
-    mock_response.json.return_value = {"task": '"Do something productive"'}
+    mock_response.__enter__.return_value = mock_response
     mock_response.raise_for_status.return_value = None
+    mock_response.iter_lines.return_value = lines
     mock_post.return_value = mock_response
 
-    result = create_task()
 
-    assert result == "Do something productive"
-    mock_post.assert_called_once()
+@patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
+@patch("utils.tasks_api.requests.post")
+@patch("utils.tasks_api.st")
+def test_stream_task_yields_tokens(mock_st, mock_post, mock_get_setting):
+    _mock_stream_response(
+        mock_post,
+        [
+            'data: {"token": "Count "}',
+            "",
+            'data: {"token": "tiles"}',
+            'data: {"task": "Count tiles"}',
+        ],
+    )
+
+    assert list(stream_task()) == ["Count ", "tiles"]
+    assert mock_post.call_args.kwargs["stream"] is True
+
+
+@patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
+@patch("utils.tasks_api.requests.post")
+@patch("utils.tasks_api.st")
+def test_stream_task_yields_pooled_task_at_once(mock_st, mock_post, mock_get_setting):
+    _mock_stream_response(mock_post, ['data: {"task": "Pooled task"}'])
+
+    assert list(stream_task()) == ["Pooled task"]
 
 
 @patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
@@ -39,26 +66,67 @@ def test_fetch_tasks_success(mock_st, mock_get, mock_get_setting):
     mock_st.session_state.feedback_filter = False
 
     mock_get.return_value = MagicMock(
-        json=lambda: [
+        json=lambda: {
+            "items": [
+                {
+                    "id": 1,
+                    "task_text": "Task A",
+                    "created_at": "Sun, 12 May 2024 10:00:00 GMT",
+                },
+                {
+                    "id": 2,
+                    "task_text": "Task B",
+                    "created_at": "Sun, 12 May 2024 11:00:00 GMT",
+                },
+            ],
+            "total": 5,
+            "page": {"skip": 0, "limit": 2, "after": None},
+            "next_cursor": None,
+        },
+        raise_for_status=lambda: None,
+    )
+
+    fetch_tasks()
+
+    assert len(mock_st.session_state.task_list) == 2
+    assert mock_st.session_state.task_list[0]["text"] == "Task B"  # Sorted newest first
+    assert mock_st.session_state.task_total == 5
+    assert mock_get.call_args.kwargs["params"]["include_total"] == 1
+
+
+@patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
+@patch("utils.tasks_api.requests.get")
+@patch("utils.tasks_api.st")
+def test_fetch_tasks_reuses_cached_page_on_304(mock_st, mock_get, mock_get_setting):
+    mock_st.session_state = SessionState(page_number=1, feedback_filter=False)
+    page = {
+        "items": [
             {
                 "id": 1,
                 "task_text": "Task A",
                 "created_at": "Sun, 12 May 2024 10:00:00 GMT",
-            },
-            {
-                "id": 2,
-                "task_text": "Task B",
-                "created_at": "Sun, 12 May 2024 11:00:00 GMT",
-            },
+            }
         ],
-        raise_for_status=lambda: None,
-    )
+        "total": 1,
+        "page": {"skip": 0, "limit": 2, "after": None},
+        "next_cursor": None,
+    }
+    mock_get.side_effect = [
+        MagicMock(
+            status_code=200,
+            json=lambda: page,
+            headers={"ETag": '"tasks-3"'},
+            raise_for_status=lambda: None,
+        ),
+        MagicMock(status_code=304),
+    ]
 
+    fetch_tasks()
     fetch_tasks()
 
-    assert len(mock_st.session_state.task_list) == 2
-    assert mock_st.session_state.task_list[0]["text"] == "Task B"  # Sorted newest first
-    assert mock_get.called
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"tasks-3"'}
+    assert [task["text"] for task in mock_st.session_state.task_list] == ["Task A"]
+    assert mock_st.session_state.task_total == 1
 
 
 @patch("utils.tasks_api.requests.post")
@@ -82,32 +150,6 @@ def test_set_task_as_favorite_no_change(mock_st, mock_post):
     mock_post.assert_not_called()
 
 
-@patch("utils.tasks_api.requests.get")
-@patch("utils.tasks_api.st")
-def test_get_task_count(mock_st, mock_get):
-    mock_get.return_value = MagicMock(
-        json=lambda: {"count": 42}, raise_for_status=lambda: None
-    )
-
-    count = get_task_count()
-    assert count == 42
-    mock_get.assert_called_once_with(f"{BACKEND_URL}/tasks/count", params={})
-
-
-@patch("utils.tasks_api.requests.get")
-@patch("utils.tasks_api.st")
-def test_get_task_count_favorites(mock_st, mock_get):
-    mock_get.return_value = MagicMock(
-        json=lambda: {"count": 10}, raise_for_status=lambda: None
-    )
-
-    count = get_task_count(favorite=True)
-    assert count == 10
-    mock_get.assert_called_once_with(
-        f"{BACKEND_URL}/tasks/count", params={"favorite": 1}
-    )
-
-
 @patch("utils.tasks_api.requests.delete")
 @patch("utils.tasks_api.st")
 def test_delete_tasks(mock_st, mock_delete):
@@ -119,3 +161,23 @@ def test_delete_tasks(mock_st, mock_delete):
     mock_delete.assert_called_once_with(
         f"{BACKEND_URL}/tasks", params={"keep_favorites": 1}
     )
+
+
+@patch("utils.tasks_api.get_local_text")
+@patch("utils.tasks_api._get_setting", side_effect=lambda k: mock_settings[k])
+@patch("utils.tasks_api.requests.post")
+@patch("utils.tasks_api.st")
+def test_stream_task_reports_model_download(
+    mock_st, mock_post, mock_get_setting, mock_local_text
+):
+    mock_st.session_state = SessionState()
+    mock_local_text.return_value = {"main": {"model_downloading": "{percent}% done"}}
+    _mock_stream_response(mock_post, [])
+    mock_post.return_value.status_code = 503
+    mock_post.return_value.json.return_value = {"pull": {"percent": 42.5}}
+
+    assert list(stream_task()) == []
+    # Shown after the rerun that ends the generation.
+    assert mock_st.session_state.notice == "42.5% done"
+    mock_st.info.assert_not_called()
+    mock_post.return_value.raise_for_status.assert_not_called()